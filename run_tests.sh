@@ -17,6 +17,7 @@ function usage {
   echo "  -h, --help               Print this usage message"
   echo "  -d, --debug              Debug this script -- set -o xtrace"
   echo "  -S, --stdout             Don't capture stdout"
+  echo "  -P, --parallel N         Run the test classes in N parallel worker processes"
   echo "  -- [NOSEOPTIONS]         After the first '--' you can pass arbitrary arguments to nosetests "
 }
 
@@ -32,8 +33,9 @@ wrapper=""
 nova_coverage=0
 config_file=""
 update=0
+parallel=0
 
-if ! options=$(getopt -o VNnfuswcphdsC: -l virtual-env,no-virtual-env,no-site-packages,force,update,smoke,whitebox,nova-coverage,pep8,help,debug,stdout,config: -- "$@")
+if ! options=$(getopt -o VNnfuswcphdsC:P: -l virtual-env,no-virtual-env,no-site-packages,force,update,smoke,whitebox,nova-coverage,pep8,help,debug,stdout,config:,parallel: -- "$@")
 then
     # parse error
     usage
@@ -53,6 +55,7 @@ while [ $# -gt 0 ]; do
     -d|--debug) set -o xtrace;;
     -c|--nova-coverage) let nova_coverage=1;;
     -C|--config) config_file=$2; shift;;
+    -P|--parallel) parallel=$2; shift;;
     -p|--pep8) let just_pep8=1;;
     -s|--smoke) noseargs="$noseargs --attr=type=smoke";;
     -w|--whitebox) noseargs="$noseargs --attr=type=whitebox";;
@@ -108,7 +111,11 @@ function run_coverage_report {
   ${wrapper} python tools/tempest_coverage.py -c report
 }
 
-NOSETESTS="nosetests $noseargs"
+if [ $parallel -gt 0 ]; then
+  NOSETESTS="python -m tempest.parallel --workers $parallel $noseargs"
+else
+  NOSETESTS="nosetests $noseargs"
+fi
 
 if [ $never_venv -eq 0 ]
 then
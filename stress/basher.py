@@ -24,7 +24,7 @@ class BasherAction(object):
         `test_case`  : the name of the class that implements the action
         `pargs`      : positional arguments to the constructor of `test_case`
         `kargs`      : keyword arguments to the constructor of `test_case`
-        `probability`: frequency that each action
+        `probability`: relative frequency of the action, may be fractional
         """
         self.test_case = test_case
         self.pargs = pargs
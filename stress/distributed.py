@@ -0,0 +1,361 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Runs a stress workload from several agent processes at once.
+
+A single driver process is bound by the interpreter lock to a few
+actions per second. The coordinator splits a workload file (see
+stress.workload) into one share per agent, dividing its workers, arrival
+rates and initial resources between them, and hands the shares out over
+authenticated connections. Each agent runs its share with `bash_openstack`
+and sends back the raw samples of its metrics, which the coordinator
+merges into a single report.
+
+Agents are started by the coordinator on the local host, and others can
+connect to it over TCP, for example::
+
+    export STRESS_AUTHKEY=secret
+    PYTHONPATH=. python -m stress.distributed --local-agents 4 \\
+        --remote-agents 2 --listen 0.0.0.0:7300 workload.json
+
+and on each of two other hosts::
+
+    export STRESS_AUTHKEY=secret
+    PYTHONPATH=. python -m stress.distributed --agent coordinator:7300
+
+A `credentials` list of username, password and tenant_name dicts in the
+workload gives agent N the credentials N modulo its length, otherwise
+every agent uses those of tempest.conf. The coordinator clears and scans
+the logs of the compute nodes itself. Agents start their share as soon as
+they receive it, so their setup and phases are only as aligned as their
+start.
+"""
+
+import argparse
+import logging
+import math
+import multiprocessing
+from multiprocessing import connection
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from stress.driver import watch_compute_logs
+import stress.metrics
+from stress import workload
+
+from tempest.common import workers
+
+BASEDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+AUTHKEY_ENV = 'STRESS_AUTHKEY'
+# Seconds to wait for all the agents to connect
+CONNECT_TIMEOUT = 120
+POLL_INTERVAL = 1
+
+# Totals divided between the agents
+SHARED_COUNTS = ('initial_vms', 'initial_keypairs', 'initial_floating_ips',
+                 'initial_volumes', 'max_vms')
+# Thread counts divided between the agents, each keeping at least one
+SHARED_THREADS = ('workers', 'verifiers', 'setup_concurrency')
+SHARED_RATES = ('arrival_rate', 'end_rate')
+
+LOG = logging.getLogger(__name__)
+
+
+def _share(total, index, count):
+    """Return the part of an integer `total` given to agent `index`."""
+    return total // count + (1 if index < total % count else 0)
+
+
+def _split_phase(phase, index, count):
+    phase = dict(phase)
+    if 'workers' in phase:
+        # Agents left without workers just wait for the end of the phase
+        phase['workers'] = _share(int(phase['workers']), index, count)
+    for key in SHARED_RATES:
+        if phase.get(key) is not None:
+            phase[key] = float(phase[key]) / count
+    if 'max_in_flight' in phase:
+        phase['max_in_flight'] = int(math.ceil(
+            float(phase['max_in_flight']) / count))
+    return phase
+
+
+def split_workload(description, count):
+    """Return the shares of a workload description run by `count` agents.
+
+    Every share keeps the actions and durations of the workload, while
+    the numbers of threads and resources and the arrival rates are
+    divided, so that together the agents run the whole workload.
+    """
+    shares = []
+    for index in range(count):
+        share = dict(description)
+        share.pop('credentials', None)
+        for key in SHARED_COUNTS:
+            if key in share:
+                share[key] = _share(int(share[key]), index, count)
+        for key in SHARED_THREADS:
+            if key in share:
+                share[key] = max(_share(int(share[key]), index, count), 1)
+        if share.get('arrival_rate') is not None:
+            share['arrival_rate'] = float(share['arrival_rate']) / count
+        if 'stages' in share:
+            share['stages'] = [[stage[0]] + [float(rate) / count
+                                             for rate in stage[1:]]
+                               for stage in share['stages']]
+        if 'max_in_flight' in share:
+            share['max_in_flight'] = int(math.ceil(
+                float(share['max_in_flight']) / count))
+        if share.get('seed') is not None:
+            share['seed'] = int(share['seed']) + index
+        if 'phases' in share:
+            share['phases'] = [_split_phase(phase, index, count)
+                               for phase in share['phases']]
+        shares.append(share)
+    return shares
+
+
+def _parse_address(address):
+    host, _sep, port = address.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def run_agent(address, authkey):
+    """Run the share of a workload handed by the coordinator at
+    `address`, returning True if it succeeded."""
+    from tempest import clients
+    from tempest.common.utils import data_utils
+
+    conn = connection.Client(address, authkey=authkey)
+    try:
+        conn.send({'host': socket.gethostname(), 'pid': os.getpid()})
+        task = conn.recv()
+        index = task['index']
+        # Tag the names of the resources created by this agent
+        data_utils.WORKER_ID = str(index)
+        description = task['description']
+        metrics = stress.metrics.Metrics(
+            int(description.get('report_interval', 60)))
+        base, ext = os.path.splitext(
+            description.get('report_file', 'stress-report.json'))
+        error = None
+        try:
+            manager = clients.Manager(**task['credentials'])
+            succeeded = workload.run(
+                manager, description, metrics=metrics, scan_logs=False,
+                report_file='%s-agent%d%s' % (base, index, ext or '.json'))
+        except Exception:
+            LOG.exception('Agent %d failed' % index)
+            succeeded = False
+            error = traceback.format_exc()
+        conn.send({'index': index,
+                   'succeeded': succeeded,
+                   'error': error,
+                   'metrics': metrics.dump()})
+    finally:
+        conn.close()
+    return succeeded
+
+
+class Coordinator(object):
+    """Splits a workload between agents and merges their metrics."""
+
+    def __init__(self, description, local_agents, remote_agents=0,
+                 address=('localhost', 0), authkey=None, work_dir=None):
+        """
+        `description`   : workload description, see stress.workload
+        `local_agents`  : number of agent processes started on this host
+        `remote_agents` : number of agents expected to connect to `address`
+        `authkey`       : secret shared with the agents
+        """
+        self.description = description
+        self.local_agents = local_agents
+        self.remote_agents = remote_agents
+        self.authkey = authkey or os.urandom(16).encode('hex')
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='stress-agents-')
+        self._listener = connection.Listener(address, authkey=self.authkey)
+        self._connections = []
+        self._processes = []
+
+    @property
+    def count(self):
+        return self.local_agents + self.remote_agents
+
+    def _start_local_agents(self):
+        host, port = self._listener.address
+        env = dict(os.environ)
+        env[AUTHKEY_ENV] = self.authkey
+        env['PYTHONPATH'] = os.pathsep.join(
+            [BASEDIR] + filter(None, [env.get('PYTHONPATH')]))
+        for index in range(self.local_agents):
+            agent_dir = os.path.join(self.work_dir, 'agent-%d' % index)
+            os.makedirs(agent_dir)
+            log_file = os.path.join(agent_dir, 'agent.log')
+            with open(log_file, 'w') as log:
+                self._processes.append(subprocess.Popen(
+                    [sys.executable, '-m', 'stress.distributed',
+                     '--agent', '%s:%d' % (host, port)],
+                    stdout=log, stderr=subprocess.STDOUT, cwd=agent_dir,
+                    env=env))
+            LOG.info('Local agent %d: log in %s' % (index, log_file))
+
+    def _accept(self):
+        while len(self._connections) < self.count:
+            conn = self._listener.accept()
+            hello = conn.recv()
+            LOG.info('Agent %(pid)s of %(host)s connected' % hello)
+            self._connections.append(conn)
+
+    def connect(self):
+        """Start the local agents and wait for all the agents."""
+        accepter = threading.Thread(target=self._accept,
+                                    name='stress-accept')
+        accepter.daemon = True
+        accepter.start()
+        self._start_local_agents()
+        deadline = time.time() + CONNECT_TIMEOUT
+        while accepter.is_alive():
+            if any(process.poll() is not None
+                   for process in self._processes):
+                raise Exception('A local agent exited before connecting, '
+                                'see the logs in %s' % self.work_dir)
+            if time.time() > deadline:
+                raise Exception('Only %d of %d agents connected' %
+                                (len(self._connections), self.count))
+            accepter.join(POLL_INTERVAL)
+
+    def _task(self, index, share):
+        credentials = self.description.get('credentials')
+        return {'index': index,
+                'description': share,
+                'credentials': (credentials[index % len(credentials)]
+                                if credentials else {})}
+
+    def run(self):
+        """Run the workload, returning its merged `Metrics` and True if
+        every agent succeeded."""
+        shares = split_workload(self.description, self.count)
+        for index, (conn, share) in enumerate(zip(self._connections,
+                                                  shares)):
+            conn.send(self._task(index, share))
+        futures = workers.run_concurrently(
+            lambda conn: conn.recv(),
+            [(conn,) for conn in self._connections], self.count)
+        succeeded = True
+        dumps = []
+        for index, future in enumerate(futures):
+            if future.exception() is not None:
+                LOG.error('Lost agent %d: %s' % (index, future.exception()))
+                succeeded = False
+                continue
+            result = future.result()
+            if result['error']:
+                LOG.error('Agent %d failed:\n%s' % (index, result['error']))
+            succeeded = succeeded and result['succeeded']
+            dumps.append(result['metrics'])
+        if not dumps:
+            raise Exception('No agent returned its metrics')
+        return stress.metrics.merge(dumps), succeeded
+
+    def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._listener.close()
+        for process in self._processes:
+            process.wait()
+
+
+def run(description, local_agents, remote_agents=0,
+        address=('localhost', 0), authkey=None):
+    """Run a workload description from several agents, returning True if
+    it succeeded."""
+    from tempest import clients
+
+    report_file = description.get('report_file', 'stress-report.json')
+    log_errors = []
+    watcher = None
+    if description.get('scan_logs', True):
+        watcher = watch_compute_logs(
+            clients.Manager(),
+            on_error=lambda node, errors: log_errors.append((node, errors)))
+    coordinator = Coordinator(description, local_agents, remote_agents,
+                              address, authkey)
+    try:
+        coordinator.connect()
+        LOG.info('Running %s on %d agents' %
+                 (description.get('name', 'unamed test'), coordinator.count))
+        metrics, succeeded = coordinator.run()
+        if watcher is not None and watcher.scan():
+            succeeded = False
+    finally:
+        coordinator.close()
+        if watcher is not None:
+            watcher.close()
+    for node, errors in log_errors:
+        metrics.record_log_errors(node, errors)
+    metrics.log_summary(LOG)
+    metrics.write_json(report_file)
+    metrics.write_csv(os.path.splitext(report_file)[0] + '.csv')
+    LOG.info('Metrics written to %s' % report_file)
+    return succeeded
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Run a stress workload from several agent processes.')
+    parser.add_argument('workload', nargs='?',
+                        help='Workload file, see stress.workload')
+    parser.add_argument('--agent', metavar='HOST:PORT',
+                        help='Run as an agent of the coordinator at this '
+                             'address')
+    parser.add_argument('--local-agents', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='Number of agents started on this host')
+    parser.add_argument('--remote-agents', type=int, default=0,
+                        help='Number of agents expected to connect')
+    parser.add_argument('--listen', default='localhost:0',
+                        metavar='HOST:PORT',
+                        help='Address the agents connect to')
+    args = parser.parse_args(argv)
+    if not args.agent and not args.workload:
+        parser.error('A workload file is needed')
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if args.agent:
+        if authkey is None:
+            print "%s must be set" % AUTHKEY_ENV
+            return 2
+        return 0 if run_agent(_parse_address(args.agent), authkey) else 1
+    if args.remote_agents and authkey is None:
+        print "%s must be set to share it with remote agents" % AUTHKEY_ENV
+        return 2
+    succeeded = run(workload.load(args.workload), args.local_agents,
+                    args.remote_agents, _parse_address(args.listen), authkey)
+    return 0 if succeeded else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -16,19 +16,30 @@ Users pass in a description of the workload and a nova manager object
 to the bash_openstack function call"""
 
 import datetime
+import math
+import os
 import random
+import sys
+import threading
 import time
 from urlparse import urlparse
 
 from config import StressConfig
+from log_watch import LogWatcher
 from state import ClusterState
 from state import FloatingIpState
 from state import KeyPairState
 from state import VolumeState
+from workload import create_sampler
+from workload import Phase
+import stress.metrics
 import stress.utils
 from test_case import logging
 
 from tempest.common.utils.data_utils import rand_name
+from tempest.common import waiters
+from tempest.common import workers
+from tempest.exceptions import TimeoutException
 
 # setup logging to file
 logging.basicConfig(
@@ -54,16 +65,9 @@ def _create_cases(choice_spec):
     """
     Generate a workload of tests from workload description
     """
-    cases = []
-    count = 0
     for choice in choice_spec:
-        p = choice.probability
-        for i in range(p):
-            cases.append(choice)
-        i = i + p
-        count = count + p
-    assert(count == 100)
-    return cases
+        logging.debug('%s: weight %s' % (choice, choice.probability))
+    return create_sampler(choice_spec)
 
 
 def _get_compute_nodes(keypath, user, controller):
@@ -85,157 +89,660 @@ def _get_compute_nodes(keypath, user, controller):
     return nodes
 
 
-def _error_in_logs(keypath, logdir, user, nodes):
+def watch_compute_logs(manager, on_error=None):
     """
-    Detect errors in the nova log files on the controller and compute nodes.
+    Remove the nova logs of the compute nodes, and return a `LogWatcher`
+    of the logs written from now on.
     """
-    grep = 'egrep "ERROR\|TRACE" %s/*.log' % logdir
-    for node in nodes:
-        errors = stress.utils.ssh(keypath, user, node, grep, check=False)
-        if len(errors) > 0:
-            logging.error('%s: %s' % (node, errors))
-            return True
-    return False
+    stress_config = StressConfig(manager.config)
+    keypath = stress_config.host_private_key_path
+    user = stress_config.host_admin_user
+    logdir = stress_config.nova_logdir
+    host = urlparse(manager.config.identity.uri).hostname
+    computes = _get_compute_nodes(keypath, user, host)
+    stress.utils.execute_on_all(keypath, user, computes,
+                                "rm -f %s/*.log" % logdir)
+    return LogWatcher(keypath, user, computes, logdir, on_error=on_error)
+
+
+class _SetupFailure(Exception):
+
+    def __init__(self, resource_id):
+        super(_SetupFailure, self).__init__(resource_id)
+        self.resource_id = resource_id
+
+
+def _wait_for_statuses(client, list_resources, statuses, error_status,
+                       resource_type):
+    """
+    Wait for many resources to reach their statuses, with one listing per
+    poll.  Returns the listed documents of the resources which did; the
+    others are logged.
+    """
+    pending = dict(statuses)
+    ready = {}
+    while pending:
+        try:
+            ready.update(waiters.wait_for_statuses(
+                list_resources, pending, client.build_interval,
+                client.build_timeout, error_status, _SetupFailure,
+                resource_type))
+            break
+        except _SetupFailure as exc:
+            logging.error('%s %s is in %s status' %
+                          (resource_type, exc.resource_id, error_status))
+            del pending[exc.resource_id]
+        except TimeoutException as exc:
+            logging.error(str(exc))
+            # Keep the resources which got ready before the timeout
+            for resource in list_resources():
+                if pending.get(resource['id']) == resource['status']:
+                    ready[resource['id']] = resource
+            break
+    return ready
+
+
+def _create_concurrently(create, args_list, concurrency, what):
+    """Call `create` for each args tuple, `concurrency` calls at a time.
+    Returns the results of the calls which succeeded and the number of
+    those which failed."""
+    results = []
+    failed = 0
+    for future in workers.run_concurrently(create, args_list,
+                                           max(concurrency, 1)):
+        if future.exception() is not None:
+            logging.error('Unable to create %s: %s' %
+                          (what, future.exception()))
+            failed += 1
+        else:
+            results.append(future.result())
+    return results, failed
+
 
+def _delete_unready(delete, resource_ids, resource_type):
+    """Delete the resources which never got ready, so that they do not
+    leak as the state does not track them."""
+    if not resource_ids:
+        return
+    try:
+        delete(resource_ids)
+    except Exception as exc:
+        logging.error('Unable to delete the %ss %s: %s' %
+                      (resource_type, ', '.join(resource_ids), exc))
 
-def create_initial_vms(manager, state, count):
+
+def create_initial_vms(manager, state, count, concurrency=1, boot_batch=1):
+    """
+    Boot `count` servers, `concurrency` create requests at a time, each
+    request booting up to `boot_batch` servers with min_count/max_count.
+    Returns the number of servers which went ACTIVE and which did not;
+    the latter are deleted.
+    """
     image = manager.config.compute.image_ref
     flavor = manager.config.compute.flavor_ref
-    servers = []
+    client = manager.servers_client
     logging.info('Creating %d vms' % count)
-    for _ in xrange(count):
+
+    def boot(size):
         name = rand_name('initial_vm-')
-        _, server = manager.servers_client.create_server(name, image, flavor)
-        servers.append(server)
-    for server in servers:
-        manager.servers_client.wait_for_server_status(server['id'], 'ACTIVE')
-        logging.info('Server Name: %s Id: %s' % (name, server['id']))
-        state.set_instance_state(server['id'], (server, 'ACTIVE'))
+        if size == 1:
+            _, server = client.create_server(name, image, flavor)
+            return [server]
+        client.create_server(name, image, flavor, min_count=size,
+                             max_count=size)
+        return _list_servers(client, {'name': name})
 
+    batch = max(boot_batch, 1)
+    sizes = [(batch,)] * (count // batch)
+    if count % batch:
+        sizes.append((count % batch,))
+    booted = _create_concurrently(boot, sizes, concurrency, 'vms')[0]
+    servers = dict((server['id'], server)
+                   for servers in booted for server in servers)
 
-def create_initial_floating_ips(manager, state, count):
+    ready = _wait_for_statuses(
+        client, lambda: _list_servers(client),
+        dict((server_id, 'ACTIVE') for server_id in servers), 'ERROR',
+        'Server')
+    for server_id in ready:
+        server = servers[server_id]
+        logging.info('Server Name: %s Id: %s' % (server['name'], server_id))
+        state.set_instance_state(server_id, (server, 'ACTIVE'))
+    _delete_unready(client.delete_servers,
+                    [server_id for server_id in servers
+                     if server_id not in ready], 'server')
+    return len(ready), count - len(ready)
+
+
+def create_initial_floating_ips(manager, state, count, concurrency=1):
     logging.info('Creating %d floating ips' % count)
-    for _ in xrange(count):
+
+    def create():
         _, ip = manager.floating_ips_client.create_floating_ip()
         logging.info('Ip: %s' % ip['ip'])
+        return ip
+
+    ips, failed = _create_concurrently(create, [()] * count, concurrency,
+                                       'floating ip')
+    for ip in ips:
         state.add_floating_ip(FloatingIpState(ip))
+    return len(ips), failed
 
 
-def create_initial_keypairs(manager, state, count):
+def create_initial_keypairs(manager, state, count, concurrency=1):
     logging.info('Creating %d keypairs' % count)
-    for _ in xrange(count):
+
+    def create():
         name = rand_name('keypair-')
         _, keypair = manager.keypairs_client.create_keypair(name)
         logging.info('Keypair: %s' % name)
+        return keypair
+
+    keypairs, failed = _create_concurrently(create, [()] * count,
+                                            concurrency, 'keypair')
+    for keypair in keypairs:
         state.add_keypair(KeyPairState(keypair))
+    return len(keypairs), failed
 
 
-def create_initial_volumes(manager, state, count):
-    volumes = []
+def create_initial_volumes(manager, state, count, concurrency=1):
+    client = manager.volumes_client
     logging.info('Creating %d volumes' % count)
-    for _ in xrange(count):
+
+    def create():
         name = rand_name('volume-')
-        _, volume = manager.volumes_client.create_volume(size=1,
-                                                         display_name=name)
-        volumes.append(volume)
+        _, volume = client.create_volume(size=1, display_name=name)
+        return volume
+
+    volumes = _create_concurrently(create, [()] * count, concurrency,
+                                   'volume')[0]
+
+    def list_volumes():
+        _, body = client.list_volumes_with_detail()
+        return body
+
+    ready = _wait_for_statuses(
+        client, list_volumes,
+        dict((volume['id'], 'available') for volume in volumes), 'error',
+        'Volume')
     for volume in volumes:
-        manager.volumes_client.wait_for_volume_status(volume['id'],
-                                                      'available')
-        logging.info('Volume Name: %s Id: %s' % (name, volume['id']))
-        state.add_volume(VolumeState(volume))
+        if volume['id'] in ready:
+            logging.info('Volume Name: %s Id: %s' %
+                         (volume['display_name'], volume['id']))
+            state.add_volume(VolumeState(volume))
+    _delete_unready(client.delete_volumes,
+                    [volume['id'] for volume in volumes
+                     if volume['id'] not in ready], 'volume')
+    return len(ready), count - len(ready)
 
 
-def bash_openstack(manager,
-                   choice_spec,
-                   **kwargs):
+def _invoke(case, manager, state, metrics, arrival=None):
     """
-    Workload driver. Executes a workload as specified by the `choice_spec`
-    parameter against a nova-cluster.
+    Run an action, timing its API calls.
 
-    `manager`  : Manager object
-    `choice_spec` : list of BasherChoice actions to run on the cluster
-    `kargs`       : keyword arguments to the constructor of `test_case`
-                    `duration`   = how long this test should last (3 sec)
-                    `sleep_time` = time to sleep between actions (in msec)
-                    `test_name`  = human readable workload description
-                                   (default: unnamed test)
-                    `max_vms`    = maximum number of instances to launch
-                                   (default: 32)
-                    `seed`       = random seed (default: None)
+    `arrival` is when an open-loop run scheduled the action; the time it
+    waited for a worker is recorded as its queueing delay.
     """
-    stress_config = StressConfig(manager.config)
-    # get keyword arguments
-    duration = kwargs.get('duration', datetime.timedelta(seconds=10))
-    seed = kwargs.get('seed', None)
-    sleep_time = float(kwargs.get('sleep_time', 3000)) / 1000
-    max_vms = int(kwargs.get('max_vms', stress_config.max_instances))
-    test_name = kwargs.get('test_name', 'unamed test')
+    start = time.time()
+    if arrival is not None:
+        metrics.record(str(case), stress.metrics.QUEUE, arrival, start)
+    try:
+        retry = case.invoke(manager, state)
+    except Exception:
+        metrics.record_error(str(case), stress.metrics.ISSUE)
+        raise
+    metrics.record(str(case), stress.metrics.ISSUE, start, time.time())
+    if retry is not None:
+        retry.action_name = str(case)
+        retry.issued_at = start if arrival is None else arrival
+    return retry
 
-    keypath = stress_config.host_private_key_path
-    user = stress_config.host_admin_user
-    logdir = stress_config.nova_logdir
-    host = urlparse(manager.config.identity.uri).hostname
-    computes = _get_compute_nodes(keypath, user, host)
-    stress.utils.execute_on_all(keypath, user, computes,
-                                "rm -f %s/*.log" % logdir)
-    random.seed(seed)
-    cases = _create_cases(choice_spec)
-    state = ClusterState(max_vms=max_vms)
-    create_initial_keypairs(manager, state,
-                            int(kwargs.get('initial_keypairs', 0)))
-    create_initial_vms(manager, state,
-                       int(kwargs.get('initial_vms', 0)))
-    create_initial_floating_ips(manager, state,
-                                int(kwargs.get('initial_floating_ips', 0)))
-    create_initial_volumes(manager, state,
-                           int(kwargs.get('initial_volumes', 0)))
-    test_end_time = time.time() + duration.seconds
 
+def _list_servers(client, params=None):
+    """
+    List the details of all the servers matching `params`, following the
+    `next` links of the pages Nova cuts the listing in (see
+    osapi_max_limit).
+    """
+    servers = []
+    params = dict(params or {})
+    while True:
+        _resp, body = client.list_servers_with_detail(params or None)
+        servers.extend(body['servers'])
+        links = body.get('servers_links', [])
+        if not body['servers'] or not any(link.get('rel') == 'next'
+                                          for link in links):
+            return servers
+        params['marker'] = body['servers'][-1]['id']
+
+
+def _snapshot_servers(manager, pending):
+    """
+    Hand the `pending` actions one listing of the servers they look at,
+    so that a sweep costs a single request per page of servers whatever
+    their number. Servers missing from the listing are fetched by the
+    verifications, as only the JSON API tells about the next pages.
+    """
+    if not any(v.server_ids() for v in pending):
+        return
+    try:
+        servers = _list_servers(manager.servers_client)
+    except Exception:
+        # Each verification fetches its servers itself instead
+        logging.exception('Unable to list the servers')
+        servers = None
+    else:
+        servers = dict((server['id'], server) for server in servers)
+    for v in pending:
+        v.set_servers(servers)
+
+
+def _verify(pending, metrics):
+    """Check a pending action, returning True once it is verified."""
+    try:
+        pending.check_timeout()
+        verified = pending.retry()
+    except Exception:
+        metrics.record_error(pending.action_name, stress.metrics.COMPLETE)
+        raise
+    if verified:
+        metrics.record(pending.action_name, stress.metrics.COMPLETE,
+                       pending.issued_at, time.time())
+    return verified
+
+
+def _run_serially(manager, state, cases, test_end_time, sleep_time,
+                  error_in_logs, metrics):
+    """
+    Run the workload one action at a time until `test_end_time`.
+
+    Returns False if `error_in_logs` found errors.
+    """
     retry_list = []
     last_retry = time.time()
     cooldown = False
     logcheck_count = 0
-    test_succeeded = True
-    logging.debug('=== Test \"%s\" on %s ===' %
-                  (test_name, time.asctime(time.localtime())))
-    for kw in kwargs:
-        logging.debug('\t%s = %s', kw, kwargs[kw])
-
     while True:
         if not cooldown:
             if time.time() < test_end_time:
-                case = random.choice(cases)
+                case = cases.sample()
                 logging.debug('Chose %s' % case)
-                retry = case.invoke(manager, state)
+                retry = _invoke(case, manager, state, metrics)
                 if retry is not None:
                     retry_list.append(retry)
             else:
                 logging.info('Cooling down...')
                 cooldown = True
         if cooldown and len(retry_list) == 0:
-            if _error_in_logs(keypath, logdir, user, computes):
-                test_succeeded = False
-            break
+            return not error_in_logs()
         # Retry verifications every 5 seconds.
         if time.time() - last_retry > 5:
             logging.debug('retry verifications for %d tasks', len(retry_list))
+            _snapshot_servers(manager, retry_list)
             new_retry_list = []
             for v in retry_list:
-                v.check_timeout()
-                if not v.retry():
+                if not _verify(v, metrics):
                     new_retry_list.append(v)
             retry_list = new_retry_list
             last_retry = time.time()
         time.sleep(sleep_time)
         # Check error logs after 100 actions
         if logcheck_count > 100:
-            if _error_in_logs(keypath, logdir, user, computes):
-                test_succeeded = False
-                break
+            if error_in_logs():
+                return False
             else:
                 logcheck_count = 0
         else:
             logcheck_count = logcheck_count + 1
+
+
+class _ConcurrentRun(object):
+    """State shared by the threads of a concurrent run."""
+
+    def __init__(self, manager, state, metrics):
+        self.manager = manager
+        self.state = state
+        self.metrics = metrics
+        self.stop = threading.Event()
+        self.finished = 0
+        self._lock = threading.Lock()
+        self._retry_list = []
+        self._failures = []
+        self._actions = 0
+
+    def run_action(self, case, arrival=None):
+        """
+        Run an action and queue its verification.  A failure stops the
+        run; returns False if the action failed.
+        """
+        try:
+            retry = _invoke(case, self.manager, self.state, self.metrics,
+                            arrival)
+        except Exception:
+            logging.exception('%s failed' % case)
+            self._failures.append(sys.exc_info())
+            self.stop.set()
+            with self._lock:
+                self.finished += 1
+            return False
+        with self._lock:
+            self._actions += 1
+            self.finished += 1
+            if retry is not None:
+                self._retry_list.append(retry)
+        return True
+
+    def verify_until_done(self, is_done, num_verifiers, error_in_logs):
+        """
+        Every 5 seconds, hand the pending verifications to a pool of
+        `num_verifiers` threads, until `is_done` returns True and every
+        action is verified.  Returns False if `error_in_logs` found errors.
+        """
+        verifier_pool = workers.WorkerPool(num_verifiers,
+                                           name='stress-verifier')
+        logcheck_count = 0
+        cooldown = False
+        try:
+            while True:
+                time.sleep(5)
+                if self._failures:
+                    exc_info = self._failures[0]
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                if not cooldown and is_done():
+                    logging.info('Cooling down...')
+                    cooldown = True
+                with self._lock:
+                    pending = self._retry_list[:]
+                    del self._retry_list[:]
+                    new_actions = self._actions - logcheck_count
+                logging.debug('retry verifications for %d tasks',
+                              len(pending))
+                _snapshot_servers(self.manager, pending)
+                futures = [verifier_pool.submit(_verify, v, self.metrics)
+                           for v in pending]
+                unverified = [v for v, f in zip(pending,
+                                                workers.wait_all(futures))
+                              if not f.result()]
+                with self._lock:
+                    self._retry_list.extend(unverified)
+                if cooldown and not unverified:
+                    return not error_in_logs()
+                # Check error logs after every 100 actions
+                if new_actions > 100:
+                    if error_in_logs():
+                        return False
+                    logcheck_count += new_actions
+        finally:
+            self.stop.set()
+            verifier_pool.shutdown(wait=False)
+
+
+def _closed_loop(run, cases, end_time, sleep_time, num_workers):
+    """
+    Run actions from `num_workers` threads until `end_time`, each thread
+    sleeping `sleep_time` seconds between its actions.
+    """
+    def action_loop():
+        while not run.stop.is_set() and time.time() < end_time:
+            case = cases.sample()
+            logging.debug('Chose %s' % case)
+            if not run.run_action(case):
+                return
+            run.stop.wait(sleep_time)
+
+    if not num_workers:
+        run.stop.wait(max(end_time - time.time(), 0))
+        return
+    action_pool = workers.WorkerPool(num_workers, name='stress-action')
+    try:
+        workers.wait_all([action_pool.submit(action_loop)
+                          for _ in xrange(num_workers)])
+    finally:
+        action_pool.shutdown()
+
+
+def _arrival_times(stages, process, start):
+    """
+    Generate the times at which an open-loop run issues actions.
+
+    `stages`  : list of (`seconds`, `rate`) or (`seconds`, `rate`,
+                `end_rate`) tuples run one after the other; the rate, in
+                actions per second, goes linearly from `rate` to
+                `end_rate` over the stage
+    `process` : 'poisson' for exponential inter-arrival times, or
+                'constant'
+    """
+    def draw():
+        # Actions are due each time the integral of the rate reaches the
+        # next unit (constant) or exponential (poisson) sample
+        if process == 'poisson':
+            return random.expovariate(1.0)
+        return 1.0
+
+    stage_start = start
+    need = draw()
+    for stage in stages:
+        seconds, rate = stage[0], float(stage[1])
+        end_rate = float(stage[2]) if len(stage) > 2 else rate
+        slope = (end_rate - rate) / seconds if seconds else 0.0
+        x = 0.0
+        while True:
+            current = rate + slope * x
+            remaining = (current + end_rate) / 2 * (seconds - x)
+            if need > remaining:
+                need -= remaining
+                break
+            if slope:
+                x += (math.sqrt(current ** 2 + 2 * slope * need) -
+                      current) / slope
+            else:
+                x += need / current
+            yield stage_start + x
+            need = draw()
+        stage_start += seconds
+
+
+def _open_loop(run, cases, stages, process, max_in_flight):
+    """
+    Issue actions at the arrival rates of `stages`, whatever the time the
+    previous actions take.
+
+    Actions run on up to `max_in_flight` threads; an action arriving while
+    all of them are busy waits for one, and that wait is recorded as its
+    queueing delay.
+    """
+    action_pool = workers.WorkerPool(max_in_flight, name='stress-action')
+    try:
+        for arrival in _arrival_times(stages, process, time.time()):
+            delay = arrival - time.time()
+            if delay > 0:
+                run.stop.wait(delay)
+            if run.stop.is_set():
+                return
+            case = cases.sample()
+            logging.debug('Chose %s' % case)
+            action_pool.submit(run.run_action, case, arrival)
+    finally:
+        # Waits for the actions already issued
+        action_pool.shutdown()
+
+
+def _run_phases(manager, state, phases, num_verifiers, error_in_logs,
+                metrics):
+    """
+    Run the `Phase`s of a workload one after the other.
+
+    The phases run in their own thread, while every 5 seconds the main
+    thread hands the pending verifications to a pool of `num_verifiers`
+    threads.  Verifications carry over from one phase to the next.
+    Returns False if `error_in_logs` found errors.
+    """
+    run = _ConcurrentRun(manager, state, metrics)
+
+    def run_phases():
+        for phase in phases:
+            if run.stop.is_set():
+                return
+            logging.info('Phase %s: %d seconds' % (phase, phase.duration))
+            if phase.stages:
+                _open_loop(run, phase.cases, phase.stages,
+                           phase.arrival_process, phase.max_in_flight)
+            else:
+                _closed_loop(run, phase.cases, time.time() + phase.duration,
+                             phase.sleep_time, phase.workers)
+
+    runner = threading.Thread(target=run_phases, name='stress-phases')
+    runner.daemon = True
+    runner.start()
+    try:
+        return run.verify_until_done(lambda: not runner.is_alive(),
+                                     num_verifiers, error_in_logs)
+    finally:
+        run.stop.set()
+        runner.join()
+
+
+def bash_openstack(manager,
+                   choice_spec,
+                   **kwargs):
+    """
+    Workload driver. Executes a workload as specified by the `choice_spec`
+    parameter against a nova-cluster.
+
+    `manager`  : Manager object
+    `choice_spec` : list of BasherChoice actions to run on the cluster,
+                    picked in proportion to their (possibly fractional)
+                    probabilities
+    `kargs`       : keyword arguments to the constructor of `test_case`
+                    `duration`   = how long this test should last (3 sec)
+                    `sleep_time` = time to sleep between actions (in msec)
+                    `test_name`  = human readable workload description
+                                   (default: unnamed test)
+                    `max_vms`    = maximum number of instances to launch
+                                   (default: 32)
+                    `seed`       = random seed (default: None)
+                    `workers`    = number of threads running actions
+                                   concurrently (default: 1); with more
+                                   than one, `seed` does not make the
+                                   sequence of actions reproducible
+                    `verifiers`  = number of threads verifying pending
+                                   actions (default: `workers`)
+                    `report_file` = path of the JSON metrics report; the
+                                   CSV reports are written next to it
+                                   (default: stress-report.json)
+                    `report_interval` = seconds per step of the
+                                   throughput time series (default: 60)
+                    `arrival_rate` = actions issued per second; switches
+                                   to an open-loop run, where actions are
+                                   issued at this rate, in `max_in_flight`
+                                   threads, for `duration`
+                    `stages`     = instead of `arrival_rate`, list of
+                                   (`seconds`, `rate`[, `end_rate`])
+                                   stages of an open-loop run, the rate
+                                   going linearly from `rate` to
+                                   `end_rate` over a stage
+                    `arrival_process` = 'poisson' (default) or 'constant'
+                                   inter-arrival times
+                    `max_in_flight` = maximum number of actions running at
+                                   once in an open-loop run (default: 100)
+                    `phases`     = list of `stress.workload.Phase` to run
+                                   one after the other, instead of
+                                   `choice_spec` and the arguments above
+                                   (see stress.workload)
+                    `initial_vms`, `initial_keypairs`,
+                    `initial_floating_ips`, `initial_volumes` = number of
+                                   resources created before the workload
+                                   starts (default: 0)
+                    `setup_concurrency` = number of those created at once
+                                   (default: 1)
+                    `setup_boot_batch` = number of initial vms booted by
+                                   each create request, using
+                                   min_count/max_count (default: 1)
+                    `log_scan_interval` = also scan the logs of the compute
+                                   nodes for errors every this many
+                                   seconds, in the background (default:
+                                   only every 100 actions and at the end)
+                    `scan_logs`  = whether to clear and scan the logs of
+                                   the compute nodes (default: True)
+                    `metrics`    = `stress.metrics.Metrics` recording the
+                                   run (default: a new one)
+    """
+    stress_config = StressConfig(manager.config)
+    # get keyword arguments
+    duration = kwargs.get('duration', datetime.timedelta(seconds=10))
+    seed = kwargs.get('seed', None)
+    sleep_time = float(kwargs.get('sleep_time', 3000)) / 1000
+    max_vms = int(kwargs.get('max_vms', stress_config.max_instances))
+    test_name = kwargs.get('test_name', 'unamed test')
+    num_workers = int(kwargs.get('workers', 1))
+    report_file = kwargs.get('report_file', 'stress-report.json')
+    stages = kwargs.get('stages')
+    if stages is None and kwargs.get('arrival_rate') is not None:
+        stages = [(duration.seconds, float(kwargs['arrival_rate']))]
+
+    metrics = kwargs.get('metrics')
+    if metrics is None:
+        metrics = stress.metrics.Metrics(
+            int(kwargs.get('report_interval', 60)))
+    if kwargs.get('scan_logs', True):
+        watcher = watch_compute_logs(manager,
+                                     on_error=metrics.record_log_errors)
+    else:
+        watcher = LogWatcher(None, None, [], None)
+    random.seed(seed)
+    phases = kwargs.get('phases')
+    if phases is None:
+        cases = _create_cases(choice_spec)
+        if stages:
+            phases = [Phase('open loop', sum(stage[0] for stage in stages),
+                            cases, stages=stages,
+                            arrival_process=kwargs.get('arrival_process',
+                                                       'poisson'),
+                            max_in_flight=int(kwargs.get('max_in_flight',
+                                                         100)))]
+        elif num_workers > 1:
+            phases = [Phase('closed loop', duration.seconds, cases,
+                            workers=num_workers, sleep_time=sleep_time)]
+    num_verifiers = int(kwargs.get(
+        'verifiers', max([num_workers] +
+                         [phase.workers for phase in phases or []])))
+    state = ClusterState(max_vms=max_vms)
+    if kwargs.get('log_scan_interval'):
+        watcher.start(float(kwargs['log_scan_interval']))
+    setup_concurrency = int(kwargs.get('setup_concurrency', 1))
+    for kind, create, extra_args in (
+            ('keypairs', create_initial_keypairs, ()),
+            ('vms', create_initial_vms,
+             (int(kwargs.get('setup_boot_batch', 1)),)),
+            ('floating_ips', create_initial_floating_ips, ()),
+            ('volumes', create_initial_volumes, ())):
+        count = int(kwargs.get('initial_' + kind, 0))
+        if not count:
+            continue
+        start = time.time()
+        created, failed = create(manager, state, count, setup_concurrency,
+                                 *extra_args)
+        metrics.record_setup(kind, count, created, failed,
+                             time.time() - start)
+    metrics.start()
+    test_end_time = time.time() + duration.seconds
+
+    logging.debug('=== Test \"%s\" on %s ===' %
+                  (test_name, time.asctime(time.localtime())))
+    for kw in kwargs:
+        logging.debug('\t%s = %s', kw, kwargs[kw])
+
+    def error_in_logs():
+        watcher.scan()
+        return watcher.error_count > 0
+
+    if phases:
+        test_succeeded = _run_phases(manager, state, phases, num_verifiers,
+                                     error_in_logs, metrics)
+    else:
+        test_succeeded = _run_serially(manager, state, cases, test_end_time,
+                                       sleep_time, error_in_logs, metrics)
+    metrics.stop()
     # Cleanup
     logging.info('Cleaning up: terminating virtual machines...')
     vms = state.get_instances()
@@ -254,7 +761,8 @@ def bash_openstack(manager,
                 break
             i += 1
             if i > 60:
-                _error_in_logs(keypath, logdir, user, computes)
+                watcher.scan()
+                watcher.close()
                 raise Exception("Cleanup timed out")
             time.sleep(1)
         logging.info('killed %s' % kill_id)
@@ -267,6 +775,12 @@ def bash_openstack(manager,
     for volume_state in state.get_volumes():
         manager.volumes_client.delete_volume(volume_state.resource_id)
 
+    watcher.close()
+    metrics.log_summary(logging)
+    metrics.write_json(report_file)
+    metrics.write_csv(os.path.splitext(report_file)[0] + '.csv')
+    logging.info('Metrics written to %s' % report_file)
+
     if test_succeeded:
         logging.info('*** Test succeeded ***')
     else:
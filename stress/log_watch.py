@@ -0,0 +1,163 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Incremental scanning of the nova logs of the compute nodes for errors.
+
+Each node is reached through one persistent ssh connection (an OpenSSH
+ControlMaster), and only the bytes appended to its log files since the
+previous scan are searched, so the cost of a scan follows the growth of
+the logs rather than their size. The nodes are scanned concurrently."""
+
+import logging
+import os
+import pipes
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import stress.utils
+
+from tempest.common import workers
+
+ERROR_PATTERN = 'ERROR|TRACE'
+# How long an idle master connection stays open
+CONTROL_PERSIST = '10m'
+
+LOG = logging.getLogger(__name__)
+
+
+class NodeLogs(object):
+    """The log files of one node and the offsets scanned so far."""
+
+    def __init__(self, keypath, user, node, logdir, control_dir):
+        self.node = node
+        self.logdir = logdir
+        self.offsets = {}
+        self._ssh = (['ssh'] +
+                     shlex.split(stress.utils.get_ssh_options(keypath)) +
+                     ['-o', 'ControlMaster=auto',
+                      '-o', 'ControlPath=%s' % os.path.join(control_dir,
+                                                            '%r@%h:%p'),
+                      '-o', 'ControlPersist=%s' % CONTROL_PERSIST,
+                      '%s@%s' % (user, node)])
+
+    def _run(self, script):
+        command = self._ssh + ['sudo sh -c %s' % pipes.quote(script)]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE)
+        output, _err = process.communicate()
+        return output
+
+    def _sizes(self):
+        output = self._run('stat -c "%%s %%n" %s/*.log 2>/dev/null' %
+                           self.logdir)
+        sizes = {}
+        for line in output.splitlines():
+            size, _sep, path = line.partition(' ')
+            if size.isdigit():
+                sizes[path] = int(size)
+        return sizes
+
+    def scan(self):
+        """Return the error lines appended to the logs since the last
+        scan, as (path, line) tuples."""
+        commands = []
+        sizes = self._sizes()
+        for path, size in sorted(sizes.items()):
+            offset = self.offsets.get(path, 0)
+            if size < offset:
+                # The log was truncated or rotated
+                offset = 0
+            if size > offset:
+                # Only read up to the size seen, the rest is for next time
+                commands.append(
+                    'tail -c +%d %s | head -c %d | egrep "%s" | '
+                    'sed "s|^|%s: |"' % (offset + 1, pipes.quote(path),
+                                         size - offset, ERROR_PATTERN, path))
+            self.offsets[path] = size
+        if not commands:
+            return []
+        errors = []
+        for line in self._run('; '.join(commands)).splitlines():
+            path, _sep, text = line.partition(': ')
+            errors.append((path, text))
+        return errors
+
+    def close(self):
+        with open(os.devnull, 'w') as devnull:
+            subprocess.call(self._ssh[:-1] + ['-O', 'exit', self._ssh[-1]],
+                            stderr=devnull)
+
+
+class LogWatcher(object):
+    """Scans the logs of several nodes for new ERROR and TRACE lines.
+
+    `on_error` is called with the node and the (path, line) tuples of the
+    new errors found by each scan.
+    """
+
+    def __init__(self, keypath, user, nodes, logdir, on_error=None):
+        self._control_dir = tempfile.mkdtemp(prefix='stress-ssh-')
+        self._nodes = [NodeLogs(keypath, user, node, logdir,
+                                self._control_dir)
+                       for node in nodes]
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.error_count = 0
+
+    def scan(self):
+        """Scan every node once, returning the number of new errors."""
+        if not self._nodes:
+            return 0
+        with self._lock:
+            found = 0
+            futures = workers.run_concurrently(
+                lambda node: (node, node.scan()),
+                [(node,) for node in self._nodes], len(self._nodes))
+            for future in futures:
+                if future.exception() is not None:
+                    LOG.warning('Unable to scan logs: %s', future.exception())
+                    continue
+                node, errors = future.result()
+                for path, line in errors:
+                    LOG.error('%s: %s: %s' % (node.node, path, line))
+                if errors and self._on_error is not None:
+                    self._on_error(node.node, errors)
+                found += len(errors)
+            self.error_count += found
+            return found
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            self.scan()
+
+    def start(self, interval):
+        """Scan the logs every `interval` seconds in the background."""
+        self._thread = threading.Thread(target=self._watch, args=(interval,),
+                                        name='stress-log-watch')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for node in self._nodes:
+            node.close()
+        shutil.rmtree(self._control_dir, ignore_errors=True)
@@ -0,0 +1,243 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Latency and throughput metrics of a stress workload.
+
+Every action is timed twice: the `issue` phase covers the API calls made
+by `StressTestCase.run`, the `complete` phase runs from the start of the
+action until its `PendingAction` verified it. Verifications are retried
+every few seconds, so `complete` latencies are only as precise as the
+retry period.
+
+In an open-loop run the `queue` phase is the time an action waited for a
+free worker after it was due, and the `complete` phase starts when it was
+due, so that it includes the queueing delay."""
+
+import csv
+import json
+import math
+import os
+import threading
+import time
+
+QUEUE = 'queue'
+ISSUE = 'issue'
+COMPLETE = 'complete'
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(samples, p):
+    """Return the `p`th percentile of sorted `samples` (nearest rank)."""
+    if not samples:
+        return None
+    rank = int(math.ceil(p / 100.0 * len(samples)))
+    return samples[max(rank, 1) - 1]
+
+
+class Metrics(object):
+    """Collects the latencies and errors of the actions of a run.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(self, interval=60):
+        """
+        `interval` : length in seconds of the throughput time series steps
+        """
+        self.interval = interval
+        self.start_time = time.time()
+        self.end_time = None
+        self._latencies = {}
+        self._errors = {}
+        self._throughput = {}
+        self._setup = []
+        self._log_errors = []
+        self._lock = threading.Lock()
+
+    def record(self, action, phase, start, end):
+        """Record that `phase` of `action` took from `start` to `end`."""
+        step = int((end - self.start_time) // self.interval)
+        with self._lock:
+            self._latencies.setdefault((action, phase), []).append(
+                end - start)
+            counts = self._throughput.setdefault(step, {})
+            counts[(action, phase)] = counts.get((action, phase), 0) + 1
+
+    def record_error(self, action, phase):
+        """Record that `phase` of `action` failed."""
+        with self._lock:
+            self._errors[(action, phase)] = (
+                self._errors.get((action, phase), 0) + 1)
+
+    def record_setup(self, kind, requested, created, failed, seconds):
+        """Record the creation of the initial resources of `kind`."""
+        with self._lock:
+            self._setup.append({'kind': kind,
+                                'requested': requested,
+                                'created': created,
+                                'failed': failed,
+                                'seconds': seconds})
+
+    def record_log_errors(self, node, errors):
+        """Record the (path, line) error lines found in the logs of
+        `node`."""
+        now = time.time()
+        with self._lock:
+            for path, line in errors:
+                self._log_errors.append({'time': now - self.start_time,
+                                         'node': node,
+                                         'path': path,
+                                         'line': line})
+
+    def start(self):
+        """Start the workload, after the setup."""
+        self.start_time = time.time()
+
+    def stop(self):
+        self.end_time = time.time()
+
+    def latency_summary(self):
+        """Return the count, errors and latency percentiles of each phase
+        of each action."""
+        with self._lock:
+            keys = set(self._latencies) | set(self._errors)
+            summary = []
+            for action, phase in sorted(keys):
+                samples = sorted(self._latencies.get((action, phase), []))
+                row = {
+                    'action': action,
+                    'phase': phase,
+                    'count': len(samples),
+                    'errors': self._errors.get((action, phase), 0),
+                    'mean': (sum(samples) / len(samples)
+                             if samples else None),
+                    'max': samples[-1] if samples else None,
+                }
+                for p in PERCENTILES:
+                    row['p%d' % p] = percentile(samples, p)
+                summary.append(row)
+            return summary
+
+    def throughput(self):
+        """Return the number of phases completed in each interval."""
+        with self._lock:
+            series = []
+            for step in sorted(self._throughput):
+                for (action, phase), count in sorted(
+                        self._throughput[step].items()):
+                    series.append({'start': step * self.interval,
+                                   'action': action,
+                                   'phase': phase,
+                                   'count': count,
+                                   'per_minute': count * 60.0 / self.interval})
+            return series
+
+    def dump(self):
+        """Return the raw samples of the run, for `merge`."""
+        with self._lock:
+            return {
+                'start_time': self.start_time,
+                'end_time': self.end_time or time.time(),
+                'interval': self.interval,
+                'latencies': [[action, phase, samples] for
+                              (action, phase), samples in
+                              self._latencies.items()],
+                'errors': [[action, phase, count] for
+                           (action, phase), count in self._errors.items()],
+                'throughput': [[step, action, phase, count] for
+                               step, counts in self._throughput.items()
+                               for (action, phase), count in counts.items()],
+                'setup': list(self._setup),
+                'log_errors': list(self._log_errors),
+            }
+
+    def report(self):
+        end_time = self.end_time or time.time()
+        return {
+            'start_time': self.start_time,
+            'duration': end_time - self.start_time,
+            'interval': self.interval,
+            'setup': list(self._setup),
+            'log_errors': list(self._log_errors),
+            'latency': self.latency_summary(),
+            'throughput': self.throughput(),
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+    def write_csv(self, path):
+        """Write the latency summary to `path`, and the throughput time
+        series next to it, with a -throughput suffix."""
+        fields = (['action', 'phase', 'count', 'errors', 'mean'] +
+                  ['p%d' % p for p in PERCENTILES] + ['max'])
+        with open(path, 'wb') as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(self.latency_summary())
+        base, ext = os.path.splitext(path)
+        fields = ['start', 'action', 'phase', 'count', 'per_minute']
+        with open(base + '-throughput' + (ext or '.csv'), 'wb') as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(self.throughput())
+
+    def log_summary(self, logger):
+        for setup in self._setup:
+            logger.info('setup %(kind)-14s %(created)5d of %(requested)5d '
+                        'created, %(failed)5d failed in %(seconds).1fs' %
+                        setup)
+        for row in self.latency_summary():
+            if not row['count']:
+                logger.info('%-20s %-8s %5d ok %5d errors' %
+                            (row['action'], row['phase'], 0, row['errors']))
+                continue
+            logger.info('%-20s %-8s %5d ok %5d errors  p50 %.2fs  '
+                        'p90 %.2fs  p99 %.2fs  max %.2fs' %
+                        (row['action'], row['phase'], row['count'],
+                         row['errors'], row['p50'], row['p90'], row['p99'],
+                         row['max']))
+
+
+def merge(dumps):
+    """Return the `Metrics` of several runs from their `Metrics.dump`.
+
+    The throughput steps are realigned on the earliest start time, so the
+    runs are expected to have been started together.
+    """
+    metrics = Metrics(max(dump['interval'] for dump in dumps))
+    metrics.start_time = min(dump['start_time'] for dump in dumps)
+    metrics.end_time = max(dump['end_time'] for dump in dumps)
+    for dump in dumps:
+        offset = dump['start_time'] - metrics.start_time
+        for action, phase, samples in dump['latencies']:
+            metrics._latencies.setdefault((action, phase), []).extend(
+                samples)
+        for action, phase, count in dump['errors']:
+            metrics._errors[(action, phase)] = (
+                metrics._errors.get((action, phase), 0) + count)
+        for step, action, phase, count in dump['throughput']:
+            step = int((offset + step * dump['interval']) // metrics.interval)
+            counts = metrics._throughput.setdefault(step, {})
+            counts[(action, phase)] = counts.get((action, phase), 0) + count
+        metrics._setup.extend(dump['setup'])
+        for log_error in dump['log_errors']:
+            log_error = dict(log_error)
+            log_error['time'] += offset
+            metrics._log_errors.append(log_error)
+    return metrics
@@ -17,6 +17,7 @@ that nova API calls such as create/delete are completed"""
 import logging
 import time
 
+from tempest.exceptions import NotFound
 from tempest.exceptions import TimeoutException
 
 
@@ -37,6 +38,22 @@ class PendingAction(object):
         self._logger = logging.getLogger(self.__class__.__name__)
         self._start_time = time.time()
         self._timeout = timeout
+        # Set by the driver: the action verified and when it was issued
+        self.action_name = self.__class__.__name__
+        self.issued_at = self._start_time
+        self._servers = None
+
+    def server_ids(self):
+        """Return the ids of the servers `retry` looks at."""
+        return ()
+
+    def set_servers(self, servers):
+        """
+        Hand the next `retry` a snapshot of the servers, a dict of the
+        listed server details by id, so that it does not fetch them one
+        by one.
+        """
+        self._servers = servers
 
     def retry(self):
         """
@@ -75,14 +92,35 @@ class PendingServerAction(PendingAction):
         self._state = state
         self._target = target_server
 
+    def server_ids(self):
+        return (self._target['id'],)
+
+    def _get_server(self, server_id):
+        """
+        Return the details of a server, from the snapshot handed by
+        `set_servers` if it lists the server, otherwise fetched on its own,
+        or None if it does not exist anymore.
+        """
+        if self._servers is not None:
+            server = self._servers.get(server_id)
+            if server is not None:
+                return None if server['status'] == 'DELETED' else server
+            # Deleted, or not listed as the listing was incomplete
+        try:
+            _resp, server = self._manager.servers_client.get_server(
+                server_id)
+        except NotFound:
+            return None
+        return server
+
     def _check_for_status(self, state_string):
         """Check to see if the machine has transitioned states."""
         t = time.time()  # for debugging
         target = self._target
-        _resp, body = self._manager.servers_client.get_server(target['id'])
-        if body['status'] != state_string:
+        body = self._get_server(target['id'])
+        if body is None or body['status'] != state_string:
             # grab the actual state as we think it is
-            temp_obj = self._state.get_instances()[target['id']]
+            temp_obj = self._state.get_instance_state(target['id'])
             self._logger.debug("machine %s in state %s" %
                                (target['id'], temp_obj[1]))
             self._logger.debug('%s, time: %d' % (temp_obj[1], time.time() - t))
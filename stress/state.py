@@ -12,82 +12,284 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import random
+import threading
+
+
+class RandomSet(object):
+    """A set of hashable items supporting O(1) add, remove and random
+    choice."""
+
+    __slots__ = ('_items', '_positions')
+
+    def __init__(self):
+        self._items = []
+        self._positions = {}
+
+    def add(self, item):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+        last = self._items.pop()
+        if position < len(self._items):
+            # Fill the hole with the last item
+            self._items[position] = last
+            self._positions[last] = position
+
+    def choice(self):
+        """Return a random item, or None if the set is empty."""
+        if not self._items:
+            return None
+        return random.choice(self._items)
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
 
 class ClusterState(object):
     """A class to store the state of various persistent objects in the Nova
     cluster, e.g. instances, volumes.  Use methods to query to state which than
     can be compared to the current state of the objects in Nova.
+
+    Instances are indexed by id and by state, floating ips and volumes by
+    id and by the server they are attached to, and keypairs by name, so
+    that looking up, updating or picking a random resource of an index
+    takes constant time.  The state is shared by the workers of a
+    concurrent run, so every method holds a lock and the getters return
+    copies.
     """
 
     def __init__(self, **kwargs):
         self._max_vms = kwargs.get('max_vms', 32)
         self._instances = {}
-        self._floating_ips = []
-        self._keypairs = []
-        self._volumes = []
+        self._instance_ids = RandomSet()
+        self._instances_by_state = {}
+        self._floating_ips = {}
+        self._floating_ip_set = RandomSet()
+        self._keypairs = {}
+        self._volumes = {}
+        self._volume_set = RandomSet()
+        self._attached = {}
+        self._lock = threading.RLock()
 
     # instance state methods
     def get_instances(self):
-        """return the instances dictionary that we believe are in cluster."""
-        return self._instances
+        """return a copy of the instances dictionary that we believe are in
+        cluster."""
+        with self._lock:
+            return dict(self._instances)
+
+    def get_instance_state(self, key):
+        """return the (server, state) of instance `key`, or None."""
+        with self._lock:
+            return self._instances.get(key)
+
+    def count_instances(self, state=None):
+        """return the number of instances, or of those in `state`."""
+        with self._lock:
+            if state is None:
+                return len(self._instances)
+            return len(self._instances_by_state.get(state, ()))
 
     def get_max_instances(self):
         """return the maximum number of instances we can create."""
         return self._max_vms
 
+    def _unindex_instance(self, key):
+        old = self._instances.get(key)
+        if old:
+            self._instances_by_state[old[1]].discard(key)
+
     def set_instance_state(self, key, val):
         """Store `val` in the dictionary indexed at `key`."""
-        self._instances[key] = val
+        with self._lock:
+            self._unindex_instance(key)
+            self._instances[key] = val
+            self._instance_ids.add(key)
+            if val:
+                self._instances_by_state.setdefault(val[1],
+                                                    RandomSet()).add(key)
 
     def delete_instance_state(self, key):
         """Delete state indexed at `key`."""
-        del self._instances[key]
+        with self._lock:
+            self._unindex_instance(key)
+            del self._instances[key]
+            self._instance_ids.discard(key)
+
+    def random_instance(self, state=None):
+        """return the (server, state) of a random instance, or of a random
+        instance in `state`, or None if there is none."""
+        with self._lock:
+            if state is None:
+                key = self._instance_ids.choice()
+            else:
+                key = self._instances_by_state.get(state,
+                                                   RandomSet()).choice()
+            if key is None:
+                return None
+            return self._instances[key]
+
+    def claim_instance(self, from_state, to_state):
+        """Move a random instance in `from_state` to `to_state`.
+
+        Picking and marking the instance is atomic, so concurrent workers
+        never act on the same instance.  Returns the server, or None if no
+        instance is in `from_state`.
+        """
+        with self._lock:
+            target = self.random_instance(from_state)
+            if target is None:
+                return None
+            server = target[0]
+            self.set_instance_state(server['id'], (server, to_state))
+            return server
+
+    # server attachment methods
+    def attach(self, associated_state, server_id):
+        """Record that a floating ip or volume is attached to a server."""
+        with self._lock:
+            self.detach(associated_state)
+            associated_state.server_id = server_id
+            self._attached.setdefault(server_id, set()).add(associated_state)
+
+    def detach(self, associated_state):
+        """Record that a floating ip or volume is no longer attached."""
+        with self._lock:
+            attached = self._attached.get(associated_state.server_id)
+            if attached is not None:
+                attached.discard(associated_state)
+                if not attached:
+                    del self._attached[associated_state.server_id]
+            associated_state.server_id = None
+
+    def get_attached(self, server_id):
+        """return the floating ips and volumes attached to a server."""
+        with self._lock:
+            return list(self._attached.get(server_id, ()))
+
+    def start_change(self, associated_state):
+        """Mark a floating ip or volume as having a change pending.
+
+        Returns False if a change was already pending.
+        """
+        with self._lock:
+            if associated_state.change_pending:
+                return False
+            associated_state.change_pending = True
+            return True
+
+    def _add_associated(self, index, index_set, associated_state):
+        index[associated_state.resource_id] = associated_state
+        index_set.add(associated_state)
+        if associated_state.server_id is not None:
+            self.attach(associated_state, associated_state.server_id)
+
+    def _remove_associated(self, index, index_set, associated_state):
+        self.detach(associated_state)
+        del index[associated_state.resource_id]
+        index_set.discard(associated_state)
 
     #floating_ip state methods
     def get_floating_ips(self):
-        """return the floating ips list for the cluster."""
-        return self._floating_ips
+        """return a copy of the floating ips list for the cluster."""
+        with self._lock:
+            return list(self._floating_ip_set)
+
+    def get_floating_ip(self, resource_id):
+        """return the floating ip with id `resource_id`, or None."""
+        with self._lock:
+            return self._floating_ips.get(resource_id)
+
+    def random_floating_ip(self):
+        """return a random floating ip, or None if there is none."""
+        with self._lock:
+            return self._floating_ip_set.choice()
 
     def add_floating_ip(self, floating_ip_state):
         """Add floating ip."""
-        self._floating_ips.append(floating_ip_state)
+        with self._lock:
+            self._add_associated(self._floating_ips, self._floating_ip_set,
+                                 floating_ip_state)
 
     def remove_floating_ip(self, floating_ip_state):
         """Remove floating ip."""
-        self._floating_ips.remove(floating_ip_state)
+        with self._lock:
+            self._remove_associated(self._floating_ips,
+                                    self._floating_ip_set,
+                                    floating_ip_state)
 
     # keypair methods
     def get_keypairs(self):
-        """return the keypairs list for the cluster."""
-        return self._keypairs
+        """return a copy of the keypairs list for the cluster."""
+        with self._lock:
+            return self._keypairs.values()
+
+    def get_keypair(self, name):
+        """return the keypair named `name`, or None."""
+        with self._lock:
+            return self._keypairs.get(name)
 
     def add_keypair(self, keypair_state):
         """Add keypair."""
-        self._keypairs.append(keypair_state)
+        with self._lock:
+            self._keypairs[keypair_state.name] = keypair_state
 
     def remove_keypair(self, keypair_state):
         """Remove keypair."""
-        self._keypairs.remove(keypair_state)
+        with self._lock:
+            del self._keypairs[keypair_state.name]
 
     # volume methods
     def get_volumes(self):
-        """return the volumes list for the cluster."""
-        return self._volumes
+        """return a copy of the volumes list for the cluster."""
+        with self._lock:
+            return list(self._volume_set)
+
+    def get_volume(self, resource_id):
+        """return the volume with id `resource_id`, or None."""
+        with self._lock:
+            return self._volumes.get(resource_id)
+
+    def random_volume(self):
+        """return a random volume, or None if there is none."""
+        with self._lock:
+            return self._volume_set.choice()
 
     def add_volume(self, volume_state):
         """Add volume."""
-        self._volumes.append(volume_state)
+        with self._lock:
+            self._add_associated(self._volumes, self._volume_set,
+                                 volume_state)
 
     def remove_volume(self, volume_state):
         """Remove volume."""
-        self._volumes.remove(volume_state)
+        with self._lock:
+            self._remove_associated(self._volumes, self._volume_set,
+                                    volume_state)
 
 
 class ServerAssociatedState(object):
     """Class that tracks resources that are associated with a particular server
     such as a volume or floating ip.
+
+    Use `ClusterState.attach` and `ClusterState.detach` to change
+    `server_id`, so that the state's attachment index stays up to date.
     """
 
+    __slots__ = ('server_id', 'resource_id', 'change_pending')
+
     def __init__(self, resource_id):
         # The id of the server.
         self.server_id = None
@@ -99,6 +301,8 @@ class ServerAssociatedState(object):
 
 class FloatingIpState(ServerAssociatedState):
 
+    __slots__ = ('address',)
+
     def __init__(self, ip_desc):
         super(FloatingIpState, self).__init__(ip_desc['id'])
         self.address = ip_desc['ip']
@@ -106,12 +310,16 @@ class FloatingIpState(ServerAssociatedState):
 
 class VolumeState(ServerAssociatedState):
 
+    __slots__ = ()
+
     def __init__(self, volume_desc):
         super(VolumeState, self).__init__(volume_desc['id'])
 
 
 class KeyPairState(object):
 
+    __slots__ = ('name', 'private_key')
+
     def __init__(self, keypair_spec):
         self.name = keypair_spec['name']
         self.private_key = keypair_spec['private_key']
@@ -30,10 +30,9 @@ class TestChangeFloatingIp(test_case.StressTestCase):
         if self.server_ids is None:
             vms = state.get_instances()
             self.server_ids = [k for k, v in vms.iteritems()]
-        floating_ip = random.choice(state.get_floating_ips())
-        if floating_ip.change_pending:
+        floating_ip = state.random_floating_ip()
+        if floating_ip is None or not state.start_change(floating_ip):
             return None
-        floating_ip.change_pending = True
         timeout = int(kwargs.get('timeout', 60))
         cli = manager.floating_ips_client
         if floating_ip.server_id is None:
@@ -44,8 +43,8 @@ class TestChangeFloatingIp(test_case.StressTestCase):
                                                              server)
             if resp.status != 202:
                 raise Exception("response: %s body: %s" % (resp, body))
-            floating_ip.server_id = server
-            return VerifyChangeFloatingIp(manager, floating_ip,
+            state.attach(floating_ip, server)
+            return VerifyChangeFloatingIp(manager, state, floating_ip,
                                           timeout, add=True)
         else:
             server = floating_ip.server_id
@@ -55,14 +54,15 @@ class TestChangeFloatingIp(test_case.StressTestCase):
                                                                   server)
             if resp.status != 202:
                 raise Exception("response: %s body: %s" % (resp, body))
-            return VerifyChangeFloatingIp(manager, floating_ip,
+            return VerifyChangeFloatingIp(manager, state, floating_ip,
                                           timeout, add=False)
 
 
 class VerifyChangeFloatingIp(pending_action.PendingAction):
     """Verify that floating ip was changed."""
-    def __init__(self, manager, floating_ip, timeout, add=None):
+    def __init__(self, manager, state, floating_ip, timeout, add=None):
         super(VerifyChangeFloatingIp, self).__init__(manager, timeout=timeout)
+        self._state = state
         self.floating_ip = floating_ip
         self.add = add
 
@@ -83,6 +83,6 @@ class VerifyChangeFloatingIp(pending_action.PendingAction):
                 self._logger.info('%s removed [%.1f secs elapsed]' %
                                   (self.floating_ip.address, self.elapsed()))
                 self.floating_ip.change_pending = False
-                self.floating_ip.server_id = None
+                self._state.detach(self.floating_ip)
                 return True
         return False
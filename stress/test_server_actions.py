@@ -17,8 +17,6 @@ API calls on the Nova cluster having to do with Server Actions. Each
 sub-class will have a corresponding PendingServerAction. These pending
 actions veriy that the API call was successful or not."""
 
-import random
-
 import pending_action
 import stress.utils
 from tempest.exceptions import Duplicate
@@ -41,33 +39,33 @@ class TestRebootVM(test_case.StressTestCase):
                        `type`    : reboot type [SOFT or HARD] (default is SOFT)
         """
 
-        vms = state.get_instances()
-        active_vms = [v for k, v in vms.iteritems() if v and v[1] == 'ACTIVE']
+        _reboot_arg = kwargs.get('type', 'SOFT')
+        if _reboot_arg == 'SOFT':
+            reboot_state = 'REBOOT'
+        else:
+            reboot_state = 'HARD_REBOOT'
+
+        # select active vm to reboot and then send request to nova controller
+        reboot_target = state.claim_instance('ACTIVE', reboot_state)
         # no active vms, so return null
-        if not active_vms:
+        if reboot_target is None:
             self._logger.info('no ACTIVE instances to reboot')
             return
 
-        _reboot_arg = kwargs.get('type', 'SOFT')
-
-        # select active vm to reboot and then send request to nova controller
-        target = random.choice(active_vms)
-        reboot_target = target[0]
         # It seems that doing a reboot when in reboot is an error.
         try:
             response, body = manager.servers_client.reboot(reboot_target['id'],
                                                            _reboot_arg)
-        except Duplicate:
-            return
-
-        if (response.status != 202):
-            self._logger.error("response: %s" % response)
-            raise Exception
-
-        if _reboot_arg == 'SOFT':
-            reboot_state = 'REBOOT'
-        else:
-            reboot_state = 'HARD_REBOOT'
+            if (response.status != 202):
+                self._logger.error("response: %s" % response)
+                raise Exception
+        except Exception as exc:
+            # Give the server back, so that it can be picked again
+            state.set_instance_state(reboot_target['id'],
+                                     (reboot_target, 'ACTIVE'))
+            if isinstance(exc, Duplicate):
+                return
+            raise
 
         self._logger.info('waiting for machine %s to change to %s' %
                           (reboot_target['id'], reboot_state))
@@ -98,9 +96,8 @@ class VerifyRebootVM(pending_action.PendingServerAction):
         """
         # don't run reboot verification if target machine has been
         # deleted or is going to be deleted
-        target_id = self._target['id']
-        if (self._target['id'] not in self._state.get_instances().keys() or
-            self._state.get_instances()[target_id][1] == 'TERMINATING'):
+        target_state = self._state.get_instance_state(self._target['id'])
+        if target_state is None or target_state[1] == 'TERMINATING':
             self._logger.debug('machine %s is deleted or TERMINATING' %
                                self._target['id'])
             return True
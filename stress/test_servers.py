@@ -17,7 +17,7 @@ API calls on the Nova cluster having to do with creating and deleting VMs.
 Each sub-class will have a corresponding PendingServerAction. These pending
 actions veriy that the API call was successful or not."""
 
-import random
+import itertools
 
 import pending_action
 import test_case
@@ -25,7 +25,7 @@ import test_case
 
 class TestCreateVM(test_case.StressTestCase):
     """Create a virtual machine in the Nova cluster."""
-    _vm_id = 0
+    _vm_ids = itertools.count()
 
     def run(self, manager, state, *pargs, **kwargs):
         """
@@ -44,7 +44,7 @@ class TestCreateVM(test_case.StressTestCase):
         """
 
         # restrict number of instances we can launch
-        if len(state.get_instances()) >= state.get_max_instances():
+        if state.count_instances() >= state.get_max_instances():
             self._logger.debug("maximum number of instances created: %d" %
                                state.get_max_instances())
             return None
@@ -55,7 +55,7 @@ class TestCreateVM(test_case.StressTestCase):
                                  manager.config.compute.flavor_ref)
 
         expected_server = {
-            'name': 'server' + str(TestCreateVM._vm_id),
+            'name': 'server' + str(next(TestCreateVM._vm_ids)),
             'metadata': {
                 'key1': 'value1',
                 'key2': 'value2',
@@ -65,7 +65,6 @@ class TestCreateVM(test_case.StressTestCase):
             'adminPass': 'testpwd',
             'key_name': _key_name,
         }
-        TestCreateVM._vm_id = TestCreateVM._vm_id + 1
         create_server = manager.servers_client.create_server
         response, body = create_server(expected_server['name'],
                                        _image_ref,
@@ -110,9 +109,8 @@ class VerifyCreateVM(pending_action.PendingServerAction):
         """
         # don't run create verification
         # if target machine has been deleted or is going to be deleted
-        target_id = self._target['id']
-        if (self._target['id'] not in self._state.get_instances().keys() or
-            self._state.get_instances()[target_id][1] == 'TERMINATING'):
+        target_state = self._state.get_instance_state(self._target['id'])
+        if target_state is None or target_state[1] == 'TERMINATING':
             self._logger.info('machine %s is deleted or TERMINATING' %
                               self._target['id'])
             return True
@@ -149,23 +147,18 @@ class TestKillActiveVM(test_case.StressTestCase):
         `kwargs`     : keyword arguments, which include:
                        `timeout` : how long to wait before issuing Exception
         """
-        # check for active instances
-        vms = state.get_instances()
-        active_vms = [v for k, v in vms.iteritems() if v and v[1] == 'ACTIVE']
+        # pick a random active instance and mark it TERMINATING
+        killtarget = state.claim_instance('ACTIVE', 'TERMINATING')
         # no active vms, so return null
-        if not active_vms:
+        if killtarget is None:
             self._logger.info('no ACTIVE instances to delete')
             return
 
         _timeout = kwargs.get('timeout', manager.config.compute.build_timeout)
 
-        target = random.choice(active_vms)
-        killtarget = target[0]
         manager.servers_client.delete_server(killtarget['id'])
         self._logger.info('machine %s: ACTIVE -> TERMINATING' %
                           killtarget['id'])
-        state.set_instance_state(killtarget['id'],
-                                (killtarget, 'TERMINATING'))
         return VerifyKillActiveVM(manager, state,
                                   killtarget, timeout=_timeout)
 
@@ -182,20 +175,16 @@ class VerifyKillActiveVM(pending_action.PendingServerAction):
         tid = self._target['id']
         # if target machine has been deleted from the state, then it was
         # already verified to be deleted
-        if (not tid in self._state.get_instances().keys()):
+        if self._state.get_instance_state(tid) is None:
             return False
 
-        try:
-            self._manager.servers_client.get_server(tid)
-        except Exception:
-            # if we get a 404 response, is the machine really gone?
-            target = self._target
-            self._logger.info('machine %s: DELETED [%.1f secs elapsed]' %
-                              (target['id'], self.elapsed()))
-            self._state.delete_instance_state(target['id'])
-            return True
+        if self._get_server(tid) is not None:
+            return False
 
-        return False
+        self._logger.info('machine %s: DELETED [%.1f secs elapsed]' %
+                          (tid, self.elapsed()))
+        self._state.delete_instance_state(tid)
+        return True
 
 
 class TestKillAnyVM(test_case.StressTestCase):
@@ -213,20 +202,19 @@ class TestKillAnyVM(test_case.StressTestCase):
                        `timeout` : how long to wait before issuing Exception
         """
 
-        vms = state.get_instances()
+        target = state.random_instance()
         # no vms, so return null
-        if not vms:
+        if target is None:
             self._logger.info('no active instances to delete')
             return
 
         _timeout = kwargs.get('timeout', manager.config.compute.build_timeout)
 
-        target = random.choice(vms)
         killtarget = target[0]
 
         manager.servers_client.delete_server(killtarget['id'])
-        self._state.set_instance_state(killtarget['id'],
-                                      (killtarget, 'TERMINATING'))
+        state.set_instance_state(killtarget['id'],
+                                 (killtarget, 'TERMINATING'))
         # verify object will do the same thing as the active VM
         return VerifyKillAnyVM(manager, state, killtarget, timeout=_timeout)
 
@@ -248,29 +236,31 @@ class TestUpdateVMName(test_case.StressTestCase):
         """
 
         # select one machine from active ones
-        vms = state.get_instances()
-        active_vms = [v for k, v in vms.iteritems() if v and v[1] == 'ACTIVE']
+        update_target = state.claim_instance('ACTIVE', 'UPDATING_NAME')
         # no active vms, so return null
-        if not active_vms:
+        if update_target is None:
             self._logger.info('no active instances to update')
             return
 
         _timeout = kwargs.get('timeout', manager.config.compute.build_timeout)
 
-        target = random.choice(active_vms)
-        update_target = target[0]
-
         # Update name by appending '_updated' to the name
         new_name = update_target['name'] + '_updated'
-        (response, body) = \
-            manager.servers_client.update_server(update_target['id'],
-                                                 name=new_name)
-        if (response.status != 200):
-            self._logger.error("response: %s " % response)
-            self._logger.error("body: %s " % body)
-            raise Exception
-
-        assert(new_name == body['name'])
+        try:
+            (response, body) = \
+                manager.servers_client.update_server(update_target['id'],
+                                                     name=new_name)
+            if (response.status != 200):
+                self._logger.error("response: %s " % response)
+                self._logger.error("body: %s " % body)
+                raise Exception
+
+            assert(new_name == body['name'])
+        except Exception:
+            # Give the server back, so that it can be picked again
+            state.set_instance_state(update_target['id'],
+                                     (update_target, 'ACTIVE'))
+            raise
 
         self._logger.info('machine %s: ACTIVE -> UPDATING_NAME' %
                           body['id'])
@@ -291,16 +281,13 @@ class VerifyUpdateVMName(pending_action.PendingServerAction):
         """
         # don't run update verification
         # if target machine has been deleted or is going to be deleted
-        target_id = self._target['id']
-        if (not self._target['id'] in self._state.get_instances().keys() or
-            self._state.get_instances()[target_id][1] == 'TERMINATING'):
+        target_state = self._state.get_instance_state(self._target['id'])
+        if target_state is None or target_state[1] == 'TERMINATING':
             return False
 
-        response, body = \
-            self._manager.serverse_client.get_server(self._target['id'])
-        if (response.status != 200):
-            self._logger.error("response: %s " % response)
-            self._logger.error("body: %s " % body)
+        body = self._get_server(self._target['id'])
+        if body is None:
+            self._logger.error('machine %s not found' % self._target['id'])
             raise Exception
 
         if self._target['name'] != body['name']:
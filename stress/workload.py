@@ -0,0 +1,234 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Workloads described in JSON or YAML files.
+
+A workload file names the `StressTestCase` classes to run, with their
+weights, and a list of timed phases run one after the other, each with
+its own mix of actions, concurrency and arrival rate. For example::
+
+    {
+        "name": "create and delete",
+        "initial_vms": 10,
+        "actions": [
+            {"test_case": "TestCreateVM", "weight": 62.5},
+            {"test_case": "TestKillActiveVM", "weight": 37.5}
+        ],
+        "phases": [
+            {"name": "ramp-up", "duration": 120,
+             "arrival_rate": 0, "end_rate": 10},
+            {"name": "steady", "duration": 600, "workers": 20,
+             "sleep_time": 500},
+            {"name": "spike", "duration": 60, "arrival_rate": 40,
+             "actions": [{"test_case": "TestCreateVM", "weight": 1}]},
+            {"name": "drain", "duration": 120, "workers": 1}
+        ]
+    }
+
+Test cases are named by class, looked up in the stress test modules, or
+by their full dotted path. A phase runs `workers` threads sleeping
+`sleep_time` milliseconds between actions, or, if it has an
+`arrival_rate`, issues actions at that rate (going linearly to `end_rate`
+over the phase) using up to `max_in_flight` threads. The other top level
+keys are passed to `bash_openstack`. Run a workload file with::
+
+    PYTHONPATH=. python -m stress.workload stress/tests/create_kill.json
+"""
+
+import datetime
+import json
+import os
+import random
+import sys
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from stress.basher import BasherAction
+
+from tempest.common.utils import misc
+
+TEST_CASE_MODULES = ('stress.test_servers', 'stress.test_server_actions',
+                     'stress.test_floating_ips')
+
+PHASE_KEYS = ('name', 'duration', 'actions', 'workers', 'sleep_time',
+              'arrival_rate', 'end_rate', 'arrival_process', 'max_in_flight')
+
+
+class AliasSampler(object):
+    """Picks items at random in proportion to their weights, in constant
+    time per pick (Vose's alias method)."""
+
+    def __init__(self, items, weights):
+        if not items or len(items) != len(weights):
+            raise ValueError('AliasSampler needs one weight per item')
+        if min(weights) < 0 or sum(weights) <= 0:
+            raise ValueError('Weights must be positive: %s' % weights)
+        count = len(items)
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self._items = list(items)
+        self._probability = [1.0] * count
+        self._alias = range(count)
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # What is left only differs from 1 by rounding errors
+
+    def sample(self):
+        column = random.randrange(len(self._items))
+        if random.random() < self._probability[column]:
+            return self._items[column]
+        return self._items[self._alias[column]]
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+def create_sampler(choice_spec):
+    """Return an AliasSampler picking the `BasherAction`s of `choice_spec`
+    according to their probabilities."""
+    return AliasSampler(choice_spec,
+                        [float(choice.probability) for choice in choice_spec])
+
+
+class Phase(object):
+    """A timed part of a workload."""
+
+    def __init__(self, name, duration, cases, workers=1, sleep_time=0,
+                 stages=None, arrival_process='poisson', max_in_flight=100):
+        """
+        `duration`   : length of the phase in seconds
+        `cases`      : sampler of the `BasherAction`s to run
+        `workers`    : number of threads running actions
+        `sleep_time` : seconds each worker sleeps between actions
+        `stages`     : (`seconds`, `rate`[, `end_rate`]) arrival rate
+                       stages making this an open-loop phase
+        """
+        self.name = name
+        self.duration = duration
+        self.cases = cases
+        self.workers = workers
+        self.sleep_time = sleep_time
+        self.stages = stages
+        self.arrival_process = arrival_process
+        self.max_in_flight = max_in_flight
+
+    def __str__(self):
+        return self.name
+
+
+def get_test_case(name):
+    """Return the `StressTestCase` class named `name`."""
+    if '.' in name:
+        return misc.import_class(name)
+    for module_name in TEST_CASE_MODULES:
+        __import__(module_name)
+        test_case = getattr(sys.modules[module_name], name, None)
+        if test_case is not None:
+            return test_case
+    raise ValueError('Unknown stress test case %s' % name)
+
+
+def _create_actions(specs):
+    return [BasherAction(get_test_case(spec['test_case'])(),
+                         spec.get('weight', 1),
+                         spec.get('args', []),
+                         spec.get('kwargs', {}))
+            for spec in specs]
+
+
+def create_phases(description):
+    """Return the `Phase`s of a workload description."""
+    default_actions = description.get('actions')
+    phases = []
+    for index, spec in enumerate(description['phases']):
+        unknown = set(spec) - set(PHASE_KEYS)
+        if unknown:
+            raise ValueError('Unknown keys in phase %d: %s' %
+                             (index, ', '.join(sorted(unknown))))
+        actions = spec.get('actions', default_actions)
+        if not actions:
+            raise ValueError('Phase %d has no actions' % index)
+        duration = float(spec['duration'])
+        stages = None
+        if spec.get('arrival_rate') is not None:
+            rate = float(spec['arrival_rate'])
+            stages = [(duration, rate, float(spec.get('end_rate', rate)))]
+        phases.append(Phase(spec.get('name', 'phase %d' % index),
+                            duration,
+                            create_sampler(_create_actions(actions)),
+                            workers=int(spec.get('workers', 1)),
+                            sleep_time=float(spec.get('sleep_time',
+                                                      0)) / 1000,
+                            stages=stages,
+                            arrival_process=spec.get('arrival_process',
+                                                     'poisson'),
+                            max_in_flight=int(spec.get('max_in_flight',
+                                                       100))))
+    return phases
+
+
+def load(path):
+    """Load the workload description of a JSON or YAML file."""
+    with open(path) as f:
+        if os.path.splitext(path)[1] in ('.yaml', '.yml'):
+            if yaml is None:
+                raise ValueError('PyYAML is needed to load %s' % path)
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def run(manager, description, **kwargs):
+    """Run a workload description with `bash_openstack`.
+
+    `kwargs` override the top level keys of the description.
+    """
+    # The driver imports this module
+    from stress.driver import bash_openstack
+
+    options = dict((key, value) for key, value in description.items()
+                   if key not in ('actions', 'phases', 'name'))
+    options.setdefault('test_name', description.get('name', 'unamed test'))
+    options.update(kwargs)
+    if 'duration' in options:
+        options['duration'] = datetime.timedelta(seconds=options['duration'])
+    phases = create_phases(description)
+    return bash_openstack(manager, None, phases=phases, **options)
+
+
+def main(argv):
+    from tempest import clients
+
+    if len(argv) != 1:
+        print 'usage: python -m stress.workload <workload file>'
+        return 2
+    return 0 if run(clients.Manager(), load(argv[0])) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -17,144 +17,152 @@
 
 import logging
 
+from tempest.common.utils import misc
 from tempest import config
 from tempest import exceptions
-from tempest.services import botoclients
-from tempest.services.compute.json.extensions_client import \
-    ExtensionsClientJSON
-from tempest.services.compute.json.flavors_client import FlavorsClientJSON
-from tempest.services.compute.json.floating_ips_client import \
-    FloatingIPsClientJSON
-from tempest.services.compute.json.hosts_client import HostsClientJSON
-from tempest.services.compute.json.images_client import ImagesClientJSON
-from tempest.services.compute.json.keypairs_client import KeyPairsClientJSON
-from tempest.services.compute.json.limits_client import LimitsClientJSON
-from tempest.services.compute.json.quotas_client import QuotasClientJSON
-from tempest.services.compute.json.security_groups_client import \
-    SecurityGroupsClientJSON
-from tempest.services.compute.json.servers_client import ServersClientJSON
-from tempest.services.compute.json.volumes_extensions_client import \
-    VolumesExtensionsClientJSON
-from tempest.services.compute.xml.extensions_client import ExtensionsClientXML
-from tempest.services.compute.xml.flavors_client import FlavorsClientXML
-from tempest.services.compute.xml.floating_ips_client import \
-    FloatingIPsClientXML
-from tempest.services.compute.xml.images_client import ImagesClientXML
-from tempest.services.compute.xml.keypairs_client import KeyPairsClientXML
-from tempest.services.compute.xml.limits_client import LimitsClientXML
-from tempest.services.compute.xml.quotas_client import QuotasClientXML
-from tempest.services.compute.xml.security_groups_client \
-    import SecurityGroupsClientXML
-from tempest.services.compute.xml.servers_client import ServersClientXML
-from tempest.services.compute.xml.volumes_extensions_client import \
-    VolumesExtensionsClientXML
-from tempest.services.identity.json.identity_client import IdentityClientJSON
-from tempest.services.identity.json.identity_client import TokenClientJSON
-from tempest.services.identity.xml.identity_client import IdentityClientXML
-from tempest.services.identity.xml.identity_client import TokenClientXML
-from tempest.services.image.v1.json.image_client import ImageClientJSON
-from tempest.services.image.v2.json.image_client import ImageClientV2JSON
-from tempest.services.network.json.network_client import NetworkClient
-from tempest.services.object_storage.account_client import AccountClient
-from tempest.services.object_storage.account_client import \
-    AccountClientCustomizedHeader
-from tempest.services.object_storage.container_client import ContainerClient
-from tempest.services.object_storage.object_client import ObjectClient
-from tempest.services.object_storage.object_client import \
-    ObjectClientCustomizedHeader
-from tempest.services.volume.json.admin.volume_types_client import \
-    VolumeTypesClientJSON
-from tempest.services.volume.json.snapshots_client import SnapshotsClientJSON
-from tempest.services.volume.json.volumes_client import VolumesClientJSON
-from tempest.services.volume.xml.admin.volume_types_client import \
-    VolumeTypesClientXML
-from tempest.services.volume.xml.snapshots_client import SnapshotsClientXML
-from tempest.services.volume.xml.volumes_client import VolumesClientXML
-from tempest.services.compute.json.interfaces_client import \
-    InterfacesClientJSON
-from tempest.services.compute.xml.interfaces_client import \
-    InterfacesClientXML
 
 LOG = logging.getLogger(__name__)
 
+# The client classes are given by path, so that only the modules of the
+# clients a test actually uses get imported.
 IMAGES_CLIENTS = {
-    "json": ImagesClientJSON,
-    "xml": ImagesClientXML,
+    "json": "tempest.services.compute.json.images_client.ImagesClientJSON",
+    "xml": "tempest.services.compute.xml.images_client.ImagesClientXML",
 }
 
 KEYPAIRS_CLIENTS = {
-    "json": KeyPairsClientJSON,
-    "xml": KeyPairsClientXML,
+    "json": "tempest.services.compute.json.keypairs_client.KeyPairsClientJSON",
+    "xml": "tempest.services.compute.xml.keypairs_client.KeyPairsClientXML",
 }
 
 QUOTAS_CLIENTS = {
-    "json": QuotasClientJSON,
-    "xml": QuotasClientXML,
+    "json": "tempest.services.compute.json.quotas_client.QuotasClientJSON",
+    "xml": "tempest.services.compute.xml.quotas_client.QuotasClientXML",
 }
 
 SERVERS_CLIENTS = {
-    "json": ServersClientJSON,
-    "xml": ServersClientXML,
+    "json": "tempest.services.compute.json.servers_client.ServersClientJSON",
+    "xml": "tempest.services.compute.xml.servers_client.ServersClientXML",
 }
 
 LIMITS_CLIENTS = {
-    "json": LimitsClientJSON,
-    "xml": LimitsClientXML,
+    "json": "tempest.services.compute.json.limits_client.LimitsClientJSON",
+    "xml": "tempest.services.compute.xml.limits_client.LimitsClientXML",
 }
 
 FLAVORS_CLIENTS = {
-    "json": FlavorsClientJSON,
-    "xml": FlavorsClientXML
+    "json": "tempest.services.compute.json.flavors_client.FlavorsClientJSON",
+    "xml": "tempest.services.compute.xml.flavors_client.FlavorsClientXML",
 }
 
 EXTENSIONS_CLIENTS = {
-    "json": ExtensionsClientJSON,
-    "xml": ExtensionsClientXML
+    "json": ("tempest.services.compute.json.extensions_client"
+             ".ExtensionsClientJSON"),
+    "xml": ("tempest.services.compute.xml.extensions_client"
+            ".ExtensionsClientXML"),
 }
 
 VOLUMES_EXTENSIONS_CLIENTS = {
-    "json": VolumesExtensionsClientJSON,
-    "xml": VolumesExtensionsClientXML,
+    "json": ("tempest.services.compute.json.volumes_extensions_client"
+             ".VolumesExtensionsClientJSON"),
+    "xml": ("tempest.services.compute.xml.volumes_extensions_client"
+            ".VolumesExtensionsClientXML"),
 }
 
 FLOAT_CLIENTS = {
-    "json": FloatingIPsClientJSON,
-    "xml": FloatingIPsClientXML,
+    "json": ("tempest.services.compute.json.floating_ips_client"
+             ".FloatingIPsClientJSON"),
+    "xml": ("tempest.services.compute.xml.floating_ips_client"
+            ".FloatingIPsClientXML"),
 }
 
 SNAPSHOTS_CLIENTS = {
-    "json": SnapshotsClientJSON,
-    "xml": SnapshotsClientXML,
+    "json": ("tempest.services.volume.json.snapshots_client"
+             ".SnapshotsClientJSON"),
+    "xml": "tempest.services.volume.xml.snapshots_client.SnapshotsClientXML",
 }
 
 VOLUMES_CLIENTS = {
-    "json": VolumesClientJSON,
-    "xml": VolumesClientXML,
+    "json": "tempest.services.volume.json.volumes_client.VolumesClientJSON",
+    "xml": "tempest.services.volume.xml.volumes_client.VolumesClientXML",
 }
 
 VOLUME_TYPES_CLIENTS = {
-    "json": VolumeTypesClientJSON,
-    "xml": VolumeTypesClientXML,
+    "json": ("tempest.services.volume.json.admin.volume_types_client"
+             ".VolumeTypesClientJSON"),
+    "xml": ("tempest.services.volume.xml.admin.volume_types_client"
+            ".VolumeTypesClientXML"),
 }
 
 IDENTITY_CLIENT = {
-    "json": IdentityClientJSON,
-    "xml": IdentityClientXML,
+    "json": ("tempest.services.identity.json.identity_client"
+             ".IdentityClientJSON"),
+    "xml": "tempest.services.identity.xml.identity_client.IdentityClientXML",
 }
 
 TOKEN_CLIENT = {
-    "json": TokenClientJSON,
-    "xml": TokenClientXML,
+    "json": "tempest.services.identity.json.identity_client.TokenClientJSON",
+    "xml": "tempest.services.identity.xml.identity_client.TokenClientXML",
 }
 
 SECURITY_GROUPS_CLIENT = {
-    "json": SecurityGroupsClientJSON,
-    "xml": SecurityGroupsClientXML,
+    "json": ("tempest.services.compute.json.security_groups_client"
+             ".SecurityGroupsClientJSON"),
+    "xml": ("tempest.services.compute.xml.security_groups_client"
+            ".SecurityGroupsClientXML"),
 }
 
 INTERFACES_CLIENT = {
-    "json": InterfacesClientJSON,
-    "xml": InterfacesClientXML,
+    "json": ("tempest.services.compute.json.interfaces_client"
+             ".InterfacesClientJSON"),
+    "xml": ("tempest.services.compute.xml.interfaces_client"
+            ".InterfacesClientXML"),
+}
+
+# Client attributes of Manager: the per-interface table or the path of
+# the client class, and whether it only takes the config
+MANAGER_CLIENTS = {
+    'servers_client': (SERVERS_CLIENTS, False),
+    'limits_client': (LIMITS_CLIENTS, False),
+    'images_client': (IMAGES_CLIENTS, False),
+    'keypairs_client': (KEYPAIRS_CLIENTS, False),
+    'quotas_client': (QUOTAS_CLIENTS, False),
+    'flavors_client': (FLAVORS_CLIENTS, False),
+    'extensions_client': (EXTENSIONS_CLIENTS, False),
+    'volumes_extensions_client': (VOLUMES_EXTENSIONS_CLIENTS, False),
+    'floating_ips_client': (FLOAT_CLIENTS, False),
+    'snapshots_client': (SNAPSHOTS_CLIENTS, False),
+    'volumes_client': (VOLUMES_CLIENTS, False),
+    'volume_types_client': (VOLUME_TYPES_CLIENTS, False),
+    'identity_client': (IDENTITY_CLIENT, False),
+    'token_client': (TOKEN_CLIENT, True),
+    'security_groups_client': (SECURITY_GROUPS_CLIENT, False),
+    'interfaces_client': (INTERFACES_CLIENT, False),
+    'network_client': (
+        'tempest.services.network.json.network_client.NetworkClient', False),
+    'hosts_client': (
+        'tempest.services.compute.json.hosts_client.HostsClientJSON', False),
+    'account_client': (
+        'tempest.services.object_storage.account_client.AccountClient',
+        False),
+    'image_client': (
+        'tempest.services.image.v1.json.image_client.ImageClientJSON', False),
+    'image_client_v2': (
+        'tempest.services.image.v2.json.image_client.ImageClientV2JSON',
+        False),
+    'container_client': (
+        'tempest.services.object_storage.container_client.ContainerClient',
+        False),
+    'object_client': (
+        'tempest.services.object_storage.object_client.ObjectClient', False),
+    'ec2api_client': ('tempest.services.botoclients.APIClientEC2', False),
+    's3_client': ('tempest.services.botoclients.ObjectClientS3', False),
+    'custom_object_client': (
+        'tempest.services.object_storage.object_client.'
+        'ObjectClientCustomizedHeader', False),
+    'custom_account_client': (
+        'tempest.services.object_storage.account_client.'
+        'AccountClientCustomizedHeader', False),
 }
 
 
@@ -162,6 +170,9 @@ class Manager(object):
 
     """
     Top level manager for OpenStack Compute clients
+
+    The clients listed in MANAGER_CLIENTS are imported and built on first
+    access only.
     """
 
     def __init__(self, username=None, password=None, tenant_name=None,
@@ -192,48 +203,31 @@ class Manager(object):
         self.auth_url = self.config.identity.uri
 
         if self.config.identity.strategy == 'keystone':
-            client_args = (self.config, self.username, self.password,
-                           self.auth_url, self.tenant_name)
+            self.client_args = (self.config, self.username, self.password,
+                                self.auth_url, self.tenant_name)
         else:
-            client_args = (self.config, self.username, self.password,
-                           self.auth_url)
-
-        try:
-            self.servers_client = SERVERS_CLIENTS[interface](*client_args)
-            self.limits_client = LIMITS_CLIENTS[interface](*client_args)
-            self.images_client = IMAGES_CLIENTS[interface](*client_args)
-            self.keypairs_client = KEYPAIRS_CLIENTS[interface](*client_args)
-            self.quotas_client = QUOTAS_CLIENTS[interface](*client_args)
-            self.flavors_client = FLAVORS_CLIENTS[interface](*client_args)
-            ext_cli = EXTENSIONS_CLIENTS[interface](*client_args)
-            self.extensions_client = ext_cli
-            vol_ext_cli = VOLUMES_EXTENSIONS_CLIENTS[interface](*client_args)
-            self.volumes_extensions_client = vol_ext_cli
-            self.floating_ips_client = FLOAT_CLIENTS[interface](*client_args)
-            self.snapshots_client = SNAPSHOTS_CLIENTS[interface](*client_args)
-            self.volumes_client = VOLUMES_CLIENTS[interface](*client_args)
-            self.volume_types_client = \
-                VOLUME_TYPES_CLIENTS[interface](*client_args)
-            self.identity_client = IDENTITY_CLIENT[interface](*client_args)
-            self.token_client = TOKEN_CLIENT[interface](self.config)
-            self.security_groups_client = \
-                SECURITY_GROUPS_CLIENT[interface](*client_args)
-            self.interfaces_client = INTERFACES_CLIENT[interface](*client_args)
-        except KeyError:
+            self.client_args = (self.config, self.username, self.password,
+                                self.auth_url)
+
+        if interface not in SERVERS_CLIENTS:
             msg = "Unsupported interface type `%s'" % interface
             raise exceptions.InvalidConfiguration(msg)
-        self.network_client = NetworkClient(*client_args)
-        self.hosts_client = HostsClientJSON(*client_args)
-        self.account_client = AccountClient(*client_args)
-        self.image_client = ImageClientJSON(*client_args)
-        self.image_client_v2 = ImageClientV2JSON(*client_args)
-        self.container_client = ContainerClient(*client_args)
-        self.object_client = ObjectClient(*client_args)
-        self.ec2api_client = botoclients.APIClientEC2(*client_args)
-        self.s3_client = botoclients.ObjectClientS3(*client_args)
-        self.custom_object_client = ObjectClientCustomizedHeader(*client_args)
-        self.custom_account_client = \
-            AccountClientCustomizedHeader(*client_args)
+        self.interface = interface
+
+    def __getattr__(self, name):
+        # Only called for attributes not set yet
+        if name not in MANAGER_CLIENTS:
+            raise AttributeError(name)
+        classes, config_only = MANAGER_CLIENTS[name]
+        if isinstance(classes, dict):
+            classes = classes[self.interface]
+        client_cls = misc.import_class(classes)
+        if config_only:
+            client = client_cls(self.config)
+        else:
+            client = client_cls(*self.client_args)
+        setattr(self, name, client)
+        return client
 
 
 class AltManager(Manager):
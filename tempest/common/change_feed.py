@@ -0,0 +1,126 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# Seconds re-listed before the high-water mark, as the timestamps only
+# have a one second precision
+OVERLAP = 1
+
+
+def _since(timestamp):
+    """Returns the changes-since value listing from `timestamp` on."""
+    try:
+        since = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except ValueError:
+        return timestamp
+    since -= datetime.timedelta(seconds=OVERLAP)
+    return since.strftime(TIMESTAMP_FORMAT)
+
+
+class ChangeFeed(object):
+    """Keeps a local index of resources up to date using changes-since.
+
+    The first poll lists every resource; later polls only ask Nova for the
+    resources updated since the newest 'updated' timestamp seen so far, so
+    the cost of a poll follows the number of changes rather than the
+    number of resources. The server's own timestamps are used as the
+    high-water mark, which makes the feed immune to clock skew between the
+    test host and the cloud. Polls start OVERLAP seconds before that mark,
+    so that the changes made in the same second as the newest one seen
+    are not missed; the resources listed again unchanged are ignored.
+
+    Deleted resources are reported by changes-since with a DELETED status
+    and are kept in the index with that status.
+    """
+
+    def __init__(self, list_resources, min_interval=0):
+        """
+        :param list_resources: callable taking a params dict and returning
+                               the detailed list of resources
+        :param min_interval: polls issued less than this many seconds after
+                             the previous one are served from the index
+        """
+        self._list_resources = list_resources
+        self.min_interval = min_interval
+        self.resources = {}
+        self.high_water_mark = None
+        self._subscribers = []
+        self._last_poll = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Calls callback(resource) for every changed resource seen."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _is_changed(self, resource):
+        previous = self.resources.get(resource['id'])
+        return (previous is None or
+                (previous.get('updated'), previous.get('status')) !=
+                (resource.get('updated'), resource.get('status')))
+
+    def poll(self):
+        """Fetches the changes since the last poll and updates the index.
+
+        :returns: list of the resources that changed
+        """
+        with self._lock:
+            now = time.time()
+            if (self._last_poll is not None and
+                    now - self._last_poll < self.min_interval):
+                return []
+            params = {}
+            if self.high_water_mark is not None:
+                params['changes-since'] = _since(self.high_water_mark)
+            listed = self._list_resources(params)
+            self._last_poll = now
+
+            changed = []
+            for resource in listed:
+                updated = resource.get('updated')
+                if updated and (self.high_water_mark is None or
+                                updated > self.high_water_mark):
+                    self.high_water_mark = updated
+                if self._is_changed(resource):
+                    changed.append(resource)
+                self.resources[resource['id']] = resource
+            LOG.debug("%d of %d listed resources changed since %s",
+                      len(changed), len(listed), params.get('changes-since'))
+
+        for resource in changed:
+            for callback in list(self._subscribers):
+                callback(resource)
+        return changed
+
+    def get(self, resource_id):
+        """Returns the indexed document of a resource, or None."""
+        return self.resources.get(resource_id)
+
+    def get_status(self, resource_id):
+        resource = self.resources.get(resource_id)
+        if resource is None:
+            return None
+        return resource['status']
@@ -0,0 +1,185 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A local SQLite history of test class and test durations.
+
+tempest.parallel records every run here and uses the history to balance
+the test classes between its workers. The history can also be queried::
+
+    python -m tempest.common.durations slowest --limit 20
+    python -m tempest.common.durations regressions --threshold 1.5
+    python -m tempest.common.durations history \\
+        tempest.tests.compute.servers.test_server_actions:ServerActionsTestJSON
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+DEFAULT_DB = os.path.join(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..')), '.tempest-durations.db')
+# Number of recent runs averaged into an estimate
+ESTIMATE_RUNS = 5
+
+CLASS = 'class'
+TEST = 'test'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    workers INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS durations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS durations_name ON durations (kind, name);
+"""
+
+
+class DurationStore(object):
+    """Durations of the test classes and tests of every recorded run.
+
+    Classes are named by their nose address, module:Class, and tests by
+    module.Class.method.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_DB
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def start_run(self, workers):
+        """Records a new run and returns its id."""
+        with self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO runs (started, workers) VALUES (?, ?)',
+                (time.time(), workers))
+        return cursor.lastrowid
+
+    def record(self, run_id, kind, durations):
+        """Records (name, duration, status) tuples of a run."""
+        with self._conn:
+            self._conn.executemany(
+                'INSERT INTO durations (run_id, kind, name, duration, status)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                [(run_id, kind, name, duration, status)
+                 for name, duration, status in durations])
+
+    def _recent(self, kind, runs):
+        """Returns the durations of each name in its last runs, newest first.
+        """
+        recent = {}
+        rows = self._conn.execute(
+            'SELECT name, duration FROM durations WHERE kind = ? '
+            'ORDER BY run_id DESC', (kind,))
+        for name, duration in rows:
+            samples = recent.setdefault(name, [])
+            if len(samples) < runs:
+                samples.append(duration)
+        return recent
+
+    def get_estimates(self, kind=CLASS, runs=ESTIMATE_RUNS):
+        """Returns the mean duration of each name over its last runs."""
+        return dict((name, sum(samples) / len(samples))
+                    for name, samples in self._recent(kind, runs).items())
+
+    def get_regressions(self, kind=CLASS, threshold=1.5, min_duration=10,
+                        runs=ESTIMATE_RUNS):
+        """Finds what got slower in its latest run.
+
+        :returns: list of (name, latest, baseline) tuples, worst first,
+                  where latest is above threshold times the mean of the
+                  previous runs and above min_duration seconds
+        """
+        regressions = []
+        for name, samples in self._recent(kind, runs + 1).items():
+            if len(samples) < 2:
+                continue
+            latest = samples[0]
+            baseline = sum(samples[1:]) / (len(samples) - 1)
+            if latest >= min_duration and latest > threshold * baseline:
+                regressions.append((name, latest, baseline))
+        regressions.sort(key=lambda r: r[1] / max(r[2], 0.001), reverse=True)
+        return regressions
+
+    def get_history(self, name):
+        """Returns (started, duration, status) of every run of name."""
+        return self._conn.execute(
+            'SELECT runs.started, durations.duration, durations.status '
+            'FROM durations JOIN runs ON durations.run_id = runs.id '
+            'WHERE durations.name = ? ORDER BY runs.id', (name,)).fetchall()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Query the recorded Tempest test durations.')
+    parser.add_argument('--db', default=DEFAULT_DB,
+                        help='Path of the durations database')
+    parser.add_argument('--tests', dest='kind', action='store_const',
+                        const=TEST, default=CLASS,
+                        help='Report on single tests instead of classes')
+    commands = parser.add_subparsers(dest='command')
+    slowest = commands.add_parser('slowest',
+                                  help='List the slowest classes or tests')
+    slowest.add_argument('--limit', type=int, default=20)
+    regressions = commands.add_parser(
+        'regressions', help='List what got slower in its latest run')
+    regressions.add_argument('--threshold', type=float, default=1.5,
+                             help='Slowdown factor worth reporting')
+    regressions.add_argument('--min-duration', type=float, default=10,
+                             help='Ignore durations below this many seconds')
+    history = commands.add_parser('history',
+                                  help='Show every recorded run of a name')
+    history.add_argument('name')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    store = DurationStore(args.db)
+    try:
+        if args.command == 'slowest':
+            estimates = sorted(store.get_estimates(args.kind).items(),
+                               key=lambda e: e[1], reverse=True)
+            for name, duration in estimates[:args.limit]:
+                print "%8.1f s  %s" % (duration, name)
+        elif args.command == 'regressions':
+            for name, latest, baseline in store.get_regressions(
+                    args.kind, args.threshold, args.min_duration):
+                print "%8.1f s (was %.1f s)  %s" % (latest, baseline, name)
+        elif args.command == 'history':
+            for started, duration, status in store.get_history(args.name):
+                print "%s  %8.1f s  %s" % (
+                    time.strftime('%Y-%m-%d %H:%M', time.localtime(started)),
+                    duration, status or '')
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
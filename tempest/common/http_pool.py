@@ -0,0 +1,214 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Keep-alive HTTP connections shared by all REST clients in a process.
+
+httplib2.Http keeps its connections open between requests, but every
+RestClient used to own a private instance, so a test run opened a new
+TCP/TLS connection per client object. The pools below hand out warm
+httplib2.Http objects per (scheme, host, port) endpoint instead.
+"""
+
+import logging
+import threading
+import time
+import urlparse
+
+import httplib2
+
+LOG = logging.getLogger(__name__)
+
+# Maximum number of connections kept to a single endpoint
+MAX_POOL_SIZE = 10
+# Connections unused for this many seconds are closed rather than reused
+MAX_IDLE_TIME = 60
+# Connections are recycled after serving this many requests
+MAX_REQUESTS_PER_CONNECTION = 100
+# Seconds to wait for a free connection when the pool is exhausted
+CHECKOUT_TIMEOUT = 60
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class PooledConnection(object):
+    """An httplib2.Http object and its bookkeeping while in a pool."""
+
+    def __init__(self, http):
+        self.http = http
+        self.requests = 0
+        self.last_used = time.time()
+
+    def close(self):
+        for conn in self.http.connections.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self.http.connections.clear()
+
+
+class HttpConnectionPool(object):
+    """A bounded, thread-safe pool of connections to a single endpoint."""
+
+    def __init__(self, key, disable_ssl_certificate_validation=False,
+                 max_size=MAX_POOL_SIZE, max_idle_time=MAX_IDLE_TIME,
+                 max_requests=MAX_REQUESTS_PER_CONNECTION):
+        self.key = key
+        self.dscv = disable_ssl_certificate_validation
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.max_requests = max_requests
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._idle = []
+        self._checked_out = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def _evict_idle(self):
+        """Closes connections that have been idle for too long."""
+        now = time.time()
+        fresh = []
+        for conn in self._idle:
+            if now - conn.last_used > self.max_idle_time:
+                conn.close()
+                self.evictions += 1
+            else:
+                fresh.append(conn)
+        self._idle = fresh
+
+    def get(self, timeout=CHECKOUT_TIMEOUT):
+        """Checks out a connection, blocking while the pool is exhausted."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    # Most recently used first, it is the least likely to
+                    # have been dropped by the server.
+                    conn = self._idle.pop()
+                    self.hits += 1
+                    break
+                if self._checked_out < self.max_size:
+                    http = httplib2.Http(
+                        disable_ssl_certificate_validation=self.dscv)
+                    conn = PooledConnection(http)
+                    self.misses += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise httplib2.HttpLib2Error(
+                        "Timed out waiting for a free connection to %s://%s:%s"
+                        % self.key[:3])
+                self._cond.wait(remaining)
+            self._checked_out += 1
+            return conn
+
+    def put(self, conn, reusable=True):
+        """Returns a connection checked out with get()."""
+        with self._cond:
+            self._checked_out -= 1
+            conn.requests += 1
+            conn.last_used = time.time()
+            if reusable and conn.requests < self.max_requests:
+                self._idle.append(conn)
+            else:
+                conn.close()
+                self.evictions += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+
+    def get_stats(self):
+        with self._cond:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'idle': len(self._idle),
+                    'in_use': self._checked_out}
+
+
+class HttpPoolManager(object):
+    """Keeps one HttpConnectionPool per endpoint."""
+
+    def __init__(self, **pool_kwargs):
+        self.pool_kwargs = pool_kwargs
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def get_pool(self, uri, disable_ssl_certificate_validation=False):
+        parsed = urlparse.urlparse(uri)
+        scheme = parsed.scheme.lower()
+        port = parsed.port or DEFAULT_PORTS.get(scheme)
+        key = (scheme, parsed.hostname, port,
+               disable_ssl_certificate_validation)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = HttpConnectionPool(
+                    key, disable_ssl_certificate_validation,
+                    **self.pool_kwargs)
+                self._pools[key] = pool
+            return pool
+
+    def get_stats(self):
+        """Returns the counters of every pool, keyed by scheme://host:port."""
+        with self._lock:
+            pools = self._pools.values()
+        stats = {}
+        for pool in pools:
+            name = '%s://%s:%s' % pool.key[:3]
+            stats[name] = pool.get_stats()
+        return stats
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+
+
+# The pools shared by every PooledHttp in the process
+POOL_MANAGER = HttpPoolManager()
+
+
+class PooledHttp(object):
+    """Drop-in replacement for httplib2.Http backed by shared pools.
+
+    Only the request() method is provided; each call borrows a warm
+    connection to the target endpoint for its duration.
+    """
+
+    def __init__(self, disable_ssl_certificate_validation=False,
+                 pool_manager=None):
+        self.dscv = disable_ssl_certificate_validation
+        self.pool_manager = pool_manager or POOL_MANAGER
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        pool = self.pool_manager.get_pool(uri, self.dscv)
+        conn = pool.get()
+        reusable = False
+        try:
+            resp, content = conn.http.request(uri, method, body=body,
+                                              headers=headers, **kwargs)
+            reusable = resp.get('connection', '').lower() != 'close'
+            return resp, content
+        finally:
+            pool.put(conn, reusable)
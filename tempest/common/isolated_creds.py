@@ -0,0 +1,401 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A pool of isolated tenants and users shared by test classes.
+
+Creating and deleting a tenant and a user for every test class costs four
+or more serial Keystone writes per class. The pool creates N primary/alt
+credential pairs once, in parallel, and leases them to test classes.
+When a pair is given back, the servers, floating IPs, keypairs, security
+groups, snapshots and volumes left in its tenants are deleted, except the
+servers of the server pools (see tempest.common.server_pool), and their
+compute quotas reset, so that the next class gets empty tenants. A pair
+whose tenants cannot be purged is replaced by a new one.
+
+The pool lives in a JSON lease file protected by a lock file, so several
+test processes on the same host share it safely. Every process using the
+pool registers itself in the file; the last one to exit deletes the
+tenants and users. As it holds the passwords of the pooled users, only
+the owner may read the lease file.
+"""
+
+import atexit
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import tempfile
+
+from tempest import clients
+from tempest.common import server_pool
+from tempest.common.utils.data_utils import rand_name
+from tempest.common import workers
+from tempest import exceptions
+
+LOG = logging.getLogger(__name__)
+
+PASSWORD = 'pass'
+DEFAULT_LEASE_FILE = os.path.join(tempfile.gettempdir(),
+                                  'tempest-isolated-creds.json')
+
+# Quotas that QuotasClient.update_quota_set can reset
+QUOTA_KEYS = ('injected_file_content_bytes', 'metadata_items', 'ram',
+              'floating_ips', 'key_pairs', 'instances',
+              'security_group_rules', 'injected_files', 'cores',
+              'injected_file_path_bytes', 'security_groups')
+
+
+@contextlib.contextmanager
+def _locked(path):
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+class CredsLease(object):
+    """A primary/alt pair of credentials leased from the pool."""
+
+    def __init__(self, index, primary, alt, quota_set):
+        self.index = index
+        self.primary = primary
+        self.alt = alt
+        self.quota_set = quota_set
+
+    def get(self, alt=False):
+        """Returns the username, tenant_name, password of a member."""
+        creds = self.alt if alt else self.primary
+        return creds['username'], creds['tenant_name'], creds['password']
+
+    def owns(self, user, tenant):
+        return any(creds['user']['id'] == user['id'] and
+                   creds['tenant']['id'] == tenant['id']
+                   for creds in (self.primary, self.alt))
+
+
+class IsolatedCredsPool(object):
+    """Leases pre-provisioned isolated credentials to test classes."""
+
+    def __init__(self, size, lease_file=None):
+        self.size = size
+        self.lease_file = lease_file or DEFAULT_LEASE_FILE
+        self.lock_file = self.lease_file + '.lock'
+        self._admin_manager = None
+        self._registered = False
+
+    def _get_admin_manager(self):
+        if self._admin_manager is None:
+            self._admin_manager = clients.AdminManager()
+        return self._admin_manager
+
+    def _load(self):
+        if not os.path.exists(self.lease_file):
+            return {'pairs': [], 'users': [], 'quota_set': None}
+        with open(self.lease_file) as f:
+            return json.load(f)
+
+    def _save(self, data):
+        # Write and rename so readers never see a partial file
+        tmp = self.lease_file + '.tmp'
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # The file may have been left by an older run with another mode
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp, self.lease_file)
+
+    def _create_creds(self, name_root):
+        identity_client = self._get_admin_manager().identity_client
+        tenant_name = name_root + '-tenant'
+        username = name_root + '-user'
+        resp, tenant = identity_client.create_tenant(
+            name=tenant_name, description=tenant_name + '-desc')
+        resp, user = identity_client.create_user(username, PASSWORD,
+                                                 tenant['id'],
+                                                 name_root + '@example.com')
+        return {'username': username, 'tenant_name': tenant_name,
+                'password': PASSWORD, 'user': user, 'tenant': tenant}
+
+    def _create_pair(self):
+        name_root = rand_name('pool')
+        return {'primary': self._create_creds(name_root),
+                'alt': self._create_creds(name_root + '-alt'),
+                'leased_by': None}
+
+    def _fill(self, data):
+        """Creates the missing credential pairs concurrently."""
+        missing = self.size - len(data['pairs'])
+        if missing <= 0:
+            return
+        LOG.info('Creating %d isolated credential pairs', missing)
+        futures = workers.run_concurrently(self._create_pair,
+                                           [()] * missing, missing)
+        for future in futures:
+            if future.exception() is not None:
+                LOG.error('Unable to create pooled credentials: %s',
+                          future.exception())
+            else:
+                data['pairs'].append(future.result())
+        if data['quota_set'] is None and data['pairs']:
+            # Fresh tenants all start with the default quotas
+            tenant_id = data['pairs'][0]['primary']['tenant']['id']
+            quotas_client = self._get_admin_manager().quotas_client
+            resp, quota_set = quotas_client.get_quota_set(tenant_id)
+            data['quota_set'] = dict((k, v) for k, v in quota_set.items()
+                                     if k in QUOTA_KEYS)
+
+    def _register(self, data):
+        pid = os.getpid()
+        data['users'] = [p for p in data['users'] if _is_alive(p)]
+        if pid not in data['users']:
+            data['users'].append(pid)
+        if not self._registered:
+            atexit.register(self.close)
+            self._registered = True
+
+    def lease(self, owner):
+        """Leases a credential pair to owner.
+
+        :returns: CredsLease, or None when every pair is leased
+        """
+        with _locked(self.lock_file):
+            data = self._load()
+            self._register(data)
+            self._fill(data)
+            lease = None
+            for index, pair in enumerate(data['pairs']):
+                leased_by = pair['leased_by']
+                # Leases of processes which died are reclaimed
+                if leased_by is not None and _is_alive(leased_by['pid']):
+                    continue
+                pair['leased_by'] = {'pid': os.getpid(), 'owner': owner}
+                lease = CredsLease(index, pair['primary'], pair['alt'],
+                                   data['quota_set'])
+                break
+            self._save(data)
+        if lease is None:
+            LOG.info('All %d pooled credential pairs are leased', self.size)
+        return lease
+
+    def _reset_quotas(self, lease):
+        if not lease.quota_set:
+            return
+        quotas_client = self._get_admin_manager().quotas_client
+        for creds in (lease.primary, lease.alt):
+            tenant_id = creds['tenant']['id']
+            try:
+                resp, quota_set = quotas_client.get_quota_set(tenant_id)
+                changed = any(quota_set.get(k) != v
+                              for k, v in lease.quota_set.items())
+                if changed:
+                    quotas_client.update_quota_set(tenant_id,
+                                                   **lease.quota_set)
+            except Exception as exc:
+                LOG.warning('Unable to reset quotas of tenant %s: %s',
+                            tenant_id, exc)
+
+    def _purge_volumes(self, manager):
+        try:
+            snapshots_client = manager.snapshots_client
+            volumes_client = manager.volumes_client
+            resp, snapshots = snapshots_client.list_snapshots()
+        except exceptions.EndpointNotFound:
+            return 0
+        for snapshot in snapshots:
+            snapshots_client.delete_snapshot(snapshot['id'])
+        for snapshot in snapshots:
+            snapshots_client.wait_for_resource_deletion(snapshot['id'])
+        resp, volumes = volumes_client.list_volumes()
+        for volume in volumes:
+            volumes_client.delete_volume(volume['id'])
+        for volume in volumes:
+            volumes_client.wait_for_resource_deletion(volume['id'])
+        return len(snapshots) + len(volumes)
+
+    def _purge(self, creds):
+        """Deletes the resources left in the tenant of creds.
+
+        :returns: True if the tenant is now empty
+        """
+        manager = clients.Manager(username=creds['username'],
+                                  password=creds['password'],
+                                  tenant_name=creds['tenant_name'])
+        try:
+            servers_client = manager.servers_client
+            resp, body = servers_client.list_servers()
+            # The warm servers of the server pools outlive the classes
+            pooled = server_pool.pooled_server_ids(creds['tenant_name'])
+            server_ids = [server['id'] for server in body['servers']
+                          if server['id'] not in pooled and
+                          not server['name'].startswith(
+                              server_pool.POOL_SERVER_PREFIX)]
+            for server_id in server_ids:
+                servers_client.delete_server(server_id)
+            for server_id in server_ids:
+                servers_client.wait_for_server_termination(server_id,
+                                                           ignore_error=True)
+            floating_ips_client = manager.floating_ips_client
+            resp, floating_ips = floating_ips_client.list_floating_ips()
+            for floating_ip in floating_ips:
+                floating_ips_client.delete_floating_ip(floating_ip['id'])
+            keypairs_client = manager.keypairs_client
+            resp, keypairs = keypairs_client.list_keypairs()
+            for keypair in keypairs:
+                keypairs_client.delete_keypair(keypair['keypair']['name'])
+            security_groups_client = manager.security_groups_client
+            resp, groups = security_groups_client.list_security_groups()
+            groups = [group for group in groups if group['name'] != 'default']
+            for group in groups:
+                security_groups_client.delete_security_group(group['id'])
+            purged = (len(server_ids) + len(floating_ips) + len(keypairs) +
+                      len(groups) + self._purge_volumes(manager))
+        except Exception as exc:
+            LOG.warning('Unable to purge tenant %s: %s',
+                        creds['tenant_name'], exc)
+            return False
+        if purged:
+            LOG.info('Deleted %d resources left in tenant %s', purged,
+                     creds['tenant_name'])
+        return True
+
+    def _replace_pair(self, lease):
+        """Deletes the credentials of lease and returns a new pair."""
+        for creds in (lease.primary, lease.alt):
+            try:
+                self._delete_creds(creds)
+            except Exception as exc:
+                LOG.warning('Unable to delete pooled credentials: %s', exc)
+        try:
+            return self._create_pair()
+        except Exception as exc:
+            LOG.error('Unable to replace pooled credentials: %s', exc)
+            return None
+
+    def release(self, lease):
+        """Purges the leased tenants and returns the pair to the pool.
+
+        The pair is replaced by a new one if its tenants cannot be purged.
+        """
+        futures = workers.run_concurrently(
+            self._purge, [(lease.primary,), (lease.alt,)], 2)
+        if all(future.exception() is None and future.result()
+               for future in futures):
+            self._reset_quotas(lease)
+            pair = None
+        else:
+            pair = self._replace_pair(lease)
+        with _locked(self.lock_file):
+            data = self._load()
+            if pair is not None:
+                data['pairs'][lease.index] = pair
+            data['pairs'][lease.index]['leased_by'] = None
+            self._save(data)
+
+    def _delete_creds(self, creds):
+        identity_client = self._get_admin_manager().identity_client
+        identity_client.delete_user(creds['user']['id'])
+        identity_client.delete_tenant(creds['tenant']['id'])
+
+    def close(self):
+        """Unregisters this process, deleting the pool if it was the last."""
+        with _locked(self.lock_file):
+            data = self._load()
+            pid = os.getpid()
+            for pair in data['pairs']:
+                if pair['leased_by'] and pair['leased_by']['pid'] == pid:
+                    pair['leased_by'] = None
+            data['users'] = [p for p in data['users']
+                             if p != pid and _is_alive(p)]
+            if data['users']:
+                self._save(data)
+                return
+
+            LOG.info('Deleting %d pooled credential pairs',
+                     len(data['pairs']))
+            creds = [(pair[member],) for pair in data['pairs']
+                     for member in ('primary', 'alt')]
+            for future in workers.run_concurrently(self._delete_creds,
+                                                   creds, self.size):
+                if future.exception() is not None:
+                    LOG.error('Unable to delete pooled credentials: %s',
+                              future.exception())
+            if os.path.exists(self.lease_file):
+                os.remove(self.lease_file)
+
+
+def lease_isolated_creds(cls):
+    """Leases the next credentials of a test class from the pool.
+
+    The first call leases a pair to the class and returns its primary
+    credentials, the second one returns its alt credentials. Their user
+    and tenant are appended to cls.isolated_creds.
+
+    :returns: the username, tenant_name, password tuple, or None when the
+              pool is disabled or exhausted
+    """
+    if not cls.isolated_creds:
+        pool = get_pool(cls.config)
+        if pool is not None:
+            cls._creds_lease = pool.lease(cls.__name__)
+    lease = cls._creds_lease
+    if lease is None:
+        return None
+    alt = bool(cls.isolated_creds)
+    creds = lease.alt if alt else lease.primary
+    cls.isolated_creds.append((creds['user'], creds['tenant']))
+    return lease.get(alt=alt)
+
+
+def release_isolated_creds(cls):
+    """Gives the pair leased to a test class back to the pool.
+
+    :returns: the (user, tenant) of cls.isolated_creds which were not
+              leased, and are left for the class to delete
+    """
+    lease = cls._creds_lease
+    if lease is None:
+        return list(cls.isolated_creds)
+    get_pool(cls.config).release(lease)
+    cls._creds_lease = None
+    return [(user, tenant) for user, tenant in cls.isolated_creds
+            if not lease.owns(user, tenant)]
+
+
+_pool = None
+
+
+def get_pool(config):
+    """Returns the process' IsolatedCredsPool, or None if it is disabled."""
+    global _pool
+    size = config.compute.isolated_creds_pool_size
+    if not (config.compute.allow_tenant_isolation and size > 0):
+        return None
+    if _pool is None:
+        _pool = IsolatedCredsPool(size,
+                                  config.compute.isolated_creds_lease_file)
+    return _pool
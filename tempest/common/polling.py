@@ -0,0 +1,156 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Policies deciding how long wait_for_* loops sleep between checks.
+
+A waiter asks the policy for an iterator of sleep intervals and, once the
+awaited transition happened, reports how long it took so that adaptive
+policies can aim their next checks at the typical completion time.
+
+Usage::
+
+    policy = polling.get_policy(config)
+    intervals = policy.intervals('server BUILD->ACTIVE', build_interval)
+    while not done():
+        time.sleep(next(intervals))
+    policy.record('server BUILD->ACTIVE', elapsed)
+"""
+
+import logging
+import random
+import threading
+
+from tempest import config as tempest_config
+
+LOG = logging.getLogger(__name__)
+
+# Weight of the newest sample in the learned transition durations
+ESTIMATE_WEIGHT = 0.3
+# Fraction of the learned duration slept before checking again
+ESTIMATE_LEAD = 0.8
+
+
+class FixedPollingPolicy(object):
+    """Sleeps the caller's interval between every check."""
+
+    def intervals(self, transition=None, interval=1):
+        while True:
+            yield interval
+
+    def record(self, transition, duration):
+        pass
+
+    def get_estimate(self, transition):
+        return None
+
+
+class BackoffPollingPolicy(FixedPollingPolicy):
+    """Checks quickly first, then backs off exponentially.
+
+    The first check happens after first_interval seconds. Every further
+    interval is multiplied by factor up to max_interval, with up to
+    jitter * interval of random noise so waiters started together do not
+    keep polling in lockstep.
+
+    The policy also keeps a moving average of how long each named
+    transition took during the run. When one is known, the second check
+    is scheduled just before the transition usually completes instead of
+    working up to it through the backoff steps.
+    """
+
+    def __init__(self, first_interval=1, factor=1.5, max_interval=30,
+                 jitter=0.1):
+        self.first_interval = first_interval
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def _jittered(self, interval):
+        noise = interval * self.jitter * (2 * random.random() - 1)
+        return max(0, interval + noise)
+
+    def intervals(self, transition=None, interval=1):
+        delay = min(self.first_interval, self.max_interval)
+        yield delay
+        elapsed = delay
+
+        estimate = self.get_estimate(transition)
+        if estimate is not None:
+            lead = min(estimate * ESTIMATE_LEAD - elapsed, self.max_interval)
+            if lead > delay:
+                yield self._jittered(lead)
+
+        while True:
+            delay = min(delay * self.factor, self.max_interval)
+            yield self._jittered(delay)
+
+    def record(self, transition, duration):
+        if transition is None:
+            return
+        with self._lock:
+            estimate = self._estimates.get(transition)
+            if estimate is None:
+                estimate = duration
+            else:
+                estimate += ESTIMATE_WEIGHT * (duration - estimate)
+            self._estimates[transition] = estimate
+        LOG.debug("%s took %.1f s, estimate is now %.1f s", transition,
+                  duration, estimate)
+
+    def get_estimate(self, transition):
+        if transition is None:
+            return None
+        with self._lock:
+            return self._estimates.get(transition)
+
+
+POLICIES = {
+    'fixed': FixedPollingPolicy,
+    'backoff': BackoffPollingPolicy,
+}
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_policy(config=None):
+    """Returns the process-wide polling policy selected in the config.
+
+    The policy is shared so that the transition durations learned by one
+    waiter benefit all the others.
+    """
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            if config is None:
+                config = tempest_config.TempestConfig()
+            compute = config.compute
+            name = compute.polling_policy
+            if name not in POLICIES:
+                LOG.warning("Unknown polling_policy %s, using 'fixed'", name)
+                name = 'fixed'
+            if name == 'backoff':
+                _policy = BackoffPollingPolicy(
+                    first_interval=compute.polling_first_interval,
+                    factor=compute.polling_backoff_factor,
+                    max_interval=compute.polling_max_interval,
+                    jitter=compute.polling_jitter)
+            else:
+                _policy = POLICIES[name]()
+        return _policy
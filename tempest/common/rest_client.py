@@ -17,23 +17,31 @@
 
 import collections
 import hashlib
-import httplib2
 import json
 import logging
 from lxml import etree
 import re
 import time
 
+from tempest.common import http_pool
+from tempest.common import polling
+from tempest.common import token_cache
+from tempest.common import workers
 from tempest import exceptions
 from tempest.services.compute.xml.common import xml_to_json
 
 # redrive rate limited calls at most twice
 MAX_RECURSION_DEPTH = 2
+# default number of requests a client issues in parallel
+MAX_CONCURRENT_REQUESTS = 8
 TOKEN_CHARS_RE = re.compile('^[-A-Za-z0-9+/=]*$')
 
 
 class RestClient(object):
     TYPE = "json"
+    # Factory of the transport used to send requests. Anything providing
+    # the request() method of httplib2.Http can be plugged in here.
+    HTTP_TRANSPORT = http_pool.PooledHttp
     LOG = logging.getLogger(__name__)
 
     def __init__(self, config, user, password, auth_url, tenant_name=None):
@@ -53,6 +61,7 @@ class RestClient(object):
                         'Accept': 'application/%s' % self.TYPE}
         self.build_interval = config.compute.build_interval
         self.build_timeout = config.compute.build_timeout
+        self.polling_policy = polling.get_policy(config)
         self.general_header_lc = set(('cache-control', 'connection',
                                       'date', 'pragma', 'trailer',
                                       'transfer-encoding', 'via',
@@ -62,7 +71,10 @@ class RestClient(object):
                                        'retry-after', 'server',
                                        'vary', 'www-authenticate'))
         dscv = self.config.identity.disable_ssl_certificate_validation
-        self.http_obj = httplib2.Http(disable_ssl_certificate_validation=dscv)
+        self.http_obj = self.HTTP_TRANSPORT(
+            disable_ssl_certificate_validation=dscv)
+        self.max_concurrent_requests = MAX_CONCURRENT_REQUESTS
+        self._workers = None
 
     def _set_auth(self):
         """
@@ -80,12 +92,38 @@ class RestClient(object):
                                                         self.password,
                                                         self.auth_url)
 
+    def _get_auth_key(self, user, password, auth_url, tenant_name):
+        """Returns the key of the shared token cache for the credentials."""
+        return (self._get_tokens_url(auth_url), user, password, tenant_name)
+
+    def _get_tokens_url(self, auth_url):
+        # Normalize URI to ensure /tokens is in it.
+        if 'tokens' not in auth_url:
+            auth_url = auth_url.rstrip('/') + '/tokens'
+        return auth_url
+
+    def _refresh_token(self):
+        """
+        Picks up the current shared token for this client's credentials,
+        which is re-issued once the one we hold is about to expire.
+        """
+        key = self._get_auth_key(self.user, self.password, self.auth_url,
+                                 self.tenant_name)
+        auth = token_cache.TOKEN_CACHE.get(
+            key, lambda: self._issue_token(self.user, self.password,
+                                           self.auth_url, self.tenant_name))
+        self.token = auth.token
+
     def clear_auth(self):
         """
         Can be called to clear the token and base_url so that the next request
         will fetch a new token and base_url.
         """
 
+        if self.strategy == 'keystone' and self.token is not None:
+            key = self._get_auth_key(self.user, self.password, self.auth_url,
+                                     self.tenant_name)
+            token_cache.TOKEN_CACHE.invalidate(key, self.token)
         self.token = None
         self.base_url = None
 
@@ -117,11 +155,20 @@ class RestClient(object):
     def keystone_auth(self, user, password, auth_url, service, tenant_name):
         """
         Provides authentication via Keystone.
+
+        Tokens and service catalogs are shared by all clients in the process
+        authenticating with the same credentials, so only the first of them
+        actually talks to Keystone.
         """
 
-        # Normalize URI to ensure /tokens is in it.
-        if 'tokens' not in auth_url:
-            auth_url = auth_url.rstrip('/') + '/tokens'
+        key = self._get_auth_key(user, password, auth_url, tenant_name)
+        auth = token_cache.TOKEN_CACHE.get(
+            key, lambda: self._issue_token(user, password, auth_url,
+                                           tenant_name))
+        return auth.token, self._get_endpoint(auth, service)
+
+    def _issue_token(self, user, password, auth_url, tenant_name):
+        """Requests a new token from Keystone, returns the 'access' dict."""
 
         creds = {
             'auth': {
@@ -135,44 +182,48 @@ class RestClient(object):
 
         headers = {'Content-Type': 'application/json'}
         body = json.dumps(creds)
-        resp, body = self.http_obj.request(auth_url, 'POST',
-                                           headers=headers, body=body)
+        resp, body = self.http_obj.request(self._get_tokens_url(auth_url),
+                                           'POST', headers=headers, body=body)
 
         if resp.status == 200:
             try:
-                auth_data = json.loads(body)['access']
-                token = auth_data['token']['id']
+                return json.loads(body)['access']
             except Exception, e:
                 print "Failed to obtain token for user: %s" % e
                 raise
 
-            mgmt_url = None
-            for ep in auth_data['serviceCatalog']:
-                if ep["type"] == service:
-                    for _ep in ep['endpoints']:
-                        if service in self.region and \
-                                _ep['region'] == self.region[service]:
-                            mgmt_url = _ep[self.endpoint_url]
-                    if not mgmt_url:
-                        mgmt_url = ep['endpoints'][0][self.endpoint_url]
-                    tenant_id = auth_data['token']['tenant']['id']
-                    break
-
-            if mgmt_url is None:
-                raise exceptions.EndpointNotFound(service)
-
-            if service == 'network':
-                # Keystone does not return the correct endpoint for
-                # quantum. Handle this separately.
-                mgmt_url = (mgmt_url + self.config.network.api_version +
-                            "/tenants/" + tenant_id)
-
-            return token, mgmt_url
-
         elif resp.status == 401:
             raise exceptions.AuthenticationFailure(user=user,
                                                    password=password)
 
+        raise exceptions.IdentityError('Unexpected response status %s while '
+                                       'authenticating' % resp.status)
+
+    def _get_endpoint(self, auth, service):
+        """Resolves the endpoint of service from a cached service catalog."""
+
+        mgmt_url = None
+        for ep in auth.catalog:
+            if ep["type"] == service:
+                for _ep in ep['endpoints']:
+                    if service in self.region and \
+                            _ep['region'] == self.region[service]:
+                        mgmt_url = _ep[self.endpoint_url]
+                if not mgmt_url:
+                    mgmt_url = ep['endpoints'][0][self.endpoint_url]
+                break
+
+        if mgmt_url is None:
+            raise exceptions.EndpointNotFound(service)
+
+        if service == 'network':
+            # Keystone does not return the correct endpoint for
+            # quantum. Handle this separately.
+            mgmt_url = (mgmt_url + self.config.network.api_version +
+                        "/tenants/" + auth.tenant_id)
+
+        return mgmt_url
+
     def post(self, url, body, headers):
         return self.request('POST', url, headers, body)
 
@@ -280,6 +331,8 @@ class RestClient(object):
         retry = 0
         if (self.token is None) or (self.base_url is None):
             self._set_auth()
+        elif self.strategy == 'keystone':
+            self._refresh_token()
 
         if headers is None:
             headers = {}
@@ -302,6 +355,31 @@ class RestClient(object):
                             resp, resp_body)
         return resp, resp_body
 
+    def submit(self, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) on this client's worker threads and
+        returns a Future for its result. func is usually one of the
+        client's own API calls, e.g. client.submit(client.get_server, id).
+        Result.result() raises the same exceptions the call would.
+        """
+        if self._workers is None:
+            self._workers = workers.WorkerPool(self.max_concurrent_requests,
+                                               name=self.__class__.__name__)
+        return self._workers.submit(func, *args, **kwargs)
+
+    def map_requests(self, func, *iterables, **kwargs):
+        """
+        Calls func once for each set of arguments taken from iterables,
+        as the builtin map() does, but issues at most `concurrency` of the
+        calls at the same time. Returns the results in argument order.
+
+        Every call is allowed to complete; the first exception in argument
+        order is then re-raised.
+        """
+        concurrency = kwargs.get('concurrency', self.max_concurrent_requests)
+        futures = workers.run_concurrently(func, zip(*iterables), concurrency)
+        return [f.result() for f in futures]
+
     def _error_checker(self, method, url,
                        headers, body, resp, resp_body):
 
@@ -404,12 +482,17 @@ class RestClient(object):
     def wait_for_resource_deletion(self, id):
         """Waits for a resource to be deleted."""
         start_time = int(time.time())
+        transition = '%s deletion' % self.__class__.__name__
+        intervals = self.polling_policy.intervals(transition,
+                                                  self.build_interval)
         while True:
             if self.is_resource_deleted(id):
+                self.polling_policy.record(transition,
+                                           time.time() - start_time)
                 return
             if int(time.time()) - start_time >= self.build_timeout:
                 raise exceptions.TimeoutException
-            time.sleep(self.build_interval)
+            time.sleep(next(intervals))
 
     def is_resource_deleted(self, id):
         """
@@ -0,0 +1,222 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A warm pool of ACTIVE servers leased to test classes.
+
+Many test classes only need some ACTIVE server of the configured image and
+flavor. Instead of booting one in setUpClass and waiting for it, they can
+lease one from a pool which boots its servers in the background. Servers
+given back dirty, because a test changed them, are deleted and replaced
+in the background as well.
+
+The servers of a pool are named after POOL_SERVER_PREFIX, so that the
+purge of the pooled isolated tenants between test classes (see
+tempest.common.isolated_creds) leaves them alone.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from tempest.common.utils.data_utils import rand_name
+from tempest.common import workers
+
+LOG = logging.getLogger(__name__)
+
+POOL_SERVER_PREFIX = 'pool-server'
+
+
+class ServerPool(object):
+    """Keeps up to `size` servers of one image and flavor for a tenant."""
+
+    def __init__(self, servers_client, image_ref, flavor_ref, size,
+                 build_timeout):
+        self.client = servers_client
+        self.image_ref = image_ref
+        self.flavor_ref = flavor_ref
+        self.size = size
+        self.build_timeout = build_timeout
+        self._ready = []
+        self._leased = {}
+        self._pending = 0
+        self._discarding = 0
+        self._closed = False
+        # Ids of every server of the pool, from their creation on
+        self._owned = set()
+        self._cond = threading.Condition()
+        self._workers = workers.WorkerPool(size, name='server-pool')
+
+    def _replenish(self):
+        """Boots servers until the pool is full. Caller holds _cond."""
+        missing = self.size - (len(self._ready) + len(self._leased) +
+                               self._pending + self._discarding)
+        for _ in range(max(missing, 0)):
+            self._pending += 1
+            self._workers.submit(self._boot)
+
+    def _boot(self):
+        server = None
+        try:
+            resp, server = self.client.create_server(
+                rand_name(POOL_SERVER_PREFIX), self.image_ref,
+                self.flavor_ref)
+            with self._cond:
+                self._owned.add(server['id'])
+            self.client.wait_for_server_status(server['id'], 'ACTIVE')
+            resp, server = self.client.get_server(server['id'])
+        except Exception:
+            LOG.exception('Unable to boot a pooled server')
+            if server is not None:
+                self._delete(server)
+            server = None
+        with self._cond:
+            self._pending -= 1
+            if server is not None:
+                self._ready.append(server)
+            self._cond.notify_all()
+
+    def _delete(self, server):
+        try:
+            self.client.delete_server(server['id'])
+            self.client.wait_for_server_termination(server['id'])
+        except Exception:
+            LOG.exception('Unable to delete pooled server %s', server['id'])
+        with self._cond:
+            self._owned.discard(server['id'])
+
+    def server_ids(self):
+        """Returns the ids of the servers booted, ready or leased."""
+        with self._cond:
+            return set(self._owned)
+
+    def _discard(self, server):
+        self._delete(server)
+        with self._cond:
+            self._discarding -= 1
+            if not self._closed:
+                self._replenish()
+            self._cond.notify_all()
+
+    def _is_active(self, server):
+        try:
+            resp, body = self.client.get_server(server['id'])
+        except Exception:
+            return False
+        return body['status'] == 'ACTIVE'
+
+    def lease(self):
+        """Returns an ACTIVE server of the pool.
+
+        Waits for a server being booted if none is ready.
+
+        :returns: the server, or None when every server is leased or the
+                  pool failed to boot one within build_timeout
+        """
+        deadline = time.time() + self.build_timeout
+        while True:
+            with self._cond:
+                while True:
+                    self._replenish()
+                    if self._ready:
+                        server = self._ready.pop(0)
+                        # Counted as leased while it is checked, outside
+                        # the lock as the check is an API call
+                        self._leased[server['id']] = server
+                        break
+                    if self._pending == 0 and self._discarding == 0:
+                        return None
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            if self._is_active(server):
+                return server
+            LOG.warning('Pooled server %s is no longer ACTIVE', server['id'])
+            with self._cond:
+                self._leased.pop(server['id'], None)
+                self._discarding += 1
+                self._workers.submit(self._discard, server)
+
+    def release(self, server, dirty=False):
+        """Gives a leased server back to the pool.
+
+        :param dirty: True if the server was changed and must be replaced
+        """
+        with self._cond:
+            self._leased.pop(server['id'], None)
+            if dirty:
+                self._discarding += 1
+                self._workers.submit(self._discard, server)
+            else:
+                self._ready.append(server)
+            self._cond.notify_all()
+
+    def close(self):
+        """Deletes every server of the pool."""
+        with self._cond:
+            self._closed = True
+            deadline = time.time() + self.build_timeout
+            while self._pending and time.time() < deadline:
+                self._cond.wait(deadline - time.time())
+            servers = self._ready + self._leased.values()
+            self._ready = []
+            self._leased = {}
+        if servers:
+            LOG.info('Deleting %d pooled servers', len(servers))
+            self._workers.map(self._delete, servers)
+        self._workers.shutdown(wait=False)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pooled_server_ids(tenant_name):
+    """Returns the ids of the servers of the pools of a tenant."""
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items()
+                 if key[1] == tenant_name]
+    ids = set()
+    for pool in pools:
+        ids |= pool.server_ids()
+    return ids
+
+
+def get_pool(config, servers_client, image_ref, flavor_ref):
+    """Returns the ServerPool of a tenant, image and flavor.
+
+    Returns None if server_pool_size is 0. Tenants created for a single
+    test class would be deleted under their pooled servers, so with
+    allow_tenant_isolation the pool also requires isolated_creds_pool_size.
+    """
+    compute = config.compute
+    if compute.server_pool_size <= 0:
+        return None
+    if (compute.allow_tenant_isolation and
+            compute.isolated_creds_pool_size <= 0):
+        return None
+    key = (servers_client.user, servers_client.tenant_name,
+           image_ref, flavor_ref)
+    with _pools_lock:
+        if key not in _pools:
+            pool = ServerPool(servers_client, image_ref, flavor_ref,
+                              compute.server_pool_size,
+                              compute.build_timeout)
+            atexit.register(pool.close)
+            _pools[key] = pool
+        return _pools[key]
@@ -0,0 +1,141 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Process-wide cache of Keystone tokens and service catalogs.
+
+Every RestClient built for the same credentials used to POST to /tokens on
+its own. The cache below lets all of them share a single token and the
+serviceCatalog that came with it, re-issuing the token shortly before it
+expires. Concurrent callers asking for the same credentials wait for a
+single in-flight request instead of issuing their own.
+"""
+
+import calendar
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+# Re-issue tokens this many seconds before Keystone says they expire
+REFRESH_MARGIN = 60
+
+# Keystone v2.0 token expiry timestamp formats
+EXPIRES_FORMATS = ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S.%fZ',
+                   '%Y-%m-%dT%H:%M:%S')
+
+
+def parse_expires(expires):
+    """Returns the epoch time of a Keystone 'expires' string or None."""
+    if not expires:
+        return None
+    # Strip any explicit UTC offset, Keystone always reports UTC
+    for suffix in ('+00:00', '-00:00'):
+        if expires.endswith(suffix):
+            expires = expires[:-len(suffix)]
+    for fmt in EXPIRES_FORMATS:
+        try:
+            return calendar.timegm(time.strptime(expires, fmt))
+        except ValueError:
+            continue
+    LOG.warning("Unable to parse token expiry %s, token will not be "
+                "refreshed before it is rejected", expires)
+    return None
+
+
+class CachedAuth(object):
+    """The token and catalog returned by a single Keystone authentication."""
+
+    def __init__(self, auth_data):
+        self.auth_data = auth_data
+        self.token = auth_data['token']['id']
+        self.expires = parse_expires(auth_data['token'].get('expires'))
+        self.tenant_id = auth_data['token'].get('tenant', {}).get('id')
+        self.catalog = auth_data.get('serviceCatalog', [])
+
+    def is_expiring(self, margin=REFRESH_MARGIN):
+        if self.expires is None:
+            return False
+        return time.time() + margin >= self.expires
+
+
+class TokenCache(object):
+    """Shares Keystone authentication results between clients.
+
+    Entries are keyed by the (auth_url, user, password, tenant_name) tuple
+    the token was issued for. Lookups for a key whose token is about to
+    expire call the supplied issue function again; only one thread per key
+    does so while the others wait for its result.
+    """
+
+    def __init__(self, refresh_margin=REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _get_key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _get_valid(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry.is_expiring(self.refresh_margin):
+            return None
+        return entry
+
+    def get(self, key, issue):
+        """Returns the CachedAuth for key, authenticating if necessary.
+
+        :param key: credentials tuple identifying the token
+        :param issue: callable returning the Keystone 'access' dict
+        :returns: CachedAuth
+        """
+        entry = self._get_valid(key)
+        if entry is not None:
+            return entry
+        with self._get_key_lock(key):
+            # Another thread may have refreshed it while we were waiting
+            entry = self._get_valid(key)
+            if entry is None:
+                LOG.debug("Issuing new token for %s@%s", key[1], key[0])
+                entry = CachedAuth(issue())
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self, key, token=None):
+        """Drops the entry for key.
+
+        If token is given, the entry is only dropped when it still holds
+        that token, so a client reporting a stale token does not throw away
+        a replacement another client already fetched.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (token is None or entry.token == token):
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# The cache shared by every RestClient in the process
+TOKEN_CACHE = TokenCache()
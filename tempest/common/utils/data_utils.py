@@ -16,6 +16,7 @@
 #    under the License.
 
 import itertools
+import os
 import random
 import re
 import urllib
@@ -23,7 +24,13 @@ import urllib
 from tempest import exceptions
 
 
+# Set by tempest.parallel in each of its worker processes
+WORKER_ID = os.environ.get('TEMPEST_WORKER_ID')
+
+
 def rand_name(name='test'):
+    if WORKER_ID is not None:
+        name = '%sw%s-' % (name, WORKER_ID)
     return name + str(random.randint(1, 999999))
 
 
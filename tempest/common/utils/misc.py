@@ -15,6 +15,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import sys
+
 
 def singleton(cls):
     """Simple wrapper for classes that should only have a single instance."""
@@ -25,3 +27,10 @@ def singleton(cls):
             instances[cls] = cls()
         return instances[cls]
     return getinstance
+
+
+def import_class(path):
+    """Imports and returns a class given as 'package.module.Class'."""
+    module_name, _sep, class_name = path.rpartition('.')
+    __import__(module_name)
+    return getattr(sys.modules[module_name], class_name)
@@ -0,0 +1,149 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import time
+
+from tempest.common import polling
+from tempest import exceptions
+
+LOG = logging.getLogger(__name__)
+
+
+def wait_for_statuses(list_resources, targets, build_interval, build_timeout,
+                      error_status, error_exception, resource_type='Resource'):
+    """Waits for many resources to reach their target statuses.
+
+    Instead of polling each resource on its own, every interval resolves
+    all of the pending resources from a single detailed listing.
+
+    :param list_resources: callable returning a list of resource dicts
+                           having at least 'id' and 'status' keys
+    :param targets: dict, or iterable of (resource_id, status) pairs
+    :param build_interval: seconds to sleep between listings with the
+                           fixed polling policy
+    :param build_timeout: seconds after which pending resources time out
+    :param error_status: status value meaning the resource failed
+    :param error_exception: callable taking a resource id and returning
+                            the exception to raise for it
+    :param resource_type: name of the resource used in messages
+    :returns: dict mapping each resource id to its last listed document
+    :raises: error_exception(resource_id), TimeoutException
+    """
+    pending = dict(targets)
+    found = {}
+    start = time.time()
+    policy = polling.get_policy()
+    transition = None
+    intervals = None
+
+    while True:
+        listed = dict((r['id'], r) for r in list_resources())
+        if intervals is None:
+            # Only a uniform batch is a transition worth learning
+            initial = set(listed[r]['status'] for r in pending if r in listed)
+            wanted = set(pending.values())
+            if len(initial) == 1 and len(wanted) == 1:
+                transition = '%s %s->%s' % (resource_type.lower(),
+                                            initial.pop(), wanted.pop())
+            intervals = policy.intervals(transition, build_interval)
+        failed = []
+        for resource_id, status in pending.items():
+            resource = listed.get(resource_id)
+            if resource is None:
+                continue
+            found[resource_id] = resource
+            if resource['status'] == status:
+                del pending[resource_id]
+            elif resource['status'] == error_status:
+                failed.append(resource_id)
+
+        if failed:
+            for resource_id in failed[1:]:
+                LOG.error('%s %s is in %s status', resource_type,
+                          resource_id, error_status)
+            raise error_exception(failed[0])
+
+        if not pending:
+            policy.record(transition, time.time() - start)
+            return found
+
+        if time.time() - start >= build_timeout:
+            details = []
+            for resource_id, status in sorted(pending.items()):
+                current = found.get(resource_id, {}).get('status', 'missing')
+                details.append('%s %s failed to reach %s status, current '
+                               'status: %s' % (resource_type, resource_id,
+                                               status, current))
+            message = ('%d %s(s) did not reach their status within the '
+                       'required time (%s s).\n%s' %
+                       (len(pending), resource_type, build_timeout,
+                        '\n'.join(details)))
+            raise exceptions.TimeoutException(message)
+
+        time.sleep(next(intervals))
+
+
+def wait_for_deletions(list_resources, resource_ids, build_interval,
+                       build_timeout, error_status=None,
+                       resource_type='Resource'):
+    """Waits for many resources to disappear from a detailed listing.
+
+    :param list_resources: callable returning a list of resource dicts
+                           having at least 'id' and 'status' keys
+    :param resource_ids: ids of the resources being deleted
+    :param build_interval: seconds to sleep between listings with the
+                           fixed polling policy
+    :param build_timeout: seconds after which pending resources time out
+    :param error_status: if given, resources reaching this status are no
+                         longer waited for
+    :param resource_type: name of the resource used in messages
+    :returns: list of the ids of the resources left in error_status
+    :raises: TimeoutException
+    """
+    pending = set(resource_ids)
+    failed = []
+    start = time.time()
+    policy = polling.get_policy()
+    transition = '%s deletion' % resource_type.lower()
+    intervals = policy.intervals(transition, build_interval)
+
+    while True:
+        listed = dict((r['id'], r) for r in list_resources())
+        for resource_id in list(pending):
+            resource = listed.get(resource_id)
+            if resource is None or resource['status'] == 'DELETED':
+                pending.remove(resource_id)
+            elif resource['status'] == error_status:
+                LOG.error('%s %s is in %s status', resource_type,
+                          resource_id, error_status)
+                pending.remove(resource_id)
+                failed.append(resource_id)
+
+        if not pending:
+            if not failed:
+                policy.record(transition, time.time() - start)
+            return failed
+
+        if time.time() - start >= build_timeout:
+            message = ('%d %s(s) were not deleted within the required time '
+                       '(%s s): %s' % (len(pending), resource_type,
+                                       build_timeout,
+                                       ', '.join(sorted(pending))))
+            raise exceptions.TimeoutException(message)
+
+        time.sleep(next(intervals))
@@ -0,0 +1,169 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A minimal bounded thread pool for running independent API calls.
+
+Nearly all of the time spent in an API call is waiting for the server, so
+a handful of threads is enough to overlap many of them.
+"""
+
+import logging
+import Queue
+import sys
+import threading
+
+LOG = logging.getLogger(__name__)
+
+
+class Future(object):
+    """The pending result of a call submitted to a WorkerPool."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+
+    def set_result(self, result):
+        self._result = result
+        self._done.set()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Returns True if the call completed within timeout seconds."""
+        self._done.wait(timeout)
+        return self._done.is_set()
+
+    def exception(self, timeout=None):
+        """Returns the exception raised by the call, or None."""
+        if not self.wait(timeout):
+            raise RuntimeError("Call did not complete in %s seconds" % timeout)
+        if self._exc_info:
+            return self._exc_info[1]
+        return None
+
+    def result(self, timeout=None):
+        """Returns the value of the call, re-raising what it raised."""
+        if not self.wait(timeout):
+            raise RuntimeError("Call did not complete in %s seconds" % timeout)
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+
+class WorkerPool(object):
+    """Runs submitted callables on at most `size` daemon threads.
+
+    Threads are started on demand and live until shutdown() is called.
+    """
+
+    def __init__(self, size, name='worker'):
+        if size < 1:
+            raise ValueError("WorkerPool size must be at least 1")
+        self.size = size
+        self.name = name
+        self._queue = Queue.Queue()
+        self._threads = []
+        # Threads waiting for a call, and calls no thread took yet
+        self._idle = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            with self._lock:
+                self._idle -= 1
+                self._pending -= 1
+            future, func, args, kwargs = item
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+            with self._lock:
+                self._idle += 1
+
+    def _start_thread(self):
+        thread = threading.Thread(target=self._run,
+                                  name='%s-%d' % (self.name,
+                                                  len(self._threads)))
+        thread.daemon = True
+        self._idle += 1
+        thread.start()
+        self._threads.append(thread)
+
+    def submit(self, func, *args, **kwargs):
+        """Schedules func(*args, **kwargs) and returns its Future."""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("WorkerPool %s is shut down" % self.name)
+            if (self._pending >= self._idle and
+                    len(self._threads) < self.size):
+                self._start_thread()
+            self._pending += 1
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def map(self, func, *iterables):
+        """Like the builtin map(), but with the calls made concurrently.
+
+        Every call runs to completion; afterwards the first exception in
+        argument order is re-raised, otherwise the results are returned
+        in argument order.
+        """
+        futures = [self.submit(func, *args) for args in zip(*iterables)]
+        return [f.result() for f in wait_all(futures)]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+def wait_all(futures):
+    """Waits for every future to complete and returns them."""
+    for future in futures:
+        future.wait()
+    return futures
+
+
+def run_concurrently(func, args_list, size):
+    """Calls func(*args) for each tuple in args_list on a temporary pool.
+
+    Returns the list of futures, all of them done.
+    """
+    if not args_list:
+        return []
+    pool = WorkerPool(min(size, len(args_list)))
+    try:
+        return wait_all([pool.submit(func, *args) for args in args_list])
+    finally:
+        pool.shutdown(wait=False)
@@ -15,6 +15,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ConfigParser
+import json
 import logging
 import os
 import sys
@@ -106,6 +108,25 @@ ComputeGroup = [
                      "instead of failing because of the conflict. Note that "
                      "this would result in the tenant being deleted at the "
                      "end of a subsequent successful run."),
+    cfg.IntOpt('isolated_creds_pool_size',
+               default=0,
+               help="If allow_tenant_isolation is True, number of isolated "
+                    "primary/alt credential pairs created once per run and "
+                    "leased to test classes instead of creating a tenant "
+                    "per class. 0 disables the pool."),
+    cfg.StrOpt('isolated_creds_lease_file',
+               default=None,
+               help="File recording the pooled credentials and their "
+                    "leases, shared by all test processes of a run. "
+                    "Defaults to tempest-isolated-creds.json in the "
+                    "temporary directory."),
+    cfg.IntOpt('server_pool_size',
+               default=0,
+               help="Number of ACTIVE servers of image_ref and flavor_ref "
+                    "kept ready for the test classes which only need some "
+                    "server, per tenant. The pooled servers are visible in "
+                    "the tenant. With allow_tenant_isolation it requires "
+                    "isolated_creds_pool_size. 0 disables the pool."),
     cfg.StrOpt('image_ref',
                default="{$IMAGE_ID}",
                help="Valid secondary image reference to be used in tests."),
@@ -142,6 +163,26 @@ ComputeGroup = [
     cfg.IntOpt('build_timeout',
                default=300,
                help="Timeout in seconds to wait for an instance to build."),
+    cfg.StrOpt('polling_policy',
+               default='fixed',
+               help="How status waiters space their checks: 'fixed' sleeps "
+                    "build_interval between checks, 'backoff' checks "
+                    "quickly first and then backs off exponentially, "
+                    "learning how long each transition takes."),
+    cfg.FloatOpt('polling_first_interval',
+                 default=1.0,
+                 help="Seconds before the first check of the 'backoff' "
+                      "polling policy."),
+    cfg.FloatOpt('polling_backoff_factor',
+                 default=1.5,
+                 help="Growth factor of the 'backoff' polling interval."),
+    cfg.FloatOpt('polling_max_interval',
+                 default=30.0,
+                 help="Longest interval of the 'backoff' polling policy."),
+    cfg.FloatOpt('polling_jitter',
+                 default=0.1,
+                 help="Fraction of each 'backoff' interval added or removed "
+                      "at random."),
     cfg.BoolOpt('run_ssh',
                 default=False,
                 help="Does the test environment support snapshots?"),
@@ -411,9 +452,107 @@ def register_stress_opts(conf):
         conf.register_opt(opt, group='stress')
 
 
+# TempestConfig attribute, option group and options of every group
+CONFIG_GROUPS = (
+    ('compute', 'compute', ComputeGroup),
+    ('whitebox', 'whitebox', WhiteboxGroup),
+    ('identity', 'identity', IdentityGroup),
+    ('images', 'image', ImageGroup),
+    ('network', 'network', NetworkGroup),
+    ('volume', 'volume', VolumeGroup),
+    ('object_storage', 'object-storage', ObjectStoreConfig),
+    ('boto', 'boto', BotoConfig),
+    ('compute_admin', 'compute-admin', ComputeAdminGroup),
+    ('stress', 'stress', StressGroup),
+)
+
+
+class ConfigGroupSnapshot(object):
+    """The option values of a group, restored from a config snapshot."""
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+
+def _config_file_key(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'mtime': stat.st_mtime,
+            'size': stat.st_size}
+
+
+def load_config_snapshot(snapshot_path, config_path):
+    """
+    Returns the option values of each group saved in the snapshot, or None
+    if there is no snapshot of the current version of the config file.
+    """
+    try:
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if snapshot.get('key') != _config_file_key(config_path):
+        LOG.info("Config snapshot %s is stale" % snapshot_path)
+        return None
+    return snapshot['groups']
+
+
+def _uncovered_sections(config_path):
+    """
+    Returns the sections of the config file whose options are registered
+    outside of this module, such as the cli ones, and so are missing from
+    a snapshot.
+    """
+    parser = ConfigParser.RawConfigParser()
+    try:
+        parser.read(config_path)
+    except ConfigParser.Error as exc:
+        return ['unparsable (%s)' % exc]
+    covered = set(group for attr, group, opts in CONFIG_GROUPS)
+    sections = [section for section in parser.sections()
+                if section not in covered]
+    if parser.defaults():
+        sections.append('DEFAULT')
+    return sections
+
+
+def save_config_snapshot(snapshot_path, config_path, groups):
+    """Saves the option values of each group, keyed by the config file.
+
+    No snapshot is saved if the config file sets options of other groups,
+    which processes loading it would silently miss.
+    """
+    uncovered = _uncovered_sections(config_path)
+    if uncovered:
+        LOG.warning("Not saving config snapshot %s, as it would miss the "
+                    "%s section(s) of %s" %
+                    (snapshot_path, ', '.join(uncovered), config_path))
+        return
+    snapshot = {'key': _config_file_key(config_path), 'groups': groups}
+    # Write and rename so concurrent readers never see a partial file
+    tmp_path = '%s.%d' % (snapshot_path, os.getpid())
+    try:
+        # The snapshot holds passwords, only the owner may read it
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f)
+        os.rename(tmp_path, snapshot_path)
+    except (IOError, OSError, TypeError) as exc:
+        LOG.warning("Unable to save config snapshot %s: %s" %
+                    (snapshot_path, exc))
+
+
 @singleton
 class TempestConfig:
-    """Provides OpenStack configuration information."""
+    """Provides OpenStack configuration information.
+
+    If the TEMPEST_CONFIG_SNAPSHOT environment variable names a file, the
+    resolved option values are saved there, and later processes restore
+    them from it instead of parsing the config file again, as long as the
+    config file is unchanged. No snapshot is saved when the config file
+    sets options registered outside of this module, such as the cli ones,
+    as they would be left unparsed.
+    """
 
     DEFAULT_CONFIG_DIR = os.path.join(
         os.path.abspath(os.path.dirname(os.path.dirname(__file__))),
@@ -443,6 +582,15 @@ class TempestConfig:
             print >> sys.stderr, RuntimeError(msg)
             sys.exit(os.EX_NOINPUT)
 
+        snapshot_path = os.environ.get('TEMPEST_CONFIG_SNAPSHOT')
+        groups = None
+        if snapshot_path:
+            groups = load_config_snapshot(snapshot_path, path)
+        if groups is not None:
+            for attr, group, opts in CONFIG_GROUPS:
+                setattr(self, attr, ConfigGroupSnapshot(groups[attr]))
+            return
+
         cfg.CONF([], project='tempest', default_config_files=[path])
 
         register_compute_opts(cfg.CONF)
@@ -469,3 +617,11 @@ class TempestConfig:
             self.compute_admin.username = self.identity.admin_username
             self.compute_admin.password = self.identity.admin_password
             self.compute_admin.tenant_name = self.identity.admin_tenant_name
+
+        if snapshot_path:
+            groups = {}
+            for attr, group, opts in CONFIG_GROUPS:
+                values = getattr(self, attr)
+                groups[attr] = dict((opt.dest, getattr(values, opt.dest))
+                                    for opt in opts)
+            save_config_snapshot(snapshot_path, path, groups)
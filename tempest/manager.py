@@ -17,15 +17,6 @@
 
 import logging
 
-# Default client libs
-import glanceclient
-import keystoneclient.v2_0.client
-import novaclient.client
-try:
-    import quantumclient.v2_0.client
-except ImportError:
-    pass
-
 import tempest.config
 from tempest import exceptions
 # Tempest REST Fuzz testing client libs
@@ -91,16 +82,18 @@ class DefaultClientManager(Manager):
     """
     Manager that provides the default clients to access the various
     OpenStack APIs.
+
+    The client libraries are only imported, and the clients built and
+    authenticated, when a client is first used. Clients are cached by
+    credentials, so asking twice for a client of a user returns the same
+    client.
     """
 
     NOVACLIENT_VERSION = '2'
 
     def __init__(self):
         super(DefaultClientManager, self).__init__()
-        self.compute_client = self._get_compute_client()
-        self.image_client = self._get_image_client()
-        self.identity_client = self._get_identity_client()
-        self.network_client = self._get_network_client()
+        self._clients = {}
         self.client_attr_names = [
             'compute_client',
             'image_client',
@@ -108,6 +101,29 @@ class DefaultClientManager(Manager):
             'network_client',
         ]
 
+    @property
+    def compute_client(self):
+        return self._get_compute_client()
+
+    @property
+    def image_client(self):
+        return self._get_image_client()
+
+    @property
+    def identity_client(self):
+        return self._get_identity_client()
+
+    @property
+    def network_client(self):
+        return self._get_network_client()
+
+    def _cached(self, key, build, *args):
+        """Returns the client cached under key, building it on first use."""
+        if key not in self._clients:
+            LOG.debug("Building %s client", key[0])
+            self._clients[key] = build(*args)
+        return self._clients[key]
+
     def _get_compute_client(self, username=None, password=None,
                             tenant_name=None):
         # Novaclient will not execute operations for anyone but the
@@ -126,6 +142,13 @@ class DefaultClientManager(Manager):
                    "tenant_name: %(tenant_name)s") % locals()
             raise exceptions.InvalidConfiguration(msg)
 
+        return self._cached(('compute', username, password, tenant_name),
+                            self._build_compute_client,
+                            username, password, tenant_name)
+
+    def _build_compute_client(self, username, password, tenant_name):
+        import novaclient.client
+
         auth_url = self.config.identity.uri
         dscv = self.config.identity.disable_ssl_certificate_validation
 
@@ -140,6 +163,11 @@ class DefaultClientManager(Manager):
                                         insecure=dscv)
 
     def _get_image_client(self):
+        return self._cached(('image',), self._build_image_client)
+
+    def _build_image_client(self):
+        import glanceclient
+
         keystone = self._get_identity_client()
         token = keystone.auth_token
         endpoint = keystone.service_catalog.url_for(service_type='image',
@@ -165,6 +193,13 @@ class DefaultClientManager(Manager):
                    "tenant_name: %(tenant_name)s") % locals()
             raise exceptions.InvalidConfiguration(msg)
 
+        return self._cached(('identity', username, password, tenant_name),
+                            self._build_identity_client,
+                            username, password, tenant_name)
+
+    def _build_identity_client(self, username, password, tenant_name):
+        import keystoneclient.v2_0.client
+
         auth_url = self.config.identity.uri
         dscv = self.config.identity.disable_ssl_certificate_validation
 
@@ -191,6 +226,13 @@ class DefaultClientManager(Manager):
                    "tenant_name: %(tenant_name)s") % locals()
             raise exceptions.InvalidConfiguration(msg)
 
+        return self._cached(('network', username, password, tenant_name),
+                            self._build_network_client,
+                            username, password, tenant_name)
+
+    def _build_network_client(self, username, password, tenant_name):
+        import quantumclient.v2_0.client
+
         auth_url = self.config.identity.uri
         dscv = self.config.identity.disable_ssl_certificate_validation
 
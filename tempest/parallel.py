@@ -0,0 +1,359 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Runs the Tempest tests in several nosetests processes at once.
+
+The selected tests are collected first, then their classes are split
+between the worker processes. A class is never split, as setUpClass
+creates state shared by all of its tests. Every worker writes its own
+xunit file and log; the xunit files are merged into a single report.
+
+The durations of the classes and tests are recorded in a local database
+(see tempest.common.durations). The classes are then dealt longest first
+to the least loaded worker, using the mean of the recorded durations of
+a class, or DEFAULT_TEST_ESTIMATE seconds per test for a new class.
+
+Usage::
+
+    python -m tempest.parallel --workers 4 --attr=type=smoke tempest
+
+Any argument not understood by this runner is handed to nosetests. Nose
+options taking a value must be written as --option=value.
+
+Each worker exports TEMPEST_WORKER_ID, which makes rand_name() tag the
+names of the resources it creates. For the workers not to share a
+tenant, enable allow_tenant_isolation, ideally together with the
+isolated credentials pool (isolated_creds_pool_size). Without it, several
+workers are refused unless --shared-tenant is given, as the quota and
+listing tests of the workers would then race.
+"""
+
+import argparse
+import heapq
+import inspect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree
+
+import nose
+from nose.plugins import Plugin
+
+from tempest.common import durations
+from tempest import config
+
+BASEDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+POLL_INTERVAL = 1
+XUNIT_COUNTERS = ('tests', 'errors', 'failures', 'skip')
+# Seconds assumed per test for a class never run before
+DEFAULT_TEST_ESTIMATE = 10
+
+
+def split_nose_args(args):
+    """Splits nose arguments into options and test names."""
+    options = [arg for arg in args if arg.startswith('-')]
+    tests = [arg for arg in args if not arg.startswith('-')]
+    return options, tests or ['tempest']
+
+
+def _to_address(classname):
+    """Returns the nose address of an xunit classname."""
+    path = os.path.join(BASEDIR, *classname.split('.'))
+    if os.path.exists(path + '.py'):
+        # A test function defined at module level
+        return classname
+    module, _sep, cls = classname.rpartition('.')
+    return '%s:%s' % (module, cls)
+
+
+def collect_classes(options, tests, work_dir):
+    """Returns the nose addresses of the classes of the selected tests.
+
+    The addresses are returned in collection order, along with the number
+    of selected tests of every class.
+    """
+    xunit_file = os.path.join(work_dir, 'collect.xml')
+    with open(os.path.join(work_dir, 'collect.log'), 'w') as log:
+        subprocess.check_call(['nosetests', '--collect-only', '--with-xunit',
+                               '--xunit-file=%s' % xunit_file] +
+                              options + tests,
+                              stdout=log, stderr=subprocess.STDOUT,
+                              cwd=BASEDIR)
+    classes = []
+    counts = {}
+    for testcase in ElementTree.parse(xunit_file).getroot():
+        address = _to_address(testcase.get('classname'))
+        if address not in counts:
+            classes.append(address)
+            counts[address] = 0
+        counts[address] += 1
+    return classes, counts
+
+
+def partition(classes, workers, estimates):
+    """Deals the classes longest first to the least loaded worker.
+
+    :param estimates: dict mapping each class to its expected duration
+    :returns: list of the class lists of the workers
+    """
+    buckets = [[] for _ in range(workers)]
+    loads = [(0, index) for index in range(workers)]
+    for address in sorted(classes, key=lambda a: estimates[a],
+                          reverse=True):
+        load, index = heapq.heappop(loads)
+        buckets[index].append(address)
+        heapq.heappush(loads, (load + estimates[address], index))
+    return [bucket for bucket in buckets if bucket]
+
+
+def estimate_classes(classes, counts, store):
+    """Returns the expected duration of every class."""
+    history = store.get_estimates(durations.CLASS)
+    return dict((address,
+                 history.get(address,
+                             counts[address] * DEFAULT_TEST_ESTIMATE))
+                for address in classes)
+
+
+class ClassTimer(Plugin):
+    """Records how long every test class takes, fixtures included."""
+
+    name = 'class-timer'
+
+    def options(self, parser, env):
+        super(ClassTimer, self).options(parser, env)
+        parser.add_option('--class-timer-file', dest='class_timer_file',
+                          default='class-timer.json',
+                          help='File receiving the class durations')
+
+    def configure(self, options, conf):
+        super(ClassTimer, self).configure(options, conf)
+        self.timer_file = options.class_timer_file
+        self._starts = {}
+        self.durations = {}
+
+    def startContext(self, context):
+        if inspect.isclass(context) or inspect.ismodule(context):
+            self._starts[context] = time.time()
+
+    def stopContext(self, context):
+        start = self._starts.pop(context, None)
+        if start is None:
+            return
+        if inspect.isclass(context):
+            address = '%s:%s' % (context.__module__, context.__name__)
+        else:
+            address = context.__name__
+        self.durations[address] = time.time() - start
+
+    def finalize(self, result):
+        with open(self.timer_file, 'w') as f:
+            json.dump(self.durations, f)
+
+
+def run_nose_worker(argv):
+    """Runs nosetests with the ClassTimer plugin available."""
+    return nose.main(argv=['nosetests'] + argv, addplugins=[ClassTimer()])
+
+
+class Worker(object):
+    """A nosetests process running a share of the test classes."""
+
+    def __init__(self, worker_id, classes, options, work_dir):
+        self.worker_id = worker_id
+        self.classes = classes
+        self.xunit_file = os.path.join(work_dir, 'worker-%d.xml' % worker_id)
+        self.timer_file = os.path.join(work_dir,
+                                       'worker-%d-classes.json' % worker_id)
+        self.log_file = os.path.join(work_dir, 'worker-%d.log' % worker_id)
+        self.options = options
+        self.process = None
+        self.start_time = None
+        self.duration = None
+
+    def start(self):
+        env = dict(os.environ)
+        env['TEMPEST_WORKER_ID'] = str(self.worker_id)
+        self.start_time = time.time()
+        with open(self.log_file, 'w') as log:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'tempest.parallel', '--nose-worker',
+                 '--with-xunit', '--xunit-file=%s' % self.xunit_file,
+                 '--with-class-timer',
+                 '--class-timer-file=%s' % self.timer_file] +
+                self.options + self.classes,
+                stdout=log, stderr=subprocess.STDOUT, cwd=BASEDIR, env=env)
+
+    def poll(self):
+        """Returns the exit code of the worker, None while it runs."""
+        returncode = self.process.poll()
+        if returncode is not None and self.duration is None:
+            self.duration = time.time() - self.start_time
+        return returncode
+
+
+def _test_status(testcase):
+    for child in testcase:
+        if child.tag in ('failure', 'error', 'skipped'):
+            return child.tag
+    return 'success'
+
+
+def record_durations(store, workers):
+    """Records the class and test durations measured by the workers."""
+    run_id = store.start_run(len(workers))
+    for worker in workers:
+        if os.path.exists(worker.timer_file):
+            with open(worker.timer_file) as f:
+                classes = json.load(f)
+            store.record(run_id, durations.CLASS,
+                         [(address, duration, None)
+                          for address, duration in classes.items()
+                          if address in worker.classes])
+        if os.path.exists(worker.xunit_file):
+            suite = ElementTree.parse(worker.xunit_file).getroot()
+            store.record(run_id, durations.TEST,
+                         [('%s.%s' % (testcase.get('classname'),
+                                      testcase.get('name')),
+                           float(testcase.get('time', 0)),
+                           _test_status(testcase))
+                          for testcase in suite])
+
+
+def merge_xunit(paths, output):
+    """Merges the testsuites of several xunit files into one."""
+    merged = ElementTree.Element('testsuite', name='nosetests')
+    totals = dict((counter, 0) for counter in XUNIT_COUNTERS)
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        suite = ElementTree.parse(path).getroot()
+        for counter in XUNIT_COUNTERS:
+            totals[counter] += int(suite.get(counter, 0))
+        merged.extend(list(suite))
+    for counter, total in totals.items():
+        merged.set(counter, str(total))
+    ElementTree.ElementTree(merged).write(output, encoding='UTF-8')
+    return totals
+
+
+def run(workers):
+    """Starts the workers and waits for all of them to finish.
+
+    Returns True if every worker succeeded.
+    """
+    for worker in workers:
+        worker.start()
+        print "Worker %d: %d test classes, log in %s" % (
+            worker.worker_id, len(worker.classes), worker.log_file)
+
+    running = list(workers)
+    success = True
+    while running:
+        time.sleep(POLL_INTERVAL)
+        for worker in list(running):
+            returncode = worker.poll()
+            if returncode is None:
+                continue
+            running.remove(worker)
+            print "Worker %d %s in %.0f s" % (
+                worker.worker_id, 'passed' if returncode == 0 else 'FAILED',
+                worker.duration)
+            success = success and returncode == 0
+    return success
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Run the Tempest tests in parallel worker processes.')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of worker processes')
+    parser.add_argument('--xunit-file', default='nosetests.xml',
+                        help='Path of the merged xunit report')
+    parser.add_argument('--work-dir', default=None,
+                        help='Directory for the logs and reports of the '
+                             'workers, a temporary one by default')
+    parser.add_argument('--durations-db', default=durations.DEFAULT_DB,
+                        help='Database of the recorded test durations')
+    parser.add_argument('--config-snapshot', action='store_true',
+                        help='Parse the config file once and let the '
+                             'workers load its snapshot, see '
+                             'TEMPEST_CONFIG_SNAPSHOT')
+    parser.add_argument('--shared-tenant', action='store_true',
+                        help='Let several workers share the tenant of '
+                             'tempest.conf when allow_tenant_isolation is '
+                             'off')
+    return parser.parse_known_args(argv)
+
+
+def main(argv):
+    if argv[:1] == ['--nose-worker']:
+        return run_nose_worker(argv[1:])
+    args, nose_args = parse_args(argv)
+    options, tests = split_nose_args(nose_args)
+    work_dir = os.path.abspath(
+        args.work_dir or tempfile.mkdtemp(prefix='tempest-parallel-'))
+    if not os.path.isdir(work_dir):
+        os.makedirs(work_dir)
+    if args.config_snapshot:
+        # Written by the collection run, then loaded by the workers
+        os.environ.setdefault('TEMPEST_CONFIG_SNAPSHOT',
+                              os.path.join(work_dir, 'config-snapshot.json'))
+    if (args.workers > 1 and not args.shared_tenant and
+            not config.TempestConfig().compute.allow_tenant_isolation):
+        print ("The workers would share one tenant, enable "
+               "allow_tenant_isolation or pass --shared-tenant")
+        return 2
+
+    classes, counts = collect_classes(options, tests, work_dir)
+    if not classes:
+        print "No tests selected"
+        return 0
+    print "Running %d tests of %d classes in %d workers" % (
+        sum(counts.values()), len(classes), args.workers)
+
+    store = durations.DurationStore(args.durations_db)
+    estimates = estimate_classes(classes, counts, store)
+    workers = [Worker(worker_id, bucket, options, work_dir)
+               for worker_id, bucket in enumerate(
+                   partition(classes, args.workers, estimates))]
+    for worker in workers:
+        print "Worker %d is expected to take %.0f s" % (
+            worker.worker_id,
+            sum(estimates[address] for address in worker.classes))
+    start = time.time()
+    success = run(workers)
+
+    try:
+        record_durations(store, workers)
+    finally:
+        store.close()
+
+    totals = merge_xunit([worker.xunit_file for worker in workers],
+                         args.xunit_file)
+    print ("Ran %(tests)d tests: %(failures)d failures, %(errors)d errors, "
+           "%(skip)d skipped" % totals)
+    print "Total time %.0f s, report in %s" % (time.time() - start,
+                                               args.xunit_file)
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -20,6 +20,7 @@ import time
 import urllib
 
 from tempest.common.rest_client import RestClient
+from tempest.common import waiters
 from tempest import exceptions
 
 
@@ -109,6 +110,22 @@ class ImagesClientJSON(RestClient):
             if int(time.time()) - start >= self.build_timeout:
                 raise exceptions.TimeoutException
 
+    def wait_for_images_status(self, images_statuses):
+        """
+        Waits for several images to reach their given statuses, resolving
+        all of them from a single images/detail request per interval.
+        images_statuses: dict or list of (image_id, status) pairs.
+        """
+        def list_images():
+            resp, body = self.list_images_with_detail()
+            return body
+
+        return waiters.wait_for_statuses(
+            list_images, images_statuses, self.build_interval,
+            self.build_timeout, 'ERROR',
+            lambda image_id: exceptions.AddImageException(image_id=image_id),
+            resource_type='Image')
+
     def list_image_metadata(self, image_id):
         """Lists all metadata items for an image."""
         resp, body = self.get("images/%s/metadata" % str(image_id))
@@ -21,6 +21,7 @@ import urllib
 from lxml import etree
 
 from tempest.common.rest_client import RestClientXML
+from tempest.common import waiters
 from tempest import exceptions
 from tempest.services.compute.xml.common import Document
 from tempest.services.compute.xml.common import Element
@@ -166,6 +167,22 @@ class ImagesClientXML(RestClientXML):
             if int(time.time()) - start >= self.build_timeout:
                 raise exceptions.TimeoutException
 
+    def wait_for_images_status(self, images_statuses):
+        """
+        Waits for several images to reach their given statuses, resolving
+        all of them from a single images/detail request per interval.
+        images_statuses: dict or list of (image_id, status) pairs.
+        """
+        def list_images():
+            resp, body = self.list_images_with_detail()
+            return body
+
+        return waiters.wait_for_statuses(
+            list_images, images_statuses, self.build_interval,
+            self.build_timeout, 'ERROR',
+            lambda image_id: exceptions.AddImageException(image_id=image_id),
+            resource_type='Image')
+
     def _metadata_body(self, meta):
         post_body = Element('metadata')
         for k, v in meta.items():
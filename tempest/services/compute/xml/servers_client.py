@@ -22,7 +22,9 @@ import urllib
 
 from lxml import etree
 
+from tempest.common import change_feed
 from tempest.common.rest_client import RestClientXML
+from tempest.common import waiters
 from tempest import exceptions
 from tempest.services.compute.xml.common import Document
 from tempest.services.compute.xml.common import Element
@@ -108,6 +110,8 @@ class ServersClientXML(RestClientXML):
         super(ServersClientXML, self).__init__(config, username, password,
                                                auth_url, tenant_name)
         self.service = self.config.compute.catalog_type
+        # Incremental view of this tenant's servers, see poll_server_changes
+        self.changes_feed = change_feed.ChangeFeed(self._list_server_changes)
 
     def _parse_key_value(self, node):
         """Parse <foo key='key'>value</foo> data into {'key': 'value'}."""
@@ -158,6 +162,14 @@ class ServersClientXML(RestClientXML):
         """Deletes the given server."""
         return self.delete("servers/%s" % str(server_id))
 
+    def get_servers(self, server_ids):
+        """Returns the details of several servers, fetched concurrently."""
+        return self.map_requests(self.get_server, server_ids)
+
+    def delete_servers(self, server_ids):
+        """Deletes the given servers concurrently."""
+        return self.map_requests(self.delete_server, server_ids)
+
     def _parse_array(self, node):
         array = []
         for child in node.getchildren():
@@ -284,9 +296,12 @@ class ServersClientXML(RestClientXML):
         resp, body = self.get_server(server_id)
         server_status = body['status']
         start = int(time.time())
+        transition = 'server %s->%s' % (server_status, status)
+        intervals = self.polling_policy.intervals(transition,
+                                                  self.build_interval)
 
         while(server_status != status):
-            time.sleep(self.build_interval)
+            time.sleep(next(intervals))
             resp, body = self.get_server(server_id)
             server_status = body['status']
 
@@ -302,6 +317,59 @@ class ServersClientXML(RestClientXML):
                 message += ' Current status: %s.' % server_status
                 raise exceptions.TimeoutException(message)
 
+        self.polling_policy.record(transition, time.time() - start)
+
+    def _list_server_changes(self, params):
+        resp, body = self.list_servers_with_detail(params)
+        return body['servers']
+
+    def poll_server_changes(self):
+        """
+        Updates self.changes_feed with the servers changed since its last
+        poll, using the changes-since filter. Returns the changed servers.
+        Callables registered with self.changes_feed.subscribe() are called
+        for each of them.
+        """
+        return self.changes_feed.poll()
+
+    def wait_for_servers_status(self, servers_statuses):
+        """
+        Waits for several servers to reach their given statuses, resolving
+        all of them from a single incremental servers/detail request per
+        interval.
+        servers_statuses: dict or list of (server_id, status) pairs.
+        Returns a dict of the last listed details of each server.
+        """
+        def list_servers():
+            self.changes_feed.poll()
+            return self.changes_feed.resources.values()
+
+        return waiters.wait_for_statuses(
+            list_servers, servers_statuses, self.build_interval,
+            self.build_timeout, 'ERROR',
+            lambda server_id: exceptions.BuildErrorException(
+                server_id=server_id),
+            resource_type='Server')
+
+    def wait_for_servers_termination(self, server_ids, ignore_error=False):
+        """
+        Waits for several servers to be deleted, checking all of them with
+        a single servers/detail request per interval.
+        Unless ignore_error is set, servers going to ERROR are no longer
+        waited for, and BuildErrorException is raised for the first one
+        once the others are gone.
+        """
+        def list_servers():
+            resp, body = self.list_servers_with_detail()
+            return body['servers']
+
+        failed = waiters.wait_for_deletions(
+            list_servers, server_ids, self.build_interval,
+            self.build_timeout, None if ignore_error else 'ERROR',
+            resource_type='Server')
+        if failed:
+            raise exceptions.BuildErrorException(server_id=failed[0])
+
     def wait_for_server_termination(self, server_id, ignore_error=False):
         """Waits for server to reach termination."""
         start_time = int(time.time())
@@ -176,6 +176,10 @@ class ImageClientJSON(RestClient):
         url = 'v1/images/%s' % image_id
         self.delete(url)
 
+    def delete_images(self, image_ids):
+        """Deletes the given images concurrently."""
+        self.map_requests(self.delete_image, image_ids)
+
     def image_list(self, **kwargs):
         url = 'v1/images'
 
@@ -15,7 +15,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import httplib2
 import json
 import urllib
 
@@ -105,7 +104,6 @@ class AccountClientCustomizedHeader(RestClient):
 
     def request(self, method, url, headers=None, body=None):
         """A simple HTTP request interface."""
-        self.http_obj = httplib2.Http()
         if headers is None:
             headers = {}
         if self.base_url is None:
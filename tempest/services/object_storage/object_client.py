@@ -17,7 +17,6 @@
 
 from hashlib import sha1
 import hmac
-import httplib2
 from urlparse import urlparse
 
 from tempest.common.rest_client import RestClient
@@ -158,8 +157,6 @@ class ObjectClientCustomizedHeader(RestClient):
 
     def request(self, method, url, headers=None, body=None):
         """A simple HTTP request interface."""
-        dscv = self.config.identity.disable_ssl_certificate_validation
-        self.http_obj = httplib2.Http(disable_ssl_certificate_validation=dscv)
         if headers is None:
             headers = {}
         if self.base_url is None:
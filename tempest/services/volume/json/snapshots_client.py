@@ -18,6 +18,7 @@ import time
 import urllib
 
 from tempest.common.rest_client import RestClient
+from tempest.common import waiters
 from tempest import exceptions
 
 LOG = logging.getLogger(__name__)
@@ -113,6 +114,23 @@ class SnapshotsClientJSON(RestClient):
             old_value = value
             value = self._get_snapshot_status(snapshot_id)
 
+    def wait_for_snapshots_status(self, snapshots_statuses):
+        """
+        Waits for several snapshots to reach their given statuses, resolving
+        all of them from a single snapshots/detail request per interval.
+        snapshots_statuses: dict or list of (snapshot_id, status) pairs.
+        """
+        def list_snapshots():
+            resp, body = self.list_snapshot_with_detail()
+            return body
+
+        return waiters.wait_for_statuses(
+            list_snapshots, snapshots_statuses, self.build_interval,
+            self.build_timeout, 'error',
+            lambda snapshot_id: exceptions.SnapshotBuildErrorException(
+                snapshot_id=snapshot_id),
+            resource_type='Snapshot')
+
     def delete_snapshot(self, snapshot_id):
         """Delete Snapshot."""
         return self.delete("snapshots/%s" % str(snapshot_id))
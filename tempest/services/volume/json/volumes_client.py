@@ -20,6 +20,7 @@ import time
 import urllib
 
 from tempest.common.rest_client import RestClient
+from tempest.common import waiters
 from tempest import exceptions
 
 
@@ -84,6 +85,10 @@ class VolumesClientJSON(RestClient):
         """Deletes the Specified Volume."""
         return self.delete("volumes/%s" % str(volume_id))
 
+    def delete_volumes(self, volume_ids):
+        """Deletes the specified volumes concurrently."""
+        return self.map_requests(self.delete_volume, volume_ids)
+
     def attach_volume(self, volume_id, instance_uuid, mountpoint):
         """Attaches a volume to a given instance on a given mountpoint."""
         post_body = {
@@ -123,6 +128,23 @@ class VolumesClientJSON(RestClient):
                            (volume_name, status, self.build_timeout))
                 raise exceptions.TimeoutException(message)
 
+    def wait_for_volumes_status(self, volumes_statuses):
+        """
+        Waits for several volumes to reach their given statuses, resolving
+        all of them from a single volumes/detail request per interval.
+        volumes_statuses: dict or list of (volume_id, status) pairs.
+        """
+        def list_volumes():
+            resp, body = self.list_volumes_with_detail()
+            return body
+
+        return waiters.wait_for_statuses(
+            list_volumes, volumes_statuses, self.build_interval,
+            self.build_timeout, 'error',
+            lambda volume_id: exceptions.VolumeBuildErrorException(
+                volume_id=volume_id),
+            resource_type='Volume')
+
     def is_resource_deleted(self, id):
         try:
             self.get_volume(id)
@@ -19,6 +19,7 @@ import urllib
 from lxml import etree
 
 from tempest.common.rest_client import RestClientXML
+from tempest.common import waiters
 from tempest import exceptions
 from tempest.services.compute.xml.common import Document
 from tempest.services.compute.xml.common import Element
@@ -60,7 +61,9 @@ class SnapshotsClientXML(RestClientXML):
         resp, body = self.get(url, self.headers)
         body = etree.fromstring(body)
         snapshots = []
-        return resp, snapshots(xml_to_json(body))
+        if body is not None:
+            snapshots += [xml_to_json(snapshot) for snapshot in list(body)]
+        return resp, snapshots
 
     def get_snapshot(self, snapshot_id):
         """Returns the details of a single snapshot."""
@@ -122,6 +125,23 @@ class SnapshotsClientXML(RestClientXML):
             old_value = value
             value = self._get_snapshot_status(snapshot_id)
 
+    def wait_for_snapshots_status(self, snapshots_statuses):
+        """
+        Waits for several snapshots to reach their given statuses, resolving
+        all of them from a single snapshots/detail request per interval.
+        snapshots_statuses: dict or list of (snapshot_id, status) pairs.
+        """
+        def list_snapshots():
+            resp, body = self.list_snapshots_with_detail()
+            return body
+
+        return waiters.wait_for_statuses(
+            list_snapshots, snapshots_statuses, self.build_interval,
+            self.build_timeout, 'error',
+            lambda snapshot_id: exceptions.SnapshotBuildErrorException(
+                snapshot_id=snapshot_id),
+            resource_type='Snapshot')
+
     def delete_snapshot(self, snapshot_id):
         """Delete Snapshot."""
         return self.delete("snapshots/%s" % str(snapshot_id))
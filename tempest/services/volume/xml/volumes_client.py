@@ -21,6 +21,7 @@ import urllib
 from lxml import etree
 
 from tempest.common.rest_client import RestClientXML
+from tempest.common import waiters
 from tempest import exceptions
 from tempest.services.compute.xml.common import Document
 from tempest.services.compute.xml.common import Element
@@ -129,6 +130,10 @@ class VolumesClientXML(RestClientXML):
         """Deletes the Specified Volume."""
         return self.delete("volumes/%s" % str(volume_id))
 
+    def delete_volumes(self, volume_ids):
+        """Deletes the specified volumes concurrently."""
+        return self.map_requests(self.delete_volume, volume_ids)
+
     def wait_for_volume_status(self, volume_id, status):
         """Waits for a Volume to reach a given status."""
         resp, body = self.get_volume(volume_id)
@@ -149,6 +154,23 @@ class VolumesClientXML(RestClientXML):
                                                          self.build_timeout)
                 raise exceptions.TimeoutException(message)
 
+    def wait_for_volumes_status(self, volumes_statuses):
+        """
+        Waits for several volumes to reach their given statuses, resolving
+        all of them from a single volumes/detail request per interval.
+        volumes_statuses: dict or list of (volume_id, status) pairs.
+        """
+        def list_volumes():
+            resp, body = self.list_volumes_with_detail()
+            return body
+
+        return waiters.wait_for_statuses(
+            list_volumes, volumes_statuses, self.build_interval,
+            self.build_timeout, 'error',
+            lambda volume_id: exceptions.VolumeBuildErrorException(
+                volume_id=volume_id),
+            resource_type='Volume')
+
     def is_resource_deleted(self, id):
         try:
             self.get_volume(id)
@@ -21,6 +21,71 @@ from tempest import test
 
 LOG = logging.getLogger(__name__)
 
+# Shared resources are deleted by layers, a layer once the resources of
+# the previous ones are gone, so that the deletions of a layer are waited
+# for together. The resources of other types are deleted last, one at a
+# time, in the reverse order they were added.
+DELETION_LAYERS = (
+    ('DeletableFloatingIp', 'FloatingIP'),
+    ('Server',),
+    ('DeletablePort',),
+    ('DeletableSubnet', 'Volume'),
+    ('DeletableRouter', 'DeletableNetwork', 'SecurityGroup', 'Keypair'),
+)
+
+
+def _get_deletion_layer(thing):
+    type_name = thing.__class__.__name__
+    for index, type_names in enumerate(DELETION_LAYERS):
+        if type_name in type_names:
+            return index
+    return None
+
+
+def _group_by_type(things):
+    groups = {}
+    for thing in things:
+        groups.setdefault(thing.__class__, []).append(thing)
+    return groups
+
+
+def _delete(thing):
+    # OpenStack resources are assumed to have a delete()
+    # method which destroys the resource...
+    thing.delete()
+
+
+def _list_ids(thing):
+    """
+    Returns the ids of the existing resources of the type of thing, or
+    None if they cannot be listed.
+    """
+    if isinstance(thing, dict):
+        # Quantum resources of tempest.tests.network.common
+        list_ids = getattr(thing, 'list_ids', None)
+        return list_ids() if list_ids else None
+    # Avoid getattr(), which lazy-loads missing novaclient attributes
+    manager = thing.__dict__.get('manager')
+    if manager is None:
+        return None
+    return set(resource.id for resource in manager.list())
+
+
+def _is_deleted(thing):
+    # Deletion testing is only required for objects whose
+    # existence cannot be checked via retrieval.
+    if isinstance(thing, dict):
+        return True
+    try:
+        thing.get()
+    except Exception as e:
+        # Clients are expected to return an exception
+        # called 'NotFound' if retrieval fails.
+        if e.__class__.__name__ == 'NotFound':
+            return True
+        raise
+    return False
+
 
 class SmokeTest(object):
 
@@ -50,36 +115,69 @@ class DefaultClientSmokeTest(test.DefaultClientTest, SmokeTest):
         # NOTE(jaypipes): Because smoke tests are typically run in a specific
         # order, and because test methods in smoke tests generally create
         # resources in a particular order, we destroy resources in the reverse
-        # order in which resources are added to the smoke test class object
+        # order in which resources are added to the smoke test class object,
+        # unless DELETION_LAYERS tells which of them can go at the same time
+        layers = [[] for _ in DELETION_LAYERS]
+        others = []
         while cls.os_resources:
             thing = cls.os_resources.pop()
-            LOG.debug("Deleting %r from shared resources of %s" %
-                      (thing, cls.__name__))
+            layer = _get_deletion_layer(thing)
+            if layer is None:
+                others.append(thing)
+            else:
+                layers[layer].append(thing)
+
+        errors = []
+        for things in layers:
+            if things:
+                errors.extend(cls._delete_layer(things))
+        for thing in others:
+            errors.extend(cls._delete_layer([thing]))
+        if errors:
+            raise errors[0]
 
+    @classmethod
+    def _delete_layer(cls, things):
+        """
+        Deletes the resources, then waits until all of them are gone,
+        checking each resource type with a single list call per interval.
+        Returns the errors raised by the deletions.
+
+        The deletions are issued one at a time, as the resources share the
+        httplib2 connections of their clients, which are not thread-safe.
+        """
+        LOG.debug("Deleting %s from shared resources of %s" %
+                  (', '.join(map(repr, things)), cls.__name__))
+        errors = []
+        deleted = []
+        for thing in things:
             try:
-                # OpenStack resources are assumed to have a delete()
-                # method which destroys the resource...
-                thing.delete()
-            except Exception as e:
-                # If the resource is already missing, mission accomplished.
-                if e.__class__.__name__ == 'NotFound':
-                    continue
-                raise
-
-            def is_deletion_complete():
-                # Deletion testing is only required for objects whose
-                # existence cannot be checked via retrieval.
-                if isinstance(thing, dict):
-                    return True
-                try:
-                    thing.get()
-                except Exception as e:
-                    # Clients are expected to return an exception
-                    # called 'NotFound' if retrieval fails.
-                    if e.__class__.__name__ == 'NotFound':
-                        return True
-                    raise
-                return False
-
-            # Block until resource deletion has completed or timed-out
-            test.call_until_true(is_deletion_complete, 10, 1)
+                _delete(thing)
+            except Exception as error:
+                if error.__class__.__name__ != 'NotFound':
+                    LOG.error("Unable to delete %r: %s" % (thing, error))
+                    errors.append(error)
+            else:
+                deleted.append(thing)
+
+        def is_deletion_complete():
+            # One list call per type checks all of its resources at once
+            remaining = []
+            for type_things in _group_by_type(deleted).values():
+                existing = _list_ids(type_things[0])
+                if existing is None:
+                    # Unlistable resources are checked one by one
+                    remaining.extend(t for t in type_things
+                                     if not _is_deleted(t))
+                else:
+                    remaining.extend(t for t in type_things
+                                     if t.id in existing)
+            deleted[:] = remaining
+            return not remaining
+
+        # Block until the deletions of the layer completed or timed-out
+        if deleted and not test.call_until_true(
+                is_deletion_complete, cls.config.compute.build_timeout, 1):
+            LOG.warning("Deletion of %s did not complete" %
+                        ', '.join(map(repr, deleted)))
+        return errors
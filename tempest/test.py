@@ -22,6 +22,7 @@ import nose.plugins.attrib
 import testresources
 import testtools
 
+from tempest.common import polling
 from tempest import config
 from tempest import manager
 
@@ -57,6 +58,20 @@ class BaseTestCase(testtools.TestCase,
         BaseTestCase.config = config.TempestConfig()
 
 
+class _ManagerClient(object):
+    """Class attribute reading a client of the manager of the class.
+
+    The client is only looked up on first access, so that managers can
+    build their clients lazily.
+    """
+
+    def __init__(self, attr_name):
+        self.attr_name = attr_name
+
+    def __get__(self, instance, owner):
+        return getattr(owner.manager, self.attr_name)
+
+
 class TestCase(BaseTestCase):
     """Base test case class for all Tempest tests
 
@@ -70,10 +85,9 @@ class TestCase(BaseTestCase):
         cls.manager = cls.manager_class()
         for attr_name in cls.manager.client_attr_names:
             # Ensure that pre-existing class attributes won't be
-            # accidentally overriden.
-            assert not hasattr(cls, attr_name)
-            client = getattr(cls.manager, attr_name)
-            setattr(cls, attr_name, client)
+            # accidentally overriden. hasattr() would build the client.
+            assert not any(attr_name in vars(klass) for klass in cls.__mro__)
+            setattr(cls, attr_name, _ManagerClient(attr_name))
         cls.resource_keys = {}
         cls.os_resources = []
 
@@ -102,13 +116,16 @@ def call_until_true(func, duration, sleep_for):
     :param duration: The number of seconds for which to attempt a successful
                      call of the function.
     :param sleep_for: The number of seconds to sleep after an unsuccessful
-                      invocation of the function.
+                      invocation of the function, when the configured
+                      polling policy is 'fixed'.
     """
+    intervals = polling.get_policy().intervals(interval=sleep_for)
     now = time.time()
     timeout = now + duration
     while now < timeout:
         if func():
             return True
+        sleep_for = min(next(intervals), timeout - now)
         LOG.debug("Sleeping for %d seconds", sleep_for)
         time.sleep(sleep_for)
         now = time.time()
@@ -18,7 +18,9 @@
 from contextlib import closing
 import logging
 import os
+import Queue
 import re
+import time
 import urlparse
 
 import boto
@@ -29,6 +31,7 @@ import keystoneclient.exceptions
 
 import tempest.clients
 from tempest.common.utils.file_utils import have_effective_read_access
+from tempest.common import workers
 import tempest.config
 from tempest import exceptions
 import tempest.test
@@ -38,6 +41,9 @@ from tempest.tests.boto.utils.wait import wait_exception
 
 LOG = logging.getLogger(__name__)
 
+# Number of resource cleanups tearDownClass runs at the same time
+CLEANUP_CONCURRENCY = 4
+
 
 def decision_maker():
     A_I_IMAGES_READY = True  # ari,ami,aki
@@ -198,6 +204,11 @@ class BotoTestCase(tempest.test.BaseTestCase):
         # The trash contains cleanup functions and paramaters in tuples
         # (function, *args, **kwargs)
         cls._resource_trash_bin = {}
+        # Keys of the cleanups which must run before a cleanup, when they
+        # were declared by addResourceCleanUpDependency
+        cls._resource_cleanup_deps = {}
+        # (cleanup call, seconds taken) tuples of the last tearDownClass
+        cls.resource_cleanup_durations = []
         cls._sequence = -1
         if (hasattr(cls, "EC2") and
             cls.conclusion['EC2_CAN_CONNECT_ERROR'] is not None):
@@ -217,10 +228,26 @@ class BotoTestCase(tempest.test.BaseTestCase):
         cls._resource_trash_bin[cls._sequence] = (function, args, kwargs)
         return cls._sequence
 
+    @classmethod
+    def addResourceCleanUpDependency(cls, key, *after_keys):
+        """Declares that a cleanup must run after the after_keys ones.
+
+        By default a cleanup runs after every cleanup added later. Once its
+        dependencies are declared, the cleanup waits only for them, which
+        lets tearDownClass run it concurrently with the others.
+        Example: a volume cleanup after the one of its instance::
+
+            rcuk_r = cls.addResourceCleanUp(cls.destroy_reservation, rsv)
+            rcuk_v = cls.addResourceCleanUp(cls.destroy_volume_wait, vol)
+            cls.addResourceCleanUpDependency(rcuk_v, rcuk_r)
+        """
+        cls._resource_cleanup_deps[key] = set(after_keys)
+
     @classmethod
     def cancelResourceCleanUp(cls, key):
         """Cancel Clean up request."""
         del cls._resource_trash_bin[key]
+        cls._resource_cleanup_deps.pop(key, None)
 
     #TODO(afazekas): Add "with" context handling
     def assertBotoError(self, excMatcher, callableObj,
@@ -240,25 +267,69 @@ class BotoTestCase(tempest.test.BaseTestCase):
         else:
             raise self.failureException, "BotoServerError not raised"
 
+    @classmethod
+    def _run_resource_cleanup(cls, key, done):
+        call_str = "cleanup %s" % key
+        failed = False
+        start = time.time()
+        try:
+            (function, pos_args, kw_args) = cls._resource_trash_bin[key]
+            call_str = friendly_function_call_str(function, *pos_args,
+                                                  **kw_args)
+            LOG.debug("Cleaning up: %s" % call_str)
+            function(*pos_args, **kw_args)
+        except BaseException as exc:
+            failed = True
+            LOG.exception(exc)
+        finally:
+            duration = time.time() - start
+            LOG.debug("Cleaned up in %.1f s: %s" % (duration, call_str))
+            cls.resource_cleanup_durations.append((call_str, duration))
+            done.put((key, failed))
+
+    @classmethod
+    def _get_resource_cleanup_deps(cls, key, unfinished):
+        if key in cls._resource_cleanup_deps:
+            return cls._resource_cleanup_deps[key] & unfinished
+        return set(k for k in unfinished if k > key)
+
     @classmethod
     def tearDownClass(cls):
         """Calls the callables added by addResourceCleanUp,
         when you overwire this function dont't forget to call this too.
+
+        A cleanup starts once the cleanups it depends on finished, so
+        independent ones run concurrently.
         """
         fail_count = 0
-        trash_keys = sorted(cls._resource_trash_bin, reverse=True)
-        for key in trash_keys:
-            (function, pos_args, kw_args) = cls._resource_trash_bin[key]
-            try:
-                LOG.debug("Cleaning up: %s" %
-                          friendly_function_call_str(function, *pos_args,
-                                                     **kw_args))
-                function(*pos_args, **kw_args)
-            except BaseException as exc:
-                fail_count += 1
-                LOG.exception(exc)
-            finally:
+        cls.resource_cleanup_durations = []
+        pending = set(cls._resource_trash_bin)
+        running = set()
+        done = Queue.Queue()
+        pool = workers.WorkerPool(CLEANUP_CONCURRENCY, name='cleanup')
+        try:
+            while pending or running:
+                unfinished = pending | running
+                ready = [key for key in pending
+                         if not cls._get_resource_cleanup_deps(key,
+                                                               unfinished)]
+                if not ready and not running:
+                    # Circular dependencies, fall back to reverse order
+                    LOG.error("Circular cleanup dependencies in %s" %
+                              cls.__name__)
+                    ready = [max(pending)]
+                for key in sorted(ready, reverse=True):
+                    pending.remove(key)
+                    running.add(key)
+                    pool.submit(cls._run_resource_cleanup, key, done)
+                key, failed = done.get()
+                running.remove(key)
                 del cls._resource_trash_bin[key]
+                cls._resource_cleanup_deps.pop(key, None)
+                if failed:
+                    fail_count += 1
+        finally:
+            pool.shutdown()
         if fail_count:
             raise exceptions.TearDownException(num=fail_count)
 
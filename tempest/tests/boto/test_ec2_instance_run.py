@@ -149,8 +149,8 @@ class InstanceRunTest(BotoTestCase):
         group_desc = sec_group_name + " security group description "
         security_group = self.ec2_client.create_security_group(sec_group_name,
                                                                group_desc)
-        self.addResourceCleanUp(self.destroy_security_group_wait,
-                                security_group)
+        rcuk_sg = self.addResourceCleanUp(self.destroy_security_group_wait,
+                                          security_group)
         self.assertTrue(self.ec2_client.authorize_security_group(
                 sec_group_name,
                 ip_protocol="icmp",
@@ -168,10 +168,12 @@ class InstanceRunTest(BotoTestCase):
                                     instance_type=self.instance_type,
                                     key_name=self.keypair_name,
                                     security_groups=(sec_group_name,))
-        self.addResourceCleanUp(self.destroy_reservation,
-                                reservation)
+        rcuk_r = self.addResourceCleanUp(self.destroy_reservation,
+                                         reservation)
+        self.addResourceCleanUpDependency(rcuk_sg, rcuk_r)
         volume = self.ec2_client.create_volume(1, self.zone)
-        self.addResourceCleanUp(self.destroy_volume_wait, volume)
+        rcuk_v = self.addResourceCleanUp(self.destroy_volume_wait, volume)
+        self.addResourceCleanUpDependency(rcuk_v, rcuk_r)
         instance = reservation.instances[0]
         LOG.info("state: %s", instance.state)
         if instance.state != "running":
@@ -182,6 +184,9 @@ class InstanceRunTest(BotoTestCase):
         self.assertTrue(address.associate(instance.id))
 
         rcuk_da = self.addResourceCleanUp(address.disassociate)
+        self.addResourceCleanUpDependency(rcuk_a, rcuk_da)
+        self.addResourceCleanUpDependency(rcuk_r, rcuk_da)
+        self.addResourceCleanUpDependency(rcuk_da)
         #TODO(afazekas): ping test. dependecy/permission ?
 
         self.assertVolumeStatusWait(volume, "available")
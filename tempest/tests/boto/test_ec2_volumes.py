@@ -57,10 +57,11 @@ class EC2VolumesTest(BotoTestCase):
     def test_create_volume_from_snapshot(self):
         # EC2 Create volume from snapshot
         volume = self.client.create_volume(1, self.zone)
-        self.addResourceCleanUp(self.client.delete_volume, volume.id)
+        cuk_v = self.addResourceCleanUp(self.client.delete_volume, volume.id)
         self.assertVolumeStatusWait(volume, "available")
         snap = self.client.create_snapshot(volume.id)
-        self.addResourceCleanUp(self.destroy_snapshot_wait, snap)
+        cuk_s = self.addResourceCleanUp(self.destroy_snapshot_wait, snap)
+        self.addResourceCleanUpDependency(cuk_v, cuk_s)
         self.assertSnapshotStatusWait(snap, "completed")
 
         svol = self.client.create_volume(1, self.zone, snapshot=snap)
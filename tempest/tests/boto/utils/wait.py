@@ -22,6 +22,7 @@ import time
 from boto.exception import BotoServerError
 from testtools import TestCase
 
+from tempest.common import polling
 import tempest.config
 
 LOG = logging.getLogger(__name__)
@@ -41,11 +42,15 @@ def state_wait(lfunction, final_set=set(), valid_set=None):
         valid_set = set((valid_set,))
     start_time = time.time()
     old_status = status = lfunction()
+    policy = polling.get_policy()
+    transition = 'boto %s->%s' % (status, '|'.join(sorted(final_set)))
+    intervals = policy.intervals(transition, default_check_interval)
     while True:
         if status != old_status:
             LOG.info('State transition "%s" ==> "%s" %d second', old_status,
                      status, time.time() - start_time)
         if status in final_set:
+            policy.record(transition, time.time() - start_time)
             return status
         if valid_set is not None and status not in valid_set:
             return status
@@ -56,7 +61,7 @@ def state_wait(lfunction, final_set=set(), valid_set=None):
                                             'for %s at "%s"' %
                                             (dtime,
                                             final_set, status))
-        time.sleep(default_check_interval)
+        time.sleep(next(intervals))
         old_status = status
         status = lfunction()
 
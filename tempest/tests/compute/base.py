@@ -19,6 +19,8 @@ import logging
 import time
 
 from tempest import clients
+from tempest.common import isolated_creds
+from tempest.common import server_pool
 from tempest.common.utils.data_utils import rand_name
 from tempest import exceptions
 import tempest.test
@@ -36,6 +38,7 @@ class BaseComputeTest(tempest.test.BaseTestCase):
     @classmethod
     def setUpClass(cls):
         cls.isolated_creds = []
+        cls._creds_lease = None
 
         if cls.config.compute.allow_tenant_isolation:
             creds = cls._get_isolated_creds()
@@ -68,6 +71,7 @@ class BaseComputeTest(tempest.test.BaseTestCase):
         cls.flavor_ref = cls.config.compute.flavor_ref
         cls.flavor_ref_alt = cls.config.compute.flavor_ref_alt
         cls.servers = []
+        cls.leased_servers = []
 
     @classmethod
     def _get_identity_admin_client(cls):
@@ -94,7 +98,14 @@ class BaseComputeTest(tempest.test.BaseTestCase):
         Creates a new set of user/tenant/password credentials for a
         **regular** user of the Compute API so that a test case can
         operate in an isolated tenant container.
+
+        When the isolated credentials pool is enabled, the credentials are
+        leased from it instead, and only created if the pool is exhausted.
         """
+        creds = isolated_creds.lease_isolated_creds(cls)
+        if creds is not None:
+            return creds
+
         admin_client = cls._get_identity_admin_client()
         rand_name_root = rand_name(cls.__name__)
         if cls.isolated_creds:
@@ -150,26 +161,55 @@ class BaseComputeTest(tempest.test.BaseTestCase):
             return
         admin_client = cls._get_identity_admin_client()
 
-        for user, tenant in cls.isolated_creds:
+        for user, tenant in isolated_creds.release_isolated_creds(cls):
             admin_client.delete_user(user['id'])
             admin_client.delete_tenant(tenant['id'])
 
     @classmethod
     def clear_servers(cls):
-        for server in cls.servers:
-            try:
-                cls.servers_client.delete_server(server['id'])
-            except Exception:
-                pass
+        """
+        Deletes the servers of the class concurrently, then waits for all
+        of them at once. Failures are logged together and never raised.
+        """
+        if not cls.servers:
+            return
+        client = cls.servers_client
+        server_ids = [server['id'] for server in cls.servers]
+        futures = [client.submit(client.delete_server, server_id)
+                   for server_id in server_ids]
+
+        failures = []
+        deleted = []
+        for server_id, future in zip(server_ids, futures):
+            exc = future.exception()
+            if exc is None:
+                deleted.append(server_id)
+            elif not isinstance(exc, exceptions.NotFound):
+                failures.append('Unable to delete server %s: %s' %
+                                (server_id, exc))
 
-        for server in cls.servers:
-            try:
-                cls.servers_client.wait_for_server_termination(server['id'])
-            except Exception:
-                pass
+        try:
+            client.wait_for_servers_termination(deleted)
+        except Exception as exc:
+            failures.append(str(exc))
+
+        if failures:
+            LOG.error('Errors while clearing the servers of %s:\n%s',
+                      cls.__name__, '\n'.join(failures))
+
+    @classmethod
+    def release_servers(cls):
+        if not cls.leased_servers:
+            return
+        pool = server_pool.get_pool(cls.config, cls.servers_client,
+                                    cls.image_ref, cls.flavor_ref)
+        for server, dirty in cls.leased_servers:
+            pool.release(server, dirty)
+        cls.leased_servers = []
 
     @classmethod
     def tearDownClass(cls):
+        cls.release_servers()
         cls.clear_servers()
         cls.clear_isolated_creds()
 
@@ -192,6 +232,25 @@ class BaseComputeTest(tempest.test.BaseTestCase):
         cls.servers.append(server)
         return resp, server
 
+    @classmethod
+    def lease_server(cls, dirty=False):
+        """Returns some ACTIVE server of image_ref and flavor_ref.
+
+        The server is leased from the server pool when it is enabled, and
+        created otherwise. Classes which change the server must pass
+        dirty=True, so it gets replaced rather than leased again.
+        """
+        pool = server_pool.get_pool(cls.config, cls.servers_client,
+                                    cls.image_ref, cls.flavor_ref)
+        server = None
+        if pool is not None:
+            server = pool.lease()
+        if server is None:
+            resp, server = cls.create_server(wait_until='ACTIVE')
+        else:
+            cls.leased_servers.append((server, dirty))
+        return server
+
     def wait_for(self, condition):
         """Repeatedly calls condition() until a timeout."""
         start_time = int(time.time())
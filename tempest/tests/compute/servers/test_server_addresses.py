@@ -28,7 +28,7 @@ class ServerAddressesTest(base.BaseComputeTest):
         super(ServerAddressesTest, cls).setUpClass()
         cls.client = cls.servers_client
 
-        resp, cls.server = cls.create_server(wait_until='ACTIVE')
+        cls.server = cls.lease_server()
 
     @attr(type='negative', category='server-addresses')
     def test_list_server_addresses_invalid_server_id(self):
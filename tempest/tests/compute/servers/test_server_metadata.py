@@ -32,7 +32,7 @@ class ServerMetadataTestJSON(base.BaseComputeTest):
         resp, tenants = cls.admin_client.list_tenants()
         cls.tenant_id = [tnt['id'] for tnt in tenants if tnt['name'] ==
                          cls.client.tenant_name][0]
-        resp, server = cls.create_server(meta={}, wait_until='ACTIVE')
+        server = cls.lease_server(dirty=True)
 
         cls.server_id = server['id']
 
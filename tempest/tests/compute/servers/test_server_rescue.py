@@ -65,14 +65,13 @@ class ServerRescueTestJSON(base.BaseComputeTest):
 
         # Server for positive tests
         resp, server = cls.create_server(image_id=cls.image_ref,
-                                         flavor=cls.flavor_ref,
-                                         wait_until='BUILD')
+                                         flavor=cls.flavor_ref)
         resp, resc_server = cls.create_server(image_id=cls.image_ref,
-                                              flavor=cls.flavor_ref,
-                                              wait_until='ACTIVE')
+                                              flavor=cls.flavor_ref)
         cls.server_id = server['id']
         cls.password = server['adminPass']
-        cls.servers_client.wait_for_server_status(cls.server_id, 'ACTIVE')
+        cls.servers_client.wait_for_servers_status(
+            [(cls.server_id, 'ACTIVE'), (resc_server['id'], 'ACTIVE')])
 
         # Server for negative tests
         cls.rescue_id = resc_server['id']
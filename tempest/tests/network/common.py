@@ -54,7 +54,14 @@ class DeletableResource(AttributeDict):
                                            self.id, self.name)
 
     def delete(self):
-        raise NotImplemented()
+        raise NotImplementedError()
+
+    def list_ids(self):
+        """
+        Returns the ids of the existing resources of this type, or None if
+        they cannot be listed.
+        """
+        return None
 
 
 class DeletableNetwork(DeletableResource):
@@ -62,10 +69,17 @@ class DeletableNetwork(DeletableResource):
     def delete(self):
         self.client.delete_network(self.id)
 
+    def list_ids(self):
+        networks = self.client.list_networks()['networks']
+        return set(network['id'] for network in networks)
+
 
 class DeletableSubnet(DeletableResource):
 
-    _router_ids = set()
+    def __init__(self, *args, **kwargs):
+        super(DeletableSubnet, self).__init__(*args, **kwargs)
+        # Per subnet, a class-level set would be shared by every subnet
+        self._router_ids = set()
 
     def add_to_router(self, router_id):
         self._router_ids.add(router_id)
@@ -79,6 +93,10 @@ class DeletableSubnet(DeletableResource):
             self._router_ids.remove(router_id)
         self.client.delete_subnet(self.id)
 
+    def list_ids(self):
+        subnets = self.client.list_subnets()['subnets']
+        return set(subnet['id'] for subnet in subnets)
+
 
 class DeletableRouter(DeletableResource):
 
@@ -90,18 +108,30 @@ class DeletableRouter(DeletableResource):
         self.client.remove_gateway_router(self.id)
         self.client.delete_router(self.id)
 
+    def list_ids(self):
+        routers = self.client.list_routers()['routers']
+        return set(router['id'] for router in routers)
+
 
 class DeletableFloatingIp(DeletableResource):
 
     def delete(self):
         self.client.delete_floatingip(self.id)
 
+    def list_ids(self):
+        floating_ips = self.client.list_floatingips()['floatingips']
+        return set(floating_ip['id'] for floating_ip in floating_ips)
+
 
 class DeletablePort(DeletableResource):
 
     def delete(self):
         self.client.delete_port(self.id)
 
+    def list_ids(self):
+        ports = self.client.list_ports()['ports']
+        return set(port['id'] for port in ports)
+
 
 class TestNetworkSmokeCommon(smoke.DefaultClientSmokeTest):
     """
@@ -19,6 +19,7 @@ import logging
 import time
 
 from tempest import clients
+from tempest.common import isolated_creds
 from tempest.common.utils.data_utils import rand_name
 from tempest import exceptions
 import tempest.test
@@ -33,6 +34,7 @@ class BaseVolumeTest(tempest.test.BaseTestCase):
     @classmethod
     def setUpClass(cls):
         cls.isolated_creds = []
+        cls._creds_lease = None
 
         if cls.config.compute.allow_tenant_isolation:
             creds = cls._get_isolated_creds()
@@ -81,7 +83,14 @@ class BaseVolumeTest(tempest.test.BaseTestCase):
         Creates a new set of user/tenant/password credentials for a
         **regular** user of the Volume API so that a test case can
         operate in an isolated tenant container.
+
+        When the isolated credentials pool is enabled, the credentials are
+        leased from it instead, and only created if the pool is exhausted.
         """
+        creds = isolated_creds.lease_isolated_creds(cls)
+        if creds is not None:
+            return creds
+
         admin_client = cls._get_identity_admin_client()
         rand_name_root = rand_name(cls.__name__)
         if cls.isolated_creds:
@@ -112,7 +121,7 @@ class BaseVolumeTest(tempest.test.BaseTestCase):
             return
         admin_client = cls._get_identity_admin_client()
 
-        for user, tenant in cls.isolated_creds:
+        for user, tenant in isolated_creds.release_isolated_creds(cls):
             admin_client.delete_user(user['id'])
             admin_client.delete_tenant(tenant['id'])
 
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measure how long importing tempest.clients and building its Managers take
+
+Imports are timed in fresh interpreters, so that nothing is cached. For
+example, from the root of the tree:
+
+    python tools/clients_benchmark.py --repeat 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BASEDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_SCRIPT = """
+import sys
+import time
+start = time.time()
+import %s
+print time.time() - start
+print len([m for m in sys.modules if m.startswith('tempest.services')])
+"""
+
+
+def time_import(module, repeat):
+    """Returns the import times of module, and the service modules loaded.
+    """
+    times = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SCRIPT % module], cwd=BASEDIR)
+        seconds, service_modules = output.split()
+        times.append(float(seconds))
+    return times, int(service_modules)
+
+
+def time_construction(repeat, clients):
+    """Returns the times taken to build a Manager and access clients."""
+    sys.path.insert(0, BASEDIR)
+    from tempest import clients as tempest_clients
+
+    build_times = []
+    access_times = []
+    for _ in range(repeat):
+        start = time.time()
+        manager = tempest_clients.Manager()
+        build_times.append(time.time() - start)
+        start = time.time()
+        for name in clients:
+            getattr(manager, name)
+        access_times.append(time.time() - start)
+    return build_times, access_times
+
+
+def report(name, times):
+    print "%-40s min %8.2f ms  mean %8.2f ms" % (
+        name, min(times) * 1000, sum(times) * 1000 / len(times))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Benchmark importing tempest.clients and building '
+                    'Managers.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--clients', default='servers_client,images_client',
+                        help='Comma separated clients accessed after '
+                             'building a Manager, as a test class would')
+    args = parser.parse_args(argv)
+    clients = [name for name in args.clients.split(',') if name]
+
+    times, service_modules = time_import('tempest.clients', args.repeat)
+    report('import tempest.clients', times)
+    print "%-40s %d" % ('service modules imported', service_modules)
+
+    build_times, access_times = time_construction(args.repeat, clients)
+    report('Manager()', build_times)
+    report('access %d clients' % len(clients), access_times)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2013 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Report what importing the scenario test modules costs
+
+Every entry point is imported in a fresh interpreter with __import__
+wrapped, so that the time spent loading each module is measured. For
+example, from the root of the tree:
+
+    python tools/import_profile.py --limit 15
+    python tools/import_profile.py tempest.tests.network.test_network_basic_ops
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASEDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ENTRY_POINTS = [
+    'tempest.smoke',
+    'tempest.tests.compute.servers.test_server_basic_ops',
+    'tempest.tests.compute.servers.test_server_advanced_ops',
+    'tempest.tests.network.test_network_basic_ops',
+]
+
+# Client libraries tempest.manager should only load on first use
+CLIENT_LIBRARIES = ['glanceclient', 'keystoneclient', 'novaclient',
+                    'quantumclient']
+
+PROFILE_SCRIPT = """
+import __builtin__
+import json
+import sys
+import time
+
+modules = {}
+stack = []
+real_import = __builtin__.__import__
+
+
+def timed_import(name, *args, **kwargs):
+    before = set(sys.modules)
+    stack.append(0.0)
+    start = time.time()
+    try:
+        return real_import(name, *args, **kwargs)
+    finally:
+        total = time.time() - start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += total
+        loaded = set(sys.modules) - before
+        if loaded:
+            modules[name] = {'total': total, 'self': total - nested}
+
+__builtin__.__import__ = timed_import
+start = time.time()
+import %(module)s
+total = time.time() - start
+__builtin__.__import__ = real_import
+print json.dumps({'total': total, 'modules': modules,
+                  'loaded': sorted(sys.modules)})
+"""
+
+
+def profile(module):
+    """Returns the import profile of module, measured in a new interpreter.
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROFILE_SCRIPT % {'module': module}],
+        cwd=BASEDIR)
+    return json.loads(output.splitlines()[-1])
+
+
+def report(module, result, limit):
+    print "%s: %.1f ms, %d modules loaded" % (
+        module, result['total'] * 1000, len(result['loaded']))
+    loaded = set(name.split('.')[0] for name in result['loaded'])
+    libraries = [lib for lib in CLIENT_LIBRARIES if lib in loaded]
+    print "  client libraries loaded: %s" % (', '.join(libraries) or 'none')
+    slowest = sorted(result['modules'].items(),
+                     key=lambda m: m[1]['self'], reverse=True)
+    for name, times in slowest[:limit]:
+        print "  %8.1f ms self %8.1f ms total  %s" % (
+            times['self'] * 1000, times['total'] * 1000, name)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description='Profile the imports of the scenario test modules.')
+    parser.add_argument('modules', nargs='*', default=ENTRY_POINTS,
+                        help='Modules to profile, the scenario test '
+                             'modules by default')
+    parser.add_argument('--limit', type=int, default=10,
+                        help='Number of slowest imports listed per module')
+    parser.add_argument('--json', dest='json_file', default=None,
+                        help='Also write the raw profiles to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    failed = False
+    for module in args.modules:
+        try:
+            results[module] = profile(module)
+        except subprocess.CalledProcessError:
+            print "%s: import failed" % module
+            failed = True
+            continue
+        report(module, results[module], args.limit)
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))